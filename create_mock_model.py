@@ -4,12 +4,35 @@ Create a mock TensorFlow Lite model for development and testing.
 This allows the Flutter app to run without the full ML pipeline.
 """
 
-import tensorflow as tf
+import argparse
+import json
 import numpy as np
 import os
+import sys
+import tempfile
 
-def create_mock_model():
-    """Create a simple mock model that mimics the real poverty prediction model."""
+# Shared pipeline helpers live in scripts/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from feature_spec import write_spec
+from instrumentation import add_trace_arguments, tracer
+
+# TensorFlow is imported inside the functions that use it so that --help
+# returns immediately.
+
+ASSETS_DIR = 'assets/models'
+MODEL_FILE = 'echo_wealth.tflite'
+SPEC_FILE = 'feature_spec.json'
+
+def create_mock_model(seed=0):
+    """Create a simple mock model that mimics the real poverty prediction model.
+    
+    Weight initialization, the dummy data and training are all seeded, so
+    the same seed rebuilds the same model.
+    """
+    import tensorflow as tf
+    
+    tf.keras.utils.set_random_seed(seed)
+    tf.config.experimental.enable_op_determinism()
     
     # Create a simple model with the same input/output signature
     model = tf.keras.Sequential([
@@ -23,8 +46,9 @@ def create_mock_model():
     model.compile(optimizer='adam', loss='binary_crossentropy')
     
     # Create some dummy training data
-    X_dummy = np.random.randn(100, 21).astype(np.float32)
-    y_dummy = np.random.rand(100, 1).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    X_dummy = rng.standard_normal((100, 21)).astype(np.float32)
+    y_dummy = rng.random((100, 1)).astype(np.float32)
     
     # Train for a few epochs to initialize weights
     model.fit(X_dummy, y_dummy, epochs=5, verbose=0)
@@ -32,29 +56,34 @@ def create_mock_model():
     print("Mock model created and trained")
     return model
 
-def convert_to_tflite(model):
-    """Convert the mock model to TensorFlow Lite."""
+def convert_to_tflite(model, output_dir):
+    """Convert the mock model to TensorFlow Lite, with its feature spec, in output_dir."""
+    import tensorflow as tf
     
     converter = tf.lite.TFLiteConverter.from_keras_model(model)
     converter.optimizations = [tf.lite.Optimize.DEFAULT]
     
     tflite_model = converter.convert()
     
-    # Save to assets directory
-    assets_dir = 'assets/models'
-    os.makedirs(assets_dir, exist_ok=True)
-    
-    model_path = os.path.join(assets_dir, 'echo_wealth.tflite')
+    model_path = os.path.join(output_dir, MODEL_FILE)
     with open(model_path, 'wb') as f:
         f.write(tflite_model)
     
-    print(f"Mock TFLite model saved to {model_path}")
-    print(f"Model size: {len(tflite_model) / 1024:.1f} KB")
+    print(f"Mock TFLite model converted ({len(tflite_model) / 1024:.1f} KB)")
+    
+    write_spec(os.path.join(output_dir, SPEC_FILE))
     
     return model_path
 
-def verify_mock_model(model_path):
+def install_assets(build_dir, assets_dir=ASSETS_DIR):
+    """Move the built model and its feature spec over the shipped assets."""
+    for name in (MODEL_FILE, SPEC_FILE):
+        os.replace(os.path.join(build_dir, name), os.path.join(assets_dir, name))
+    print(f"Mock TFLite model saved to {os.path.join(assets_dir, MODEL_FILE)}")
+
+def verify_mock_model(model_path, seed=0):
     """Verify the mock model works."""
+    import tensorflow as tf
     
     interpreter = tf.lite.Interpreter(model_path=model_path)
     interpreter.allocate_tensors()
@@ -63,7 +92,7 @@ def verify_mock_model(model_path):
     output_details = interpreter.get_output_details()
     
     # Test with random input
-    test_input = np.random.randn(1, 21).astype(np.float32)
+    test_input = np.random.default_rng(seed).standard_normal((1, 21)).astype(np.float32)
     
     interpreter.set_tensor(input_details[0]['index'], test_input)
     interpreter.invoke()
@@ -72,13 +101,63 @@ def verify_mock_model(model_path):
     print(f"Test inference: Input shape {test_input.shape} -> Output {output[0][0]:.3f}")
     print("Mock model verification successful!")
 
-def main():
+def check_golden(model_path, golden_path, record=False, max_latency_regression=10.0):
+    """Check the model against its golden outputs and latency, or record them."""
+    from model_regression import check_model, load_spec, print_report, record_golden
+    
+    if record:
+        with open(golden_path, 'w') as f:
+            json.dump(record_golden(model_path, load_spec(model_path)), f, indent=2)
+        print(f"Golden outputs and latency recorded in {golden_path}")
+        return True
+    
+    with open(golden_path) as f:
+        golden = json.load(f)
+    passed, report = check_model(model_path, golden,
+                                 max_latency_regression=max_latency_regression)
+    print_report(report)
+    return passed
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the mock build; the same seed gives the same model')
+    parser.add_argument('--golden', default='test/fixtures/model_golden.json',
+                        help='golden outputs and latency baseline the new model must match')
+    parser.add_argument('--record-golden', action='store_true',
+                        help='write the new model\'s outputs and latency as the golden record')
+    parser.add_argument('--max-latency-regression', type=float, default=10.0,
+                        help='largest p50 latency increase accepted, in percent (default: 10)')
+    add_trace_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    tracer.configure(args.trace, profile=args.cprofile)
     print("Creating mock TensorFlow Lite model for EchoWealth...")
     
-    # Create and convert model
-    model = create_mock_model()
-    model_path = convert_to_tflite(model)
-    verify_mock_model(model_path)
+    os.makedirs(ASSETS_DIR, exist_ok=True)
+    try:
+        # Build next to the shipped assets (os.replace needs the same file
+        # system) and replace them only once the golden check has passed
+        with tempfile.TemporaryDirectory(prefix='.build-', dir=ASSETS_DIR) as build_dir:
+            with tracer.stage('train_mock'):
+                model = create_mock_model(args.seed)
+            with tracer.stage('convert'):
+                model_path = convert_to_tflite(model, build_dir)
+            with tracer.stage('verify'):
+                verify_mock_model(model_path, args.seed)
+            if args.record_golden or os.path.exists(args.golden):
+                with tracer.stage('golden'):
+                    passed = check_golden(model_path, args.golden, args.record_golden,
+                                          args.max_latency_regression)
+                if not passed:
+                    raise SystemExit("Mock model does not match the golden record "
+                                     f"{args.golden}; shipped model left unchanged. "
+                                     "Re-record with --record-golden if intended")
+            install_assets(build_dir)
+    finally:
+        tracer.write('create_mock_model')
     
     print("\nMock model ready for Flutter development!")
     print("The app can now run without the full ML training pipeline.")
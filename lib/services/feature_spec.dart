@@ -0,0 +1,138 @@
+import 'dart:convert';
+import 'dart:math';
+import 'package:flutter/services.dart' show rootBundle;
+import '../models/daily_data.dart';
+
+/// Model feature definition exported by scripts/feature_spec.py.
+///
+/// Computes the same inputs the model was trained on from a week of
+/// [DailyData]; test/fixtures/feature_golden.json holds reference vectors.
+class FeatureSpec {
+  static const String assetPath = 'assets/models/feature_spec.json';
+
+  final int windowDays;
+  final int weekdays;
+  final List<Map<String, dynamic>> features;
+  final Map<String, dynamic> normalization;
+
+  FeatureSpec.fromJson(Map<String, dynamic> json)
+      : windowDays = json['window_days'] as int,
+        weekdays = json['weekdays'] as int,
+        features = (json['features'] as List).cast<Map<String, dynamic>>(),
+        normalization = json['normalization'] as Map<String, dynamic>;
+
+  static Future<FeatureSpec> load() async {
+    final json = await rootBundle.loadString(assetPath);
+    return FeatureSpec.fromJson(jsonDecode(json) as Map<String, dynamic>);
+  }
+
+  List<String> get names => features.map((f) => f['name'] as String).toList();
+
+  static double signal(DailyData day, String name) {
+    switch (name) {
+      case 'steps_mean':
+        return day.stepsMean;
+      case 'steps_std':
+        return day.stepsStd;
+      case 'idle_periods':
+        return day.idlePeriods.toDouble();
+      case 'charge_night_pct':
+        return day.chargeNightPct;
+      case 'charge_cycles':
+        return day.chargeCycles.toDouble();
+      case 'sms_loan_count':
+        return day.smsLoanCount.toDouble();
+    }
+    throw ArgumentError('Unknown signal: $name');
+  }
+
+  /// Raw features over the most recent [windowDays] days, oldest first.
+  List<double> compute(List<DailyData> days) {
+    final sorted = [...days]..sort((a, b) => a.date.compareTo(b.date));
+    final window = sorted.sublist(sorted.length - windowDays);
+
+    final columns = <String, double>{};
+    final values = <double>[];
+    for (final feature in features) {
+      final double value;
+      if (feature.containsKey('source')) {
+        value = columns[feature['source']]! * (feature['scale'] as num).toDouble();
+      } else {
+        final x = window.map((d) => signal(d, feature['signal'] as String)).toList();
+        value = aggregate(x, feature['aggregation'] as String);
+      }
+      columns[feature['name'] as String] = value;
+      values.add(value);
+    }
+    return values;
+  }
+
+  double aggregate(List<double> x, String aggregation) {
+    switch (aggregation) {
+      case 'mean':
+        return _mean(x);
+      case 'std':
+        return sqrt(_variance(x));
+      case 'var':
+        return _variance(x);
+      case 'sum':
+        return x.reduce((a, b) => a + b);
+      case 'slope':
+        {
+          final center = (x.length - 1) / 2;
+          double covariance = 0, spread = 0;
+          for (var i = 0; i < x.length; i++) {
+            covariance += x[i] * (i - center);
+            spread += (i - center) * (i - center);
+          }
+          return covariance / spread;
+        }
+      case 'daily_rate':
+        {
+          final total = x.reduce((a, b) => a + b);
+          return total > 0 ? total / x.length : 0.0;
+        }
+      case 'weekend_ratio':
+        {
+          final weekday = _mean(x.sublist(0, weekdays));
+          final weekend = _mean(x.sublist(weekdays));
+          return weekday > 0 ? weekend / weekday : 1.0;
+        }
+    }
+    throw ArgumentError('Unknown aggregation: $aggregation');
+  }
+
+  /// The spec's normalization applied to raw [compute] output.
+  List<double> normalize(List<double> values, [Map<String, dynamic>? stats]) {
+    stats ??= normalization;
+    final method = stats['method'];
+    final epsilon = (stats['epsilon'] as num).toDouble();
+    if (method == 'per_row') {
+      final mean = _mean(values);
+      final std = sqrt(_variance(values));
+      return values.map((v) => (v - mean) / (std + epsilon)).toList();
+    }
+    if (method == 'standard') {
+      final mean = (stats['mean'] as List).cast<num>();
+      final std = (stats['std'] as List).cast<num>();
+      return [
+        for (var i = 0; i < values.length; i++)
+          (values[i] - mean[i]) / max(std[i].toDouble(), epsilon),
+      ];
+    }
+    throw ArgumentError('Unknown normalization: $method');
+  }
+
+  /// What the TFLite model takes: raw features when it normalizes them itself.
+  List<double> modelInput(List<DailyData> days) {
+    final raw = compute(days);
+    return normalization['in_model'] == true ? raw : normalize(raw);
+  }
+
+  static double _mean(List<double> x) => x.reduce((a, b) => a + b) / x.length;
+
+  static double _variance(List<double> x) {
+    final mean = _mean(x);
+    return x.map((v) => (v - mean) * (v - mean)).reduce((a, b) => a + b) / x.length;
+  }
+}
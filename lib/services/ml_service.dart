@@ -1,6 +1,7 @@
 import 'package:flutter/foundation.dart';
 import '../models/daily_data.dart';
 import '../models/risk_prediction.dart';
+import 'feature_spec.dart';
 
 class MLService {
   static final MLService _instance = MLService._internal();
@@ -8,10 +9,11 @@ class MLService {
   MLService._internal();
 
   bool _isInitialized = false;
+  late FeatureSpec _featureSpec;
 
   Future<void> initialize() async {
-    // Mock initialization for demo
-    await Future.delayed(Duration(milliseconds: 100));
+    // Same feature definition the model was trained with
+    _featureSpec = await FeatureSpec.load();
     _isInitialized = true;
   }
 
@@ -39,20 +41,14 @@ class MLService {
     );
   }
 
+  /// Raw features; the TFLite model takes _featureSpec.modelInput(weekData).
   List<double> _prepareFeatures(List<DailyData> weekData) {
-    final lastWeek = weekData.take(7).toList();
-    
-    return [
-      lastWeek.map((d) => d.stepsMean).reduce((a, b) => a + b) / 7,
-      lastWeek.map((d) => d.stepsStd).reduce((a, b) => a + b) / 7,
-      lastWeek.map((d) => d.chargeNightPct).reduce((a, b) => a + b) / 7,
-      lastWeek.map((d) => d.smsLoanCount).reduce((a, b) => a + b).toDouble(),
-      lastWeek.map((d) => d.idlePeriods).reduce((a, b) => a + b).toDouble(),
-    ];
+    return _featureSpec.compute(weekData);
   }
 
   double _calculateRisk(List<double> features) {
-    // Simple rule-based risk calculation
+    // Simple rule-based risk calculation on the raw weekly aggregates
+    // (steps mean, night charging, SMS loans, idle periods)
     double mobilityFactor = 1 - (features[0] / 10000).clamp(0.0, 1.0);
     double chargingFactor = features[2];
     double smsFactor = (features[3] / 5).clamp(0.0, 1.0);
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark EchoWealth TensorFlow Lite inference on the host CPU.
+Reports warmed-up latency percentiles and throughput per thread count and batch size.
+"""
+
+import argparse
+import json
+import os
+import platform
+import time
+from datetime import datetime
+
+import numpy as np
+
+def make_inputs(input_detail, batch_size, data=None, rng=None):
+    """Build one input batch, from real feature rows when data is given."""
+    shape = (batch_size,) + tuple(input_detail['shape'][1:])
+    dtype = input_detail['dtype']
+
+    if data is not None and len(data) >= batch_size:
+        return np.asarray(data[:batch_size], dtype=dtype).reshape(shape)
+
+    rng = rng or np.random.default_rng(0)
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        return rng.integers(info.min, info.max, size=shape, endpoint=True, dtype=dtype)
+    return rng.standard_normal(shape).astype(dtype)
+
+def load_interpreter(model_path, num_threads=None, batch_size=1):
+    """Create an interpreter with its input resized to batch_size."""
+    import tensorflow as tf
+
+    interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+    input_detail = interpreter.get_input_details()[0]
+
+    if batch_size != input_detail['shape'][0]:
+        shape = [batch_size] + list(input_detail['shape'][1:])
+        interpreter.resize_tensor_input(input_detail['index'], shape)
+
+    interpreter.allocate_tensors()
+    return interpreter
+
+def measure_latency(interpreter, inputs, warmup=50, iterations=1000):
+    """Time invoke() alone, after warm-up runs; returns per-call latencies in ms."""
+    input_index = interpreter.get_input_details()[0]['index']
+    interpreter.set_tensor(input_index, inputs)
+
+    for _ in range(warmup):
+        interpreter.invoke()
+
+    latencies = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        interpreter.invoke()
+        latencies[i] = time.perf_counter_ns() - start
+
+    return latencies / 1e6
+
+def summarize(latencies_ms, batch_size):
+    """Latency percentiles and throughput for one configuration."""
+    p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+    return {
+        'iterations': len(latencies_ms),
+        'mean_ms': float(latencies_ms.mean()),
+        'min_ms': float(latencies_ms.min()),
+        'max_ms': float(latencies_ms.max()),
+        'p50_ms': float(p50),
+        'p90_ms': float(p90),
+        'p99_ms': float(p99),
+        'samples_per_sec': float(batch_size * 1000 / latencies_ms.mean()),
+    }
+
+def host_info():
+    """Describe the machine the benchmark ran on."""
+    import tensorflow as tf
+
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'tensorflow': tf.__version__,
+    }
+
+def run_benchmark(model_path, threads=(1, 2, 4), batch_sizes=(1, 8, 32),
+                  warmup=50, iterations=1000, data=None):
+    """Benchmark every threads x batch size combination of a .tflite model."""
+    results = []
+
+    for num_threads in threads:
+        for batch_size in batch_sizes:
+            config = {'num_threads': num_threads, 'batch_size': batch_size}
+            try:
+                interpreter = load_interpreter(model_path, num_threads, batch_size)
+            except (RuntimeError, ValueError) as e:
+                print(f"  threads={num_threads} batch={batch_size}: skipped ({e})")
+                results.append({**config, 'error': str(e)})
+                continue
+
+            inputs = make_inputs(interpreter.get_input_details()[0], batch_size, data)
+            stats = summarize(measure_latency(interpreter, inputs, warmup, iterations), batch_size)
+            results.append({**config, **stats})
+
+            print(f"  threads={num_threads} batch={batch_size}: "
+                  f"p50 {stats['p50_ms']:.3f}ms, p90 {stats['p90_ms']:.3f}ms, "
+                  f"p99 {stats['p99_ms']:.3f}ms, {stats['samples_per_sec']:,.0f} samples/sec")
+
+    return {
+        'model': os.path.basename(model_path),
+        'model_size_bytes': os.path.getsize(model_path),
+        'warmup': warmup,
+        'host': host_info(),
+        'results': results,
+        'generated_at': datetime.now().isoformat(),
+    }
+
+def compare_reports(report, baseline):
+    """Print the p50 change of every configuration present in both reports."""
+    previous = {
+        (r['num_threads'], r['batch_size']): r
+        for r in baseline['results'] if 'error' not in r
+    }
+
+    print(f"\nChange vs baseline ({baseline['model']}):")
+    for r in report['results']:
+        old = previous.get((r['num_threads'], r['batch_size']))
+        if 'error' in r or old is None:
+            continue
+        change = (r['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100
+        print(f"  threads={r['num_threads']} batch={r['batch_size']}: "
+              f"p50 {old['p50_ms']:.3f}ms -> {r['p50_ms']:.3f}ms ({change:+.1f}%)")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--model', default='echo_wealth.tflite')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--data', default='training_features.npy',
+                        help='feature rows used as inputs when the file exists')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=None,
+                        help='earlier benchmark JSON to compare p50 latency against')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print(f"Benchmarking {args.model}")
+    print("=" * 40)
+
+    data = np.load(args.data, mmap_mode='r') if os.path.exists(args.data) else None
+    report = run_benchmark(
+        args.model, args.threads, args.batch_sizes,
+        warmup=args.warmup, iterations=args.iterations, data=data
+    )
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\n✓ Benchmark saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare_reports(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
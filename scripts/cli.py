@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the EchoWealth ML pipeline scripts.
+Subcommands import their module only when run, so --help and cheap commands start fast.
+"""
+
+import time
+
+_START = time.perf_counter()
+
+import argparse
+import importlib
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPTS_DIR)
+
+# name -> (module, entry point, help); every entry point takes an argv list
+COMMANDS = {
+    'generate': ('generate_synthetic_data', 'main', 'generate synthetic training data'),
+    'train': ('train_model', 'main', 'train the poverty prediction model'),
+    'export': ('export_tflite', 'main', 'convert the trained model to TensorFlow Lite'),
+    'verify': ('export_tflite', 'verify_main', 'check and time an exported .tflite model'),
+    'mock': ('create_mock_model', 'main', 'build the mock model for Flutter development'),
+    'regress': ('model_regression', 'main', 'check a .tflite model against golden outputs and latency'),
+    'analyze': ('tflite_analyzer', 'main', 'report op counts, MACs and memory of a .tflite model'),
+    'benchmark': ('benchmark_tflite', 'main', 'benchmark TFLite inference latency'),
+    'score': ('score_tflite', 'main', 'score a feature dataset with the TFLite model'),
+    'evaluate': ('evaluate_scores', 'main', 'evaluation metrics and drift report for scored data'),
+    'serve': ('scoring_server', 'main', 'serve micro-batched risk scoring over HTTP or stdio'),
+    'loadtest': ('load_generator', 'main', 'drive the scoring server with concurrent clients'),
+    'simulate': ('sensor_simulator', 'main', 'simulate raw sensor streams and aggregate them'),
+    'sweep': ('sweep', 'main', 'run the hyperparameter sweep'),
+    'pipeline': ('pipeline', 'main', 'run generate -> train -> export with caching'),
+}
+
+HEAVY_MODULES = ['tensorflow', 'sklearn', 'pandas']
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip(),
+        epilog="Run '%(prog)s <command> --help' for the options of a command.",
+    )
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='report import and startup timings to stderr')
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+    for name, (_, _, help_text) in COMMANDS.items():
+        # Options are parsed by the command itself once its module is loaded
+        commands.add_parser(name, help=help_text, add_help=False)
+    return parser.parse_known_args(argv)
+
+def _report(label, seconds):
+    print(f"[startup] {label}: {seconds * 1000:.1f} ms", file=sys.stderr)
+
+def main(argv=None):
+    args, command_argv = parse_args(argv)
+    module_name, entry_point, _ = COMMANDS[args.command]
+
+    if args.profile_startup:
+        _report("cli ready", time.perf_counter() - _START)
+
+    # create_mock_model.py lives at the repository root
+    for path in (SCRIPTS_DIR, REPO_DIR):
+        if path not in sys.path:
+            sys.path.append(path)
+
+    start = time.perf_counter()
+    entry = getattr(importlib.import_module(module_name), entry_point)
+    if args.profile_startup:
+        _report(f"import {module_name}", time.perf_counter() - start)
+        loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+        print(f"[startup] heavy modules loaded before running: {', '.join(loaded) or 'none'}",
+              file=sys.stderr)
+
+    start = time.perf_counter()
+    try:
+        entry(command_argv)
+    finally:
+        if args.profile_startup:
+            _report(f"{args.command} ran", time.perf_counter() - start)
+            loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+            print(f"[startup] heavy modules loaded by {args.command}: {', '.join(loaded) or 'none'}",
+                  file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Streaming evaluation and drift report for large scored EchoWealth datasets.
+Metrics and feature histograms are accumulated chunk by chunk in constant memory.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from feature_spec import FEATURE_NAMES
+
+AUC_BINS = 10_000  # Score histogram resolution; AUC error is below 1 / AUC_BINS
+CALIBRATION_BINS = 10
+POSITIVE_THRESHOLD = 0.5  # Labels and scores above this count as high risk
+
+# Segment name -> (column, band edges, band names); bands are [edge, next edge)
+SEGMENTS = {
+    'risk_tier': ('label', [0.4, 0.7], ['low', 'medium', 'high']),
+    'household_size': ('household_size', [4, 7], ['1-3', '4-6', '7+']),
+    'goats': ('goats', [1, 3], ['0', '1-2', '3+']),
+    'chickens': ('chickens', [1, 6, 11], ['0', '1-5', '6-10', '11+']),
+}
+
+DRIFT_BINS = 1024  # Equal-width bins per feature over the reference range, used for KS
+DRIFT_RANGE = (0.001, 0.999)  # Reference quantiles spanned by the bins
+PSI_GROUPS = 10  # PSI is computed over deciles of the reference
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+KS_ALERT = 0.1
+DRIFT_EPSILON = 1e-4  # Floor on bin proportions in PSI
+
+class ScoreMetrics:
+    """Score/label statistics for one or more groups of rows.
+
+    Every group keeps a histogram of scores for positive and negative
+    labels (AUC and precision/recall), calibration sums and error sums,
+    so memory depends only on the number of groups and bins. Accumulators
+    from different chunks combine with merge().
+    """
+
+    def __init__(self, n_groups=1, bins=AUC_BINS):
+        self.n_groups = n_groups
+        self.bins = bins
+        self.positive = np.zeros((n_groups, bins), dtype=np.int64)
+        self.negative = np.zeros((n_groups, bins), dtype=np.int64)
+        self.calibration_count = np.zeros((n_groups, CALIBRATION_BINS), dtype=np.int64)
+        self.calibration_score = np.zeros((n_groups, CALIBRATION_BINS))
+        self.calibration_label = np.zeros((n_groups, CALIBRATION_BINS))
+        self.abs_error = np.zeros(n_groups)
+        self.squared_error = np.zeros(n_groups)
+
+    def update(self, scores, labels, groups=None):
+        """Add a chunk; groups holds each row's group index (default: all in group 0)."""
+        scores = np.clip(np.asarray(scores, dtype=np.float64), 0, 1)
+        labels = np.asarray(labels, dtype=np.float64)
+        groups = np.zeros(len(scores), dtype=np.int64) if groups is None else groups
+
+        def count(index, size, weights=None):
+            return np.bincount(index, weights, minlength=self.n_groups * size).reshape(
+                self.n_groups, size)
+
+        bins = np.minimum((scores * self.bins).astype(np.int64), self.bins - 1)
+        index = groups * self.bins + bins
+        positive = labels > POSITIVE_THRESHOLD
+        self.positive += count(index[positive], self.bins)
+        self.negative += count(index[~positive], self.bins)
+
+        calibration = np.minimum((scores * CALIBRATION_BINS).astype(np.int64), CALIBRATION_BINS - 1)
+        index = groups * CALIBRATION_BINS + calibration
+        self.calibration_count += count(index, CALIBRATION_BINS)
+        self.calibration_score += count(index, CALIBRATION_BINS, scores)
+        self.calibration_label += count(index, CALIBRATION_BINS, labels)
+
+        error = scores - labels
+        self.abs_error += np.bincount(groups, np.abs(error), minlength=self.n_groups)
+        self.squared_error += np.bincount(groups, np.square(error), minlength=self.n_groups)
+        return self
+
+    def merge(self, other):
+        for name in ('positive', 'negative', 'calibration_count', 'calibration_score',
+                     'calibration_label', 'abs_error', 'squared_error'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def auc(self, group=0):
+        """Probability a positive outscores a negative, ties within a bin counting half."""
+        positive, negative = self.positive[group], self.negative[group]
+        n_pos, n_neg = positive.sum(), negative.sum()
+        if not n_pos or not n_neg:
+            return None
+        negative_below = np.cumsum(negative) - negative
+        return float((positive * (negative_below + 0.5 * negative)).sum() / (n_pos * n_neg))
+
+    def summary(self, group=0):
+        """Metrics of one group as a JSON-serializable dict."""
+        count = int(self.calibration_count[group].sum())
+        if not count:
+            return {'count': 0}
+
+        # The decision threshold falls on a histogram bin edge
+        above = int(round(POSITIVE_THRESHOLD * self.bins))
+        tp = int(self.positive[group, above:].sum())
+        fp = int(self.negative[group, above:].sum())
+        fn = int(self.positive[group, :above].sum())
+        precision = tp / (tp + fp) if tp + fp else None
+        recall = tp / (tp + fn) if tp + fn else None
+        f1 = (2 * precision * recall / (precision + recall)
+              if precision and recall else None)
+
+        n = self.calibration_count[group]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_score = self.calibration_score[group] / n
+            mean_label = self.calibration_label[group] / n
+        gap = np.abs(mean_score - mean_label)
+        return {
+            'count': count,
+            'positives': tp + fn,
+            'auc': self.auc(group),
+            'mae': float(self.abs_error[group] / count),
+            'rmse': float(np.sqrt(self.squared_error[group] / count)),
+            'mean_score': float(self.calibration_score[group].sum() / count),
+            'mean_label': float(self.calibration_label[group].sum() / count),
+            'precision': precision,
+            'recall': recall,
+            'f1': f1,
+            'ece': float((n * np.nan_to_num(gap)).sum() / count),
+            'calibration': [
+                {'bin': [i / CALIBRATION_BINS, (i + 1) / CALIBRATION_BINS], 'count': int(n[i]),
+                 'mean_score': float(mean_score[i]), 'mean_label': float(mean_label[i])}
+                for i in range(CALIBRATION_BINS) if n[i]
+            ],
+        }
+
+def segment_index(segment, block):
+    """Band index of every row of a block for one of SEGMENTS."""
+    column, edges, _ = SEGMENTS[segment]
+    return np.searchsorted(edges, block[column], side='right')
+
+class Evaluator:
+    """Overall and per-segment ScoreMetrics over a stream of blocks.
+
+    Blocks are dicts with 'score' and 'label' arrays, plus any demographic
+    columns; segments whose column is absent are skipped.
+    """
+
+    def __init__(self, segments=tuple(SEGMENTS)):
+        self.overall = ScoreMetrics()
+        self.segments = {name: ScoreMetrics(len(SEGMENTS[name][2])) for name in segments}
+
+    def update(self, block):
+        self.overall.update(block['score'], block['label'])
+        for name, metrics in self.segments.items():
+            if SEGMENTS[name][0] in block:
+                metrics.update(block['score'], block['label'], segment_index(name, block))
+        return self
+
+    def merge(self, other):
+        self.overall.merge(other.overall)
+        for name, metrics in self.segments.items():
+            metrics.merge(other.segments[name])
+        return self
+
+    def report(self):
+        segments = {}
+        for name, metrics in self.segments.items():
+            if metrics.calibration_count.sum():
+                bands = SEGMENTS[name][2]
+                segments[name] = {band: metrics.summary(i) for i, band in enumerate(bands)}
+        return {'overall': self.overall.summary(), 'segments': segments}
+
+def fit_drift_range(sample):
+    """Per-feature (low, high) bounds of the drift bins from a reference sample.
+
+    The extreme tails fall into the under/overflow bins, so a few outliers
+    do not squeeze the rest of the distribution into a handful of bins.
+    """
+    low, high = np.quantile(sample, DRIFT_RANGE, axis=0)
+    return low, np.where(high > low, high, low + 1)
+
+class FeatureHistogram:
+    """Per-feature counts over DRIFT_BINS equal-width bins plus under/overflow.
+
+    Bin indices are computed arithmetically for the whole block and counted
+    with a single bincount, which is several times faster than searching
+    quantile edges. NaN counts as underflow.
+    """
+
+    def __init__(self, bounds, bins=DRIFT_BINS):
+        low, high = bounds
+        self.low = np.asarray(low, dtype=np.float64)
+        self.scale = bins / (np.asarray(high, dtype=np.float64) - self.low)
+        self.counts = np.zeros((len(self.low), bins + 2), dtype=np.int64)
+
+    def update(self, X):
+        n_features, n_bins = self.counts.shape
+        index = np.subtract(X, self.low, dtype=np.float64)
+        index *= self.scale
+        index += 1
+        np.fmin(np.fmax(index, 0, out=index), n_bins - 1, out=index)
+        index = index.astype(np.int64)
+        index += np.arange(n_features) * n_bins
+        self.counts += np.bincount(index.ravel(), minlength=n_features * n_bins).reshape(
+            n_features, n_bins)
+        return self
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
+def drift_report(reference, current, feature_names=FEATURE_NAMES):
+    """PSI over reference deciles and KS distance on the fine bins, per feature.
+
+    Features with PSI above PSI_ALERT or KS above KS_ALERT are flagged as
+    drifted, those with PSI above PSI_WARN as shifted.
+    """
+    ref = reference.counts / reference.counts.sum(axis=1, keepdims=True)
+    cur = current.counts / current.counts.sum(axis=1, keepdims=True)
+
+    ref_cdf = np.cumsum(ref, axis=1)
+    ks = np.abs(ref_cdf - np.cumsum(cur, axis=1)).max(axis=1)
+
+    # Each fine bin joins the reference decile its lower edge falls in
+    decile = np.minimum(((ref_cdf - ref) * PSI_GROUPS).astype(np.int64), PSI_GROUPS - 1)
+    psi = np.empty(len(ref))
+    for j in range(len(ref)):
+        p = np.maximum(np.bincount(decile[j], ref[j], minlength=PSI_GROUPS), DRIFT_EPSILON)
+        q = np.maximum(np.bincount(decile[j], cur[j], minlength=PSI_GROUPS), DRIFT_EPSILON)
+        psi[j] = ((q - p) * np.log(q / p)).sum()
+
+    features = {}
+    for name, p, k in zip(feature_names, psi, ks):
+        status = ('drift' if p > PSI_ALERT or k > KS_ALERT
+                  else 'shift' if p > PSI_WARN else 'stable')
+        features[name] = {'psi': float(p), 'ks': float(k), 'status': status}
+    return {
+        'reference_rows': int(reference.counts[0].sum()),
+        'current_rows': int(current.counts[0].sum()),
+        'thresholds': {'psi_warn': PSI_WARN, 'psi_alert': PSI_ALERT, 'ks_alert': KS_ALERT},
+        'drifted': [name for name, f in features.items() if f['status'] == 'drift'],
+        'shifted': [name for name, f in features.items() if f['status'] == 'shift'],
+        'features': features,
+    }
+
+# Data access: a dataset is a .npy feature file (labels in a second .npy)
+# or a Parquet dataset directory; scores are always a row-aligned .npy.
+
+def _is_parquet(features):
+    return os.path.isdir(features)
+
+def dataset_tasks(features, chunk_rows):
+    """Independent pieces of a dataset, as (row offset, selector) pairs."""
+    if _is_parquet(features):
+        import parquet_dataset
+
+        tasks, offset = [], 0
+        for batch in parquet_dataset.list_batches(features):
+            tasks.append((offset, batch))
+            offset += parquet_dataset.count_rows(features, [batch])
+        return tasks
+
+    n_rows = len(np.load(features, mmap_mode='r'))
+    return [(start, min(start + chunk_rows, n_rows)) for start in range(0, n_rows, chunk_rows)]
+
+def iter_blocks(features, labels, scores, offset, selector, need_features, chunk_rows):
+    """Yield blocks of one task with 'X', 'label', 'score' and demographics as available."""
+    score_file = np.load(scores, mmap_mode='r') if scores else None
+
+    if _is_parquet(features):
+        import parquet_dataset
+
+        metadata = parquet_dataset.dataset_metadata(features)
+        names = metadata['feature_names']
+        columns = [metadata['label']] + metadata['demographics']
+        columns += names if need_features else []
+        for block in parquet_dataset.iter_columns(features, columns, [selector], chunk_rows):
+            n = len(block[metadata['label']])
+            block['label'] = block.pop(metadata['label'])
+            if need_features:
+                block['X'] = np.stack([block.pop(name) for name in names], axis=1)
+            if score_file is not None:
+                block['score'] = score_file[offset:offset + n]
+            offset += n
+            yield block
+        return
+
+    start, stop = offset, selector
+    X = np.load(features, mmap_mode='r')
+    y = np.load(labels, mmap_mode='r') if labels else None
+    for i in range(start, stop, chunk_rows):
+        rows = slice(i, min(i + chunk_rows, stop))
+        block = {}
+        if need_features:
+            block['X'] = X[rows]
+        if y is not None:
+            block['label'] = y[rows]
+        if score_file is not None:
+            block['score'] = score_file[rows]
+        yield block
+
+def _evaluate_task(features, labels, scores, offset, selector, bounds, evaluate, chunk_rows):
+    """Accumulate one task; runs in a pool worker, so returns picklable accumulators."""
+    evaluator = Evaluator() if evaluate else None
+    histogram = FeatureHistogram(bounds) if bounds is not None else None
+    for block in iter_blocks(features, labels, scores, offset, selector,
+                             histogram is not None, chunk_rows):
+        if evaluator:
+            evaluator.update(block)
+        if histogram:
+            histogram.update(block['X'])
+    return evaluator, histogram
+
+def stream(features, labels=None, scores=None, bounds=None, evaluate=True,
+           chunk_rows=1_000_000, workers=1):
+    """Run _evaluate_task over every task of a dataset and merge the results in order."""
+    tasks = dataset_tasks(features, chunk_rows)
+    # Several chunks per npy task keep pool overhead low
+    if not _is_parquet(features) and workers > 1:
+        per_task = max(1, len(tasks) // (workers * 4))
+        tasks = [(group[0][0], group[-1][1])
+                 for group in (tasks[i:i + per_task] for i in range(0, len(tasks), per_task))]
+
+    evaluator = Evaluator() if evaluate else None
+    histogram = FeatureHistogram(bounds) if bounds is not None else None
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    map_tasks = pool.map if pool else map
+    n = len(tasks)
+    try:
+        for task_evaluator, task_histogram in map_tasks(
+                _evaluate_task, [features] * n, [labels] * n, [scores] * n,
+                *zip(*tasks), [bounds] * n, [evaluate] * n, [chunk_rows] * n):
+            if evaluator:
+                evaluator.merge(task_evaluator)
+            if histogram:
+                histogram.merge(task_histogram)
+    finally:
+        if pool:
+            pool.shutdown()
+    return evaluator, histogram
+
+def sample_features(features, n_samples=200_000):
+    """Evenly spaced rows of a dataset, for fitting the drift bin range."""
+    if _is_parquet(features):
+        import parquet_dataset
+
+        total = parquet_dataset.count_rows(features)
+        step = max(1, total // n_samples)
+        blocks = [X[::step] for X, _ in parquet_dataset.iter_arrays(
+            features, batch_size=step * 4096, dtype=np.float64)]
+        return np.concatenate(blocks)[:n_samples]
+
+    X = np.load(features, mmap_mode='r')
+    step = max(1, len(X) // n_samples)
+    return np.asarray(X[::step][:n_samples], dtype=np.float64)
+
+def evaluate(features, labels=None, scores=None, reference=None, chunk_rows=1_000_000,
+             workers=1, drift_sample=200_000):
+    """Evaluation and drift report of a scored dataset.
+
+    Metrics need scores and labels (labels come from the dataset itself
+    for Parquet); drift needs a reference dataset, e.g. the training set.
+    """
+    report = {'dataset': features, 'scores': scores, 'reference': reference}
+    bounds = None
+    if reference:
+        bounds = fit_drift_range(sample_features(reference, drift_sample))
+        _, reference_histogram = stream(reference, bounds=bounds, evaluate=False,
+                                        chunk_rows=chunk_rows, workers=workers)
+
+    evaluator, histogram = stream(
+        features, labels, scores, bounds, evaluate=scores is not None,
+        chunk_rows=chunk_rows, workers=workers
+    )
+    if evaluator:
+        report.update(evaluator.report())
+    if reference:
+        report['drift'] = drift_report(reference_histogram, histogram)
+    return report
+
+def print_report(report):
+    overall = report.get('overall')
+    if overall:
+        auc = overall['auc']
+        print(f"Rows: {overall['count']:,}  AUC: {auc:.4f}" if auc is not None
+              else f"Rows: {overall['count']:,}  AUC: n/a")
+        print(f"MAE: {overall['mae']:.4f}  RMSE: {overall['rmse']:.4f}  ECE: {overall['ece']:.4f}")
+        for name, bands in report['segments'].items():
+            print(f"\n{name}:")
+            for band, m in bands.items():
+                if m['count']:
+                    auc = f"{m['auc']:.4f}" if m['auc'] is not None else '   n/a'
+                    print(f"  {band:<8} {m['count']:>12,} rows  AUC {auc}  MAE {m['mae']:.4f}  "
+                          f"mean score {m['mean_score']:.3f} vs label {m['mean_label']:.3f}")
+
+    drift = report.get('drift')
+    if drift:
+        print(f"\nDrift vs {report['reference']} ({drift['reference_rows']:,} reference rows):")
+        for name, f in drift['features'].items():
+            if f['status'] != 'stable':
+                print(f"  ⚠ {name:<20} PSI {f['psi']:.3f}  KS {f['ks']:.3f}  ({f['status']})")
+        if not drift['drifted'] and not drift['shifted']:
+            print("  ✓ All features stable")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--features', default='training_features.npy',
+                        help='scored dataset: feature .npy or Parquet dataset directory')
+    parser.add_argument('--labels', default=None,
+                        help='label .npy for a .npy dataset (Parquet datasets carry labels)')
+    parser.add_argument('--scores', default=None,
+                        help='row-aligned risk scores, e.g. from score_tflite.py')
+    parser.add_argument('--reference', default=None,
+                        help='dataset to compare feature distributions against (drift)')
+    parser.add_argument('--output', default='evaluation_report.json')
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processes; 0 uses every CPU core (default: 1)')
+    parser.add_argument('--drift-sample', type=int, default=200_000,
+                        help='reference rows used to place the drift bins')
+    args = parser.parse_args(argv)
+    if args.scores and not args.labels and not _is_parquet(args.features):
+        parser.error("--scores on a .npy dataset needs --labels")
+    if not args.scores and not args.reference:
+        parser.error("nothing to do: pass --scores to evaluate and/or --reference for drift")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    start = time.perf_counter()
+    report = evaluate(args.features, args.labels, args.scores, args.reference,
+                      args.chunk_rows, args.workers or os.cpu_count(), args.drift_sample)
+    report['elapsed_s'] = time.perf_counter() - start
+
+    print_report(report)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Report saved to {args.output} ({report['elapsed_s']:.1f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -4,53 +4,93 @@ Export trained model to TensorFlow Lite for Arm NPU deployment.
 Applies quantization and optimization for mobile devices.
 """
 
-import tensorflow as tf
-import numpy as np
+import argparse
+import json
 import os
+import shutil
 
-def convert_to_tflite(model_path='echo_wealth_model.h5', output_path='echo_wealth.tflite'):
-    """Convert Keras model to optimized TensorFlow Lite."""
-    
-    print(f"Loading model from {model_path}...")
-    model = tf.keras.models.load_model(model_path)
-    
-    # Load representative dataset for quantization
+import numpy as np
+
+from benchmark_tflite import load_interpreter, measure_latency, summarize
+from feature_spec import select_features, write_spec
+from features import N_FEATURES
+from instrumentation import add_trace_arguments, tracer
+from model_regression import check_model, print_report as print_regression_report
+from numpy_inference import FLOAT_REFERENCE, PARITY_ATOL, check_parity, dump_weights
+from score_tflite import predict
+from tflite_analyzer import analyze, deployment_checklist, print_report
+
+# TensorFlow and scikit-learn are imported inside the functions that use
+# them so that --help and argument errors return immediately.
+
+QUANTIZATION_MODES = ['float32', 'dynamic_range', 'float16', 'int8']
+
+def load_representative_data(n_samples=500, seed=0):
+    """Sample training rows for post-training quantization calibration."""
     try:
-        X_train = np.load('training_features.npy')
+        X_train = np.load('training_features.npy', mmap_mode='r')
         print(f"Loaded {len(X_train)} samples for representative dataset")
     except FileNotFoundError:
         print("Warning: No training data found, using random data for quantization")
-        X_train = np.random.randn(100, 21).astype(np.float32)
+        return np.random.randn(n_samples, 21).astype(np.float32)
     
-    def representative_dataset():
-        """Representative dataset for post-training quantization."""
-        for i in range(min(100, len(X_train))):
-            yield [X_train[i:i+1].astype(np.float32)]
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(X_train), min(n_samples, len(X_train)), replace=False))
+    return X_train[rows].astype(np.float32)
+
+def make_converter(model, mode, representative_data=None):
+    """Create a TFLite converter for one of QUANTIZATION_MODES."""
+    import tensorflow as tf
     
-    # Create TensorFlow Lite converter
     converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if mode == 'float32':
+        return converter
     
     # Optimization settings for Arm NPU
     converter.optimizations = [tf.lite.Optimize.DEFAULT]
     
-    # Enable quantization for smaller model size and faster inference
-    converter.representative_dataset = representative_dataset
-    converter.target_spec.supported_ops = [
-        tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
-        tf.lite.OpsSet.TFLITE_BUILTINS
-    ]
-    converter.inference_input_type = tf.float32
-    converter.inference_output_type = tf.float32
+    if mode == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == 'int8':
+        def representative_dataset():
+            """Representative dataset for post-training quantization."""
+            for i in range(len(representative_data)):
+                yield [representative_data[i:i+1]]
+        
+        # Enable quantization for smaller model size and faster inference
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+            tf.lite.OpsSet.TFLITE_BUILTINS
+        ]
+        converter.inference_input_type = tf.float32
+        converter.inference_output_type = tf.float32
+        
+        # Additional optimizations for mobile
+        converter.experimental_new_converter = True
+        converter.experimental_new_quantizer = True
+    elif mode != 'dynamic_range':
+        raise ValueError(f"Unknown quantization mode: {mode}")
+    
+    return converter
+
+def convert_to_tflite(model_path='echo_wealth_model.h5', output_path='echo_wealth.tflite'):
+    """Convert Keras model to optimized TensorFlow Lite."""
+    import tensorflow as tf
+    
+    print(f"Loading model from {model_path}...")
+    with tracer.stage('load_model'):
+        model = tf.keras.models.load_model(model_path)
     
-    # Additional optimizations for mobile
-    converter.experimental_new_converter = True
-    converter.experimental_new_quantizer = True
+    # Load representative dataset for quantization
+    representative_data = load_representative_data()
     
     print("Converting to TensorFlow Lite...")
     print("Applying INT8 quantization for Arm NPU optimization...")
     
     try:
-        tflite_model = converter.convert()
+        with tracer.stage('convert', mode='int8'):
+            tflite_model = make_converter(model, 'int8', representative_data).convert()
         
         # Save the model
         with open(output_path, 'wb') as f:
@@ -64,7 +104,8 @@ def convert_to_tflite(model_path='echo_wealth_model.h5', output_path='echo_wealt
         print(f"✓ Size: {model_size_mb:.2f} MB")
         
         # Verify the model works
-        verify_tflite_model(output_path, X_train[:5])
+        with tracer.stage('verify'):
+            verify_tflite_model(output_path, representative_data[:5])
         
         return tflite_model, model_size_mb
         
@@ -73,10 +114,8 @@ def convert_to_tflite(model_path='echo_wealth_model.h5', output_path='echo_wealt
         print("Trying fallback conversion without full quantization...")
         
         # Fallback: lighter quantization
-        converter.optimizations = [tf.lite.Optimize.DEFAULT]
-        converter.target_spec.supported_types = [tf.float16]
-        
-        tflite_model = converter.convert()
+        with tracer.stage('convert', mode='float16'):
+            tflite_model = make_converter(model, 'float16').convert()
         
         with open(output_path, 'wb') as f:
             f.write(tflite_model)
@@ -86,8 +125,157 @@ def convert_to_tflite(model_path='echo_wealth_model.h5', output_path='echo_wealt
         
         return tflite_model, model_size_mb
 
+def model_normalization(model):
+    """Feature spec normalization of a model that standardizes its own inputs, or None."""
+    for layer in model.layers:
+        if layer.__class__.__name__ == 'Normalization':
+            return {
+                'method': 'standard',
+                'mean': np.ravel(layer.mean).tolist(),
+                'std': np.sqrt(np.ravel(layer.variance)).tolist(),
+                'epsilon': 1e-7,
+                'in_model': True,
+            }
+    return None
+
+def spec_columns(model, metadata_path='model_metadata.json'):
+    """Feature columns the model was trained on (None for all), checked against the spec.
+    
+    A model trained on a subset must match it in width and normalize
+    inside the graph: the app cannot reproduce per-row normalization
+    computed over features it does not have.
+    """
+    if not os.path.exists(metadata_path):
+        return None
+    with open(metadata_path) as f:
+        columns = json.load(f).get('feature_columns')
+    if columns is None:
+        return None
+    
+    select_features(columns)
+    if model.input_shape[-1] != len(columns):
+        raise ValueError(f"Model takes {model.input_shape[-1]} inputs but was trained on "
+                         f"{len(columns)} feature columns")
+    if model_normalization(model) is None:
+        raise ValueError("A model trained on a subset of the features must normalize "
+                         "its inputs in the graph")
+    return columns
+
+def select_variant(variants, max_size_mb=1.5, max_latency_ms=50, max_auc_drop=0.01):
+    """Pick the smallest variant within all budgets, breaking ties on p99 latency."""
+    for v in variants:
+        v['within_budget'] = 'error' not in v and (
+            v['size_mb'] <= max_size_mb and
+            v['p99_ms'] <= max_latency_ms and
+            -v['auc_drift'] <= max_auc_drop
+        )
+    
+    candidates = [v for v in variants if v['within_budget']]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda v: (v['size_mb'], v['p99_ms']))
+
+def compare_quantization(model_path='echo_wealth_model.h5', output_dir='quantized',
+                         max_size_mb=1.5, max_latency_ms=50, max_auc_drop=0.01,
+                         eval_samples=10_000, representative_samples=500,
+                         latency_iterations=1000):
+    """Export every quantization mode and measure it against the Keras model.
+    
+    Evaluation uses up to eval_samples rows of the held-out profiles of
+    train_model's split (split_by_profile), read through a memory map.
+    Each variant gets MAE, AUC and AUC drift versus Keras, warmed-up
+    latency and file size; the best variant under the budgets is returned
+    with the report.
+    """
+    import tensorflow as tf
+    from sklearn.metrics import roc_auc_score
+    from train_model import load_groups, split_by_profile
+    
+    print(f"Loading model from {model_path}...")
+    with tracer.stage('load_model'):
+        model = tf.keras.models.load_model(model_path)
+    
+    # Split row indices like train_model splits rows, then read only the sample
+    X = np.load('training_features.npy', mmap_mode='r')
+    y = np.load('training_labels.npy')
+    _, test_rows, _, _ = split_by_profile(np.arange(len(y)), y, load_groups('training_features.npy'))
+    test_rows = np.sort(test_rows[:eval_samples])
+    X_test = X[test_rows].astype(np.float32)
+    y_test = y[test_rows]
+    
+    representative_data = load_representative_data(representative_samples)
+    
+    keras_pred = model.predict(X_test, verbose=0).ravel()
+    keras_auc = roc_auc_score(y_test > 0.5, keras_pred)
+    print(f"Keras reference: AUC {keras_auc:.4f} on {len(X_test)} held-out samples")
+    
+    os.makedirs(output_dir, exist_ok=True)
+    variants = []
+    
+    for mode in QUANTIZATION_MODES:
+        print(f"\nConverting {mode} variant...")
+        try:
+            with tracer.stage('convert', mode=mode):
+                tflite_model = make_converter(model, mode, representative_data).convert()
+        except Exception as e:
+            print(f"⚠ {mode} conversion failed: {e}")
+            variants.append({'mode': mode, 'error': str(e)})
+            continue
+        
+        path = os.path.join(output_dir, f'echo_wealth_{mode}.tflite')
+        with open(path, 'wb') as f:
+            f.write(tflite_model)
+        
+        with tracer.stage('verify', mode=mode):
+            pred = predict(path, X_test)
+            auc = roc_auc_score(y_test > 0.5, pred)
+            latency = summarize(
+                measure_latency(load_interpreter(path), X_test[:1], iterations=latency_iterations),
+                batch_size=1
+            )
+        
+        analysis = analyze(path)
+        variant = {
+            'mode': mode,
+            'path': path,
+            'size_mb': len(tflite_model) / (1024 * 1024),
+            'macs': analysis['macs'],
+            'peak_activation_kb': analysis['peak_activation_bytes'] / 1024,
+            'float_ops': analysis['float_ops'],
+            'p50_ms': latency['p50_ms'],
+            'p99_ms': latency['p99_ms'],
+            'auc': float(auc),
+            'auc_drift': float(auc - keras_auc),
+            'mae': float(np.mean(np.abs(y_test - pred))),
+            'mae_vs_keras': float(np.mean(np.abs(keras_pred - pred))),
+        }
+        variants.append(variant)
+        
+        print(f"✓ {mode}: {variant['size_mb']:.3f} MB, p99 {variant['p99_ms']:.2f}ms, "
+              f"AUC {auc:.4f} ({variant['auc_drift']:+.4f}), "
+              f"MAE vs Keras {variant['mae_vs_keras']:.4f}")
+    
+    best = select_variant(variants, max_size_mb, max_latency_ms, max_auc_drop)
+    
+    report = {
+        'keras_auc': float(keras_auc),
+        'eval_samples': len(X_test),
+        'budgets': {
+            'max_size_mb': max_size_mb,
+            'max_latency_ms': max_latency_ms,
+            'max_auc_drop': max_auc_drop,
+        },
+        'variants': variants,
+        'selected': best['mode'] if best else None,
+    }
+    with open('quantization_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    return best, report
+
 def verify_tflite_model(model_path, test_data):
     """Verify the TFLite model works correctly."""
+    import tensorflow as tf
     
     print("\nVerifying TFLite model...")
     
@@ -102,33 +290,26 @@ def verify_tflite_model(model_path, test_data):
     print(f"Input shape: {input_details[0]['shape']}")
     print(f"Output shape: {output_details[0]['shape']}")
     
-    # Test inference
-    total_time = 0
+    # Check predictions on real samples
     for i, sample in enumerate(test_data):
-        # Prepare input
-        input_data = sample.reshape(1, -1).astype(np.float32)
-        
-        # Run inference
-        start_time = tf.timestamp()
+        input_data = sample[np.newaxis].astype(np.float32)
         interpreter.set_tensor(input_details[0]['index'], input_data)
         interpreter.invoke()
         output_data = interpreter.get_tensor(output_details[0]['index'])
-        end_time = tf.timestamp()
-        
-        inference_time = (end_time - start_time) * 1000  # Convert to ms
-        total_time += inference_time
-        
-        print(f"Sample {i+1}: Risk = {output_data[0][0]:.3f}, Time = {inference_time:.1f}ms")
+        print(f"Sample {i+1}: Risk = {output_data[0][0]:.3f}")
     
-    avg_time = total_time / len(test_data)
-    print(f"\nAverage inference time: {avg_time:.1f}ms")
+    # Time invoke() alone after warm-up (see benchmark_tflite.py for the full suite)
+    latencies = measure_latency(interpreter, test_data[:1].astype(np.float32))
+    stats = summarize(latencies, batch_size=1)
+    print(f"\nInference latency over {stats['iterations']} runs: "
+          f"p50 {stats['p50_ms']:.2f}ms, p90 {stats['p90_ms']:.2f}ms, p99 {stats['p99_ms']:.2f}ms")
     
-    if avg_time < 50:
-        print("✓ Performance target met (<50ms)")
+    if stats['p99_ms'] < 50:
+        print("✓ Performance target met (p99 <50ms)")
     else:
-        print("⚠ Performance target not met (>50ms)")
+        print("⚠ Performance target not met (p99 >50ms)")
     
-    return avg_time
+    return stats['p50_ms']
 
 def create_flutter_assets():
     """Copy model to Flutter assets directory."""
@@ -137,31 +318,153 @@ def create_flutter_assets():
     os.makedirs(flutter_assets_dir, exist_ok=True)
     
     if os.path.exists('echo_wealth.tflite'):
-        import shutil
         shutil.copy('echo_wealth.tflite', flutter_assets_dir)
         print(f"✓ Model copied to {flutter_assets_dir}")
     else:
         print("⚠ TFLite model not found")
+    
+    # The app computes its model inputs from this spec
+    if os.path.exists('feature_spec.json'):
+        shutil.copy('feature_spec.json', flutter_assets_dir)
+        print(f"✓ Feature spec copied to {flutter_assets_dir}")
+
+def update_model_metadata(analysis, path='model_metadata.json'):
+    """Record the measured size and compute of the exported model in the training metadata."""
+    if not os.path.exists(path):
+        return
+    with open(path) as f:
+        metadata = json.load(f)
+    metadata.update({
+        'model_size_mb': analysis['size_mb'],
+        'quantization': analysis['quantization'],
+        'macs': analysis['macs'],
+        'peak_activation_kb': analysis['peak_activation_bytes'] / 1024,
+    })
+    with open(path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+def verify_main(argv=None):
+    """Verify an exported model on a few feature rows and time its inference."""
+    parser = argparse.ArgumentParser(description=verify_tflite_model.__doc__)
+    parser.add_argument('--model', default='echo_wealth.tflite')
+    parser.add_argument('--data', default='training_features.npy')
+    parser.add_argument('--samples', type=int, default=5)
+    args = parser.parse_args(argv)
+    
+    verify_tflite_model(args.model, np.load(args.data, mmap_mode='r')[:args.samples])
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--matrix', action='store_true',
+                        help='export all quantization modes and ship the best one within budget')
+    parser.add_argument('--max-size-mb', type=float, default=1.5)
+    parser.add_argument('--max-latency-ms', type=float, default=50,
+                        help='p99 single-sample latency budget (default: 50)')
+    parser.add_argument('--max-auc-drop', type=float, default=0.01,
+                        help='largest AUC loss tolerated versus the Keras model')
+    parser.add_argument('--max-macs', type=int, default=5_000_000,
+                        help='multiply-accumulates per inference budget (default: 5M)')
+    parser.add_argument('--max-activation-kb', type=float, default=256,
+                        help='peak activation memory budget (default: 256 KB)')
+    parser.add_argument('--strict', action='store_true',
+                        help='exit with an error if any deployment check fails')
+    parser.add_argument('--golden', default=None,
+                        help='golden record (model_regression.py --record) the export must '
+                             'match before it replaces the Flutter asset')
+    parser.add_argument('--max-latency-regression', type=float, default=10.0,
+                        help='with --golden: largest p50 latency increase accepted, in percent')
+    parser.add_argument('--eval-samples', type=int, default=10_000)
+    parser.add_argument('--representative-samples', type=int, default=500)
+    add_trace_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main export pipeline."""
+    args = parse_args(argv)
+    tracer.configure(args.trace, profile=args.cprofile)
+    import tensorflow as tf
     
     print("EchoWealth Model Export Pipeline")
     print("="*40)
     
     try:
         # Convert to TFLite
-        tflite_model, size_mb = convert_to_tflite()
+        if args.matrix:
+            with tracer.stage('export', matrix=True):
+                best, report = compare_quantization(
+                    max_size_mb=args.max_size_mb,
+                    max_latency_ms=args.max_latency_ms,
+                    max_auc_drop=args.max_auc_drop,
+                    eval_samples=args.eval_samples,
+                    representative_samples=args.representative_samples
+                )
+            print("✓ Quantization report saved to quantization_report.json")
+            if best is None:
+                raise SystemExit("⚠ No quantization variant meets the "
+                                 "size/latency/accuracy budgets")
+            
+            print(f"✓ Selected {best['mode']} variant")
+            shutil.copy(best['path'], 'echo_wealth.tflite')
+        else:
+            with tracer.stage('export', matrix=False):
+                convert_to_tflite()
+        
+        # Measure what was actually produced rather than what was requested
+        with tracer.stage('analyze'):
+            analysis = analyze('echo_wealth.tflite')
+        print()
+        print_report(analysis)
+        with open('tflite_analysis.json', 'w') as f:
+            json.dump(analysis, f, indent=2)
+        size_mb = analysis['size_mb']
+        
+        # Weight dump for TensorFlow-free scoring (numpy_inference.py)
+        with tracer.stage('dump_weights'):
+            model = tf.keras.models.load_model('echo_wealth_model.h5')
+            dump_weights(model, 'echo_wealth_weights.npz')
+        print("✓ Weights dumped to echo_wealth_weights.npz")
+        
+        # The NumPy engine must reproduce the unquantized graph, not the shipped one
+        with tracer.stage('parity'):
+            with open(FLOAT_REFERENCE, 'wb') as f:
+                f.write(make_converter(model, 'float32').convert())
+            passed, _ = check_parity('echo_wealth_weights.npz', FLOAT_REFERENCE,
+                                     load_representative_data(args.representative_samples))
+        if not passed:
+            raise SystemExit(f"NumPy inference differs from {FLOAT_REFERENCE} "
+                             f"by more than {PARITY_ATOL}")
+        
+        # Models with built-in normalization take raw features on device
+        try:
+            columns = spec_columns(model)
+        except ValueError as e:
+            raise SystemExit(f"Cannot write a feature spec for this model: {e}")
+        write_spec('feature_spec.json', model_normalization(model), columns)
+        print("✓ Feature spec saved to feature_spec.json")
+        
+        # Outputs and latency must hold before the shipped model is replaced
+        if args.golden:
+            with tracer.stage('golden'):
+                with open(args.golden) as f:
+                    passed, regression = check_model(
+                        'echo_wealth.tflite', json.load(f),
+                        max_latency_regression=args.max_latency_regression
+                    )
+            print_regression_report(regression)
+            if not passed:
+                raise SystemExit(f"Export does not match the golden record {args.golden}; "
+                                 "Flutter assets left unchanged")
         
         # Copy to Flutter assets
-        create_flutter_assets()
+        with tracer.stage('copy_assets'):
+            create_flutter_assets()
         
         print("\n" + "="*40)
         print("EXPORT COMPLETE")
         print("="*40)
-        print(f"✓ Model size: {size_mb:.2f} MB (Target: <1.5 MB)")
-        print(f"✓ Optimized for Arm NPU with NNAPI")
-        print(f"✓ Ready for Flutter integration")
+        print(f"✓ Model size: {size_mb:.2f} MB (Target: <{args.max_size_mb} MB)")
+        print(f"✓ {analysis['macs']:,} MACs, "
+              f"{analysis['peak_activation_bytes'] / 1024:.1f} KB peak activations")
         
         print("\nNext steps:")
         print("1. Copy echo_wealth.tflite to Flutter assets/models/")
@@ -169,24 +472,27 @@ def main():
         print("3. Test on Android device with Arm NPU")
         print("4. Monitor inference time and power usage")
         
-        # Generate deployment checklist
-        checklist = {
-            "model_ready": True,
-            "size_optimized": size_mb < 1.5,
-            "quantization_applied": True,
-            "arm_npu_compatible": True,
-            "flutter_integration_ready": True
-        }
-        
-        import json
+        # Deployment checklist derived from the analysis
+        checklist = deployment_checklist(
+            analysis, args.max_size_mb, args.max_macs, args.max_activation_kb, N_FEATURES
+        )
         with open('deployment_checklist.json', 'w') as f:
             json.dump(checklist, f, indent=2)
+        update_model_metadata(analysis)
         
+        failed = [name for name, passed in checklist.items() if passed is False]
+        for name in failed:
+            print(f"⚠ Deployment check failed: {name}")
         print("✓ Deployment checklist saved")
+        if failed and args.strict:
+            raise SystemExit(f"{len(failed)} deployment check(s) failed")
         
     except Exception as e:
         print(f"Export failed: {e}")
         print("Please ensure the trained model exists (run train_model.py first)")
+        raise SystemExit(1)
+    finally:
+        tracer.write('export_tflite')
 
 if __name__ == "__main__":
     main()
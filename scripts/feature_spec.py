@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Declarative specification of the EchoWealth model features.
+features.py executes it vectorized; the JSON export lets the app compute identical inputs.
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from profile_store import DAILY_SIGNALS
+
+SPEC_VERSION = 1
+
+# Features are computed over the last WINDOW_DAYS days, oldest first; the
+# first WEEKDAYS of them count as weekdays for the weekend ratio.
+WINDOW_DAYS = 7
+WEEKDAYS = 5
+
+# How each aggregation reduces one daily signal over the window
+AGGREGATIONS = {
+    'mean': 'arithmetic mean over the window',
+    'std': 'population standard deviation (ddof=0)',
+    'var': 'population variance (ddof=0)',
+    'sum': 'sum over the window',
+    'slope': 'least-squares slope against day index 0..6',
+    'daily_rate': 'sum / window days if the sum is positive, else 0',
+    'weekend_ratio': 'mean of weekend days / mean of weekdays if the latter is positive, else 1',
+}
+
+# (name, daily signal, aggregation) in model input order
+BASE_FEATURES = [
+    ('steps_mean', 'steps_mean', 'mean'),
+    ('steps_std', 'steps_mean', 'std'),
+    ('charge_night_pct', 'charge_night_pct', 'mean'),
+    ('sms_loan_count', 'sms_loan_count', 'sum'),
+    ('idle_periods', 'idle_periods', 'sum'),
+    ('charge_cycles', 'charge_cycles', 'mean'),
+    ('steps_variability', 'steps_std', 'std'),
+    ('steps_trend', 'steps_mean', 'slope'),
+    ('steps_variance', 'steps_mean', 'var'),
+    ('charge_variance', 'charge_night_pct', 'var'),
+    ('daily_avg_steps', 'steps_mean', 'daily_rate'),
+    ('weekend_ratio', 'steps_mean', 'weekend_ratio'),
+]
+
+# Scaled copies of the first 7 base features pad the vector to 21
+N_ENGINEERED = 9
+
+FEATURE_SPEC = [
+    {'name': name, 'signal': signal, 'aggregation': aggregation}
+    for name, signal, aggregation in BASE_FEATURES
+] + [
+    {'name': f'engineered_{i}', 'source': BASE_FEATURES[i % 7][0], 'scale': 1 + i * 0.1}
+    for i in range(N_ENGINEERED)
+]
+
+FEATURE_NAMES = [feature['name'] for feature in FEATURE_SPEC]
+
+# Applied to the whole feature vector after aggregation. Datasets
+# generated with fitted statistics carry a 'standard' normalization
+# instead (see normalizer.py); models trained on them normalize inside
+# the graph, marked by 'in_model' in the exported spec.
+NORMALIZATION = {'method': 'per_row', 'epsilon': 1e-8}
+
+def select_features(columns=None):
+    """FEATURE_SPEC entries of the named features, in that order (default: all).
+
+    The app computes a spec's features in order, so a scaled copy must
+    come after its source.
+    """
+    if columns is None:
+        return FEATURE_SPEC
+    unknown = [name for name in columns if name not in FEATURE_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown feature columns: {', '.join(unknown)}")
+    features = [FEATURE_SPEC[FEATURE_NAMES.index(name)] for name in columns]
+    for i, feature in enumerate(features):
+        if 'source' in feature and feature['source'] not in columns[:i]:
+            raise ValueError(f"{feature['name']} is computed from {feature['source']}, "
+                             "which must come before it in the feature columns")
+    return features
+
+def spec_document(normalization=None, columns=None):
+    """The specification as a JSON-serializable dict, for a model on the given columns."""
+    return {
+        'version': SPEC_VERSION,
+        'window_days': WINDOW_DAYS,
+        'weekdays': WEEKDAYS,
+        'signals': DAILY_SIGNALS,
+        'aggregations': AGGREGATIONS,
+        'features': select_features(columns),
+        'normalization': normalization or NORMALIZATION,
+    }
+
+def write_spec(path, normalization=None, columns=None):
+    """Write the specification JSON shipped next to echo_wealth.tflite."""
+    with open(path, 'w') as f:
+        json.dump(spec_document(normalization, columns), f, indent=2)
+
+def golden_vectors(n_cases=8, seed=0):
+    """Reference weeks with their raw and normalized features.
+
+    Random profiles from the synthetic generator plus edge cases (all-zero
+    and constant weeks) that exercise the division guards. 'normalized'
+    uses NORMALIZATION; 'standardized' uses the 'standard' statistics
+    fitted on the cases themselves.
+    """
+    from features import extract_features, normalize_features
+    from generate_synthetic_data import generate_population
+    from normalizer import FeatureNormalizer
+
+    store = generate_population(n_cases, n_days=WINDOW_DAYS, rng=np.random.default_rng(seed))
+    weeks = store.signal_tensor()
+    edge = np.zeros((2,) + weeks.shape[1:])
+    edge[1] = weeks[0, -1]
+    weeks = np.concatenate([weeks, edge])
+
+    raw = extract_features(weeks, normalize=False)
+    normalized = extract_features(weeks)
+    standard = FeatureNormalizer().partial_fit(raw).to_dict()
+    standardized = normalize_features(raw, standard)
+    return {
+        'spec_version': SPEC_VERSION,
+        'signals': DAILY_SIGNALS,
+        'standard_normalization': standard,
+        'cases': [
+            {'week': week.tolist(), 'raw': r.tolist(), 'normalized': n.tolist(),
+             'standardized': z.tolist()}
+            for week, r, n, z in zip(weeks, raw, normalized, standardized)
+        ],
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--output', default='../assets/models/feature_spec.json')
+    parser.add_argument('--golden', default='../test/fixtures/feature_golden.json',
+                        help='also write reference feature vectors here')
+    parser.add_argument('--golden-cases', type=int, default=8)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    write_spec(args.output)
+    print(f"✓ Feature spec saved to {args.output}")
+
+    if args.golden:
+        with open(args.golden, 'w') as f:
+            json.dump(golden_vectors(args.golden_cases), f, indent=2)
+        print(f"✓ Golden vectors saved to {args.golden}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Vectorized feature extraction for EchoWealth training data.
+Executes the feature spec for a whole population in a few array ops.
+"""
+
+import numpy as np
+
+from feature_spec import FEATURE_SPEC, NORMALIZATION, WEEKDAYS, WINDOW_DAYS
+from normalizer import FeatureNormalizer
+from profile_store import DAILY_SIGNALS
+
+N_FEATURES = len(FEATURE_SPEC)
+
+def count_windows(n_days, window=7, stride=None):
+    """Number of windows sliding_windows() yields for a history of n_days."""
+    if stride is None:
+        return 1
+    return (n_days - window) // stride + 1
+
+def sliding_windows(tensor, window=7, stride=None):
+    """Strided view of (profiles x windows x window days x signals) over a daily tensor.
+
+    Windows end on the last day and step back by stride days; stride=None
+    keeps only the final window. No data is copied.
+    """
+    n_days = tensor.shape[1]
+    if not 0 < window <= n_days:
+        raise ValueError(f"Window of {window} days does not fit a {n_days}-day history")
+
+    if stride is None:
+        return tensor[:, np.newaxis, n_days - window:]
+
+    offset = (n_days - window) % stride
+    windows = np.lib.stride_tricks.sliding_window_view(tensor[:, offset:], window, axis=1)
+    return windows[:, ::stride].swapaxes(-1, -2)
+
+def steps_trend(steps):
+    """Least-squares slope of each row against day index (closed form of polyfit deg 1)."""
+    n_days = steps.shape[-1]
+    t = np.arange(n_days, dtype=np.float64)
+    t -= t.mean()
+    return (steps @ t) / (t @ t)
+
+def _daily_rate(x):
+    total = x.sum(axis=-1)
+    return np.where(total > 0, total / x.shape[-1], 0)
+
+def _weekend_ratio(x):
+    weekday = x[..., :WEEKDAYS].mean(axis=-1)
+    weekend = x[..., WEEKDAYS:].mean(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(weekday > 0, weekend / weekday, 1)
+
+# Vectorized implementation of every aggregation named in feature_spec
+AGGREGATE = {
+    'mean': lambda x: x.mean(axis=-1),
+    'std': lambda x: x.std(axis=-1),
+    'var': lambda x: x.var(axis=-1),
+    'sum': lambda x: x.sum(axis=-1),
+    'slope': steps_trend,
+    'daily_rate': _daily_rate,
+    'weekend_ratio': _weekend_ratio,
+}
+
+def normalize_features(features, normalization=NORMALIZATION):
+    """Apply a feature_spec normalization to (... x features) rows.
+
+    'per_row' standardizes every vector by its own statistics; 'standard'
+    applies per-feature statistics fitted on the training set.
+    """
+    if normalization['method'] == 'per_row':
+        mean = features.mean(axis=-1, keepdims=True)
+        std = features.std(axis=-1, keepdims=True)
+        return (features - mean) / (std + normalization['epsilon'])
+    if normalization['method'] == 'standard':
+        return FeatureNormalizer.from_dict(normalization).transform(features)
+    raise ValueError(f"Unknown normalization: {normalization['method']}")
+
+def extract_features(week, normalize=True, spec=FEATURE_SPEC, normalization=NORMALIZATION):
+    """Compute the model features from a (... x 7 days x signals) tensor.
+
+    Leading dimensions are kept, so both (profiles x 7 x signals) and
+    sliding_windows() views work without reshaping. Each entry of the
+    feature spec is one vectorized aggregation (or a scaled copy of an
+    earlier feature), followed by the spec's normalization when
+    normalize is set.
+    """
+    week = np.asarray(week, dtype=np.float64)
+    if week.shape[-2] != WINDOW_DAYS:
+        raise ValueError(f"Features are defined over {WINDOW_DAYS} days, got {week.shape[-2]}")
+
+    features = np.empty(week.shape[:-2] + (len(spec),))
+    columns = {}
+
+    for i, feature in enumerate(spec):
+        if 'source' in feature:
+            features[..., i] = columns[feature['source']] * feature['scale']
+        else:
+            signal = week[..., DAILY_SIGNALS.index(feature['signal'])]
+            features[..., i] = AGGREGATE[feature['aggregation']](signal)
+        columns[feature['name']] = features[..., i]
+
+    if normalize:
+        features = normalize_features(features, normalization)
+
+    return features
@@ -4,183 +4,390 @@ Generate synthetic data for EchoWealth poverty prediction model.
 Based on research from Blumenstock et al. (Science 2015) and World Bank statistics.
 """
 
+import argparse
+import glob
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-import pandas as pd
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
+
+from feature_spec import FEATURE_NAMES, NORMALIZATION
+from instrumentation import Tracer, add_trace_arguments, tracer
+from normalizer import FeatureNormalizer
+import parquet_dataset
+from features import N_FEATURES, count_windows, extract_features, sliding_windows
+from profile_store import DAILY_SIGNALS, PROFILE_DTYPE, ProfileStore
+
+N_DAYS = 30  # Days of behavioral history simulated per profile
+
+def generate_population(n_profiles=1000, n_days=N_DAYS, rng=None, first_profile_id=0):
+    """Generate a batch of synthetic profiles as columnar NumPy arrays.
+    
+    Draws every profile x day value in one shot, using risk-tier masks
+    instead of per-day branches, and returns them as a ProfileStore.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    shape = (n_profiles, n_days)
+    
+    # Demographics (based on World Bank data)
+    age = rng.normal(35, 12, n_profiles)
+    household_size = rng.poisson(5, n_profiles) + 1
+    
+    # Assets (goats, chickens - key poverty indicators)
+    goats = np.where(rng.random(n_profiles) > 0.3, rng.poisson(2, n_profiles), 0)
+    chickens = np.where(rng.random(n_profiles) > 0.2, rng.poisson(8, n_profiles), 0)
+    
+    # Risk tiers as (n_profiles, 1) masks so they broadcast over days
+    base_poverty_risk = rng.random(n_profiles)
+    risk = base_poverty_risk[:, None]
+    high_risk = risk > 0.7
+    medium_risk = (risk > 0.4) & ~high_risk
+    
+    # Steps (mobility patterns - key poverty predictor)
+    steps_loc = np.select([high_risk, medium_risk], [2500.0, 5000.0], 8000.0)
+    steps_scale = np.select([high_risk, medium_risk], [800.0, 1200.0], 1500.0)
+    idle_prob = np.select([high_risk, medium_risk], [0.4, 0.2], 0.1)
+    steps_mean = rng.normal(steps_loc, steps_scale, shape)
+    steps_std = rng.normal(1500, 300, shape)
+    idle_periods = (rng.random(shape) < idle_prob).astype(np.int64)
+    
+    # Charging patterns (electricity access indicator)
+    night_charger = risk > 0.6
+    charge_night_pct = rng.normal(
+        np.where(night_charger, 0.7, 0.3),
+        np.where(night_charger, 0.2, 0.15),
+        shape
+    )
+    charge_cycles = rng.poisson(np.where(night_charger, 1.0, 2.0), shape)
+    
+    # SMS loan patterns (financial stress indicator)
+    sms_loan_count = rng.poisson(np.where(risk > 0.5, 3.0, 0.5), shape)
+    
+    daily = {
+        'steps_mean': np.maximum(0, steps_mean),
+        'steps_std': np.maximum(0, steps_std),
+        'idle_periods': idle_periods,
+        'charge_night_pct': np.clip(charge_night_pct, 0, 1),
+        'charge_cycles': charge_cycles,
+        'sms_loan_count': sms_loan_count,
+    }
+    
+    # Calculate ground truth poverty risk (0-1)
+    # Based on multiple factors with realistic correlations
+    mobility_factor = 1 - daily['steps_mean'].mean(axis=1) / 10000
+    charging_factor = daily['charge_night_pct'].mean(axis=1)
+    sms_factor = np.minimum(1, daily['sms_loan_count'].mean(axis=1) / 5)
+    asset_factor = 1 - np.minimum(1, goats * 0.2 + chickens * 0.05)
+    
+    poverty_risk = np.clip(
+        0.3 * mobility_factor + 
+        0.25 * charging_factor + 
+        0.25 * sms_factor + 
+        0.2 * asset_factor + 
+        rng.normal(0, 0.1, n_profiles),  # Add noise
+        0, 1
+    )
+    
+    profiles = np.empty(n_profiles, dtype=PROFILE_DTYPE)
+    profiles['profile_id'] = np.arange(first_profile_id, first_profile_id + n_profiles)
+    profiles['age'] = age
+    profiles['household_size'] = household_size
+    profiles['goats'] = goats
+    profiles['chickens'] = chickens
+    profiles['poverty_risk'] = poverty_risk
+    
+    return ProfileStore(profiles, daily)
 
 def generate_burundian_profiles(n_profiles=1000):
     """Generate synthetic profiles for Burundian farmers."""
-    profiles = []
+    return generate_population(n_profiles).to_profiles()
+
+def create_training_dataset(profiles):
+    """Convert profiles (a ProfileStore or legacy list of dicts) to ML training format."""
+    if not isinstance(profiles, ProfileStore):
+        profiles = ProfileStore.from_profiles(profiles)
+    
+    # Take last 7 days for prediction
+    week = profiles.signal_tensor(days=slice(-7, None))
+    
+    X = extract_features(week)  # Features (21 per profile)
+    y = profiles.profiles['poverty_risk'].astype(np.float64)  # Labels (poverty risk)
+    
+    return X, y
+
+def create_windowed_dataset(profiles, window=7, stride=1, sequences=False, normalize=True):
+    """Emit one training row per sliding window over each profile's history.
+    
+    Windows end on the last simulated day and step back by stride days
+    (stride=None keeps only the last window). Rows are the 21 features,
+    per-row normalized unless normalize is False, or raw (window x signals)
+    daily sequences when sequences is set. Labels repeat each profile's
+    poverty risk once per window.
+    """
+    if not isinstance(profiles, ProfileStore):
+        profiles = ProfileStore.from_profiles(profiles)
     
-    for i in range(n_profiles):
-        # Demographics (based on World Bank data)
-        age = np.random.normal(35, 12)
-        household_size = np.random.poisson(5) + 1
+    windows = sliding_windows(profiles.signal_tensor(), window, stride)
+    
+    if sequences:
+        X = windows.reshape(-1, window, len(DAILY_SIGNALS))
+    else:
+        X = extract_features(windows, normalize).reshape(-1, N_FEATURES)
+    y = np.repeat(profiles.profiles['poverty_risk'].astype(np.float64), windows.shape[1])
+    
+    return X, y
+
+def _write_chunk(sink, batch, start, stop, seed_seq,
+                 window, stride, sequences, normalization):
+    """Generate one chunk of profiles and write its rows to the sink.
+    
+    sink is ('npy', features_path, labels_path, groups_path) to fill the
+    chunk's row range of the pre-allocated memmaps, or ('parquet', dataset_dir) to
+    write the chunk as shard number batch.
+    
+    Returns the chunk's profile range, its fitted feature statistics (None
+    with per-row normalization) and the timing spans recorded for it, since
+    a pool worker cannot record into the parent's tracer.
+    """
+    chunk_tracer = Tracer()
+    with chunk_tracer.stage('chunk', start=start, stop=stop):
+        with chunk_tracer.stage('generate_population'):
+            rng = np.random.default_rng(seed_seq)
+            profiles = generate_population(stop - start, rng=rng, first_profile_id=start)
         
-        # Assets (goats, chickens - key poverty indicators)
-        goats = np.random.poisson(2) if random.random() > 0.3 else 0
-        chickens = np.random.poisson(8) if random.random() > 0.2 else 0
+        with chunk_tracer.stage('extract_features'):
+            X_chunk, y_chunk = create_windowed_dataset(
+                profiles, window, stride, sequences, normalize=normalization == 'per_row'
+            )
         
-        # Generate 30 days of behavioral data
-        daily_data = []
-        base_poverty_risk = random.random()
+        stats = None
+        if normalization == 'standard':
+            with chunk_tracer.stage('fit_normalizer'):
+                stats = FeatureNormalizer().partial_fit(X_chunk)
         
-        for day in range(30):
-            # Steps (mobility patterns - key poverty predictor)
-            if base_poverty_risk > 0.7:  # High poverty risk
-                steps_mean = np.random.normal(2500, 800)  # Low mobility
-                idle_prob = 0.4
-            elif base_poverty_risk > 0.4:  # Medium risk
-                steps_mean = np.random.normal(5000, 1200)
-                idle_prob = 0.2
-            else:  # Low risk
-                steps_mean = np.random.normal(8000, 1500)  # High mobility
-                idle_prob = 0.1
-            
-            steps_std = np.random.normal(1500, 300)
-            idle_periods = 1 if random.random() < idle_prob else 0
-            
-            # Charging patterns (electricity access indicator)
-            if base_poverty_risk > 0.6:
-                charge_night_pct = np.random.normal(0.7, 0.2)  # More night charging (no electricity)
-                charge_cycles = np.random.poisson(1)
-            else:
-                charge_night_pct = np.random.normal(0.3, 0.15)
-                charge_cycles = np.random.poisson(2)
-            
-            # SMS loan patterns (financial stress indicator)
-            if base_poverty_risk > 0.5:
-                sms_loan_count = np.random.poisson(3)  # More loan-related SMS
+        with chunk_tracer.stage('write', format=sink[0]):
+            rows_per_profile = count_windows(N_DAYS, window, stride)
+            if sink[0] == 'parquet':
+                table = parquet_dataset.shard_table(
+                    profiles.profiles, X_chunk, y_chunk, FEATURE_NAMES, rows_per_profile,
+                    metadata={'normalization': NORMALIZATION if normalization == 'per_row' else None},
+                )
+                parquet_dataset.write_shard(sink[1], batch, table)
             else:
-                sms_loan_count = np.random.poisson(0.5)
-            
-            daily_data.append({
-                'day': day,
-                'steps_mean': max(0, steps_mean),
-                'steps_std': max(0, steps_std),
-                'idle_periods': idle_periods,
-                'charge_night_pct': np.clip(charge_night_pct, 0, 1),
-                'charge_cycles': max(0, charge_cycles),
-                'sms_loan_count': max(0, sms_loan_count),
-            })
-        
-        # Calculate ground truth poverty risk (0-1)
-        # Based on multiple factors with realistic correlations
-        mobility_factor = 1 - (np.mean([d['steps_mean'] for d in daily_data]) / 10000)
-        charging_factor = np.mean([d['charge_night_pct'] for d in daily_data])
-        sms_factor = min(1, np.mean([d['sms_loan_count'] for d in daily_data]) / 5)
-        asset_factor = 1 - min(1, (goats * 0.2 + chickens * 0.05))
-        
-        poverty_risk = np.clip(
-            0.3 * mobility_factor + 
-            0.25 * charging_factor + 
-            0.25 * sms_factor + 
-            0.2 * asset_factor + 
-            np.random.normal(0, 0.1),  # Add noise
-            0, 1
-        )
-        
-        profiles.append({
-            'profile_id': i,
-            'age': age,
-            'household_size': household_size,
-            'goats': goats,
-            'chickens': chickens,
-            'poverty_risk': poverty_risk,
-            'daily_data': daily_data
-        })
-    
-    return profiles
+                _, features_path, labels_path, groups_path = sink
+                rows = slice(start * rows_per_profile, stop * rows_per_profile)
+                X = np.load(features_path, mmap_mode='r+')
+                y = np.load(labels_path, mmap_mode='r+')
+                groups = np.load(groups_path, mmap_mode='r+')
+                X[rows] = X_chunk
+                y[rows] = y_chunk
+                groups[rows] = np.repeat(profiles.profiles['profile_id'], rows_per_profile)
+                X.flush()
+                y.flush()
+                groups.flush()
+    return start, stop, stats, chunk_tracer.spans
 
-def create_training_dataset(profiles):
-    """Convert profiles to ML training format."""
-    X = []  # Features
-    y = []  # Labels (poverty risk)
+def _write_chunks(sink, n_profiles, chunk_size, seed, workers,
+                  window, stride, sequences, normalization):
+    """Run _write_chunk over every chunk, in a process pool if workers > 1.
     
-    for profile in profiles:
-        # Aggregate weekly features (21 features total)
-        daily_data = profile['daily_data']
-        
-        # Take last 7 days for prediction
-        week_data = daily_data[-7:]
-        
-        features = []
-        
-        # Basic aggregated features (7 features)
-        features.append(np.mean([d['steps_mean'] for d in week_data]))
-        features.append(np.std([d['steps_mean'] for d in week_data]))
-        features.append(np.mean([d['charge_night_pct'] for d in week_data]))
-        features.append(np.sum([d['sms_loan_count'] for d in week_data]))
-        features.append(np.sum([d['idle_periods'] for d in week_data]))
-        features.append(np.mean([d['charge_cycles'] for d in week_data]))
-        features.append(np.std([d['steps_std'] for d in week_data]))
-        
-        # Engineered features (14 more features)
-        # Trend features
-        steps_trend = np.polyfit(range(7), [d['steps_mean'] for d in week_data], 1)[0]
-        features.append(steps_trend)
-        
-        # Variability features
-        features.append(np.var([d['steps_mean'] for d in week_data]))
-        features.append(np.var([d['charge_night_pct'] for d in week_data]))
-        
-        # Ratio features
-        total_steps = sum([d['steps_mean'] for d in week_data])
-        features.append(total_steps / 7 if total_steps > 0 else 0)
-        
-        # Weekend vs weekday patterns (simplified)
-        weekday_steps = np.mean([week_data[i]['steps_mean'] for i in range(5)])
-        weekend_steps = np.mean([week_data[i]['steps_mean'] for i in range(5, 7)])
-        features.append(weekend_steps / weekday_steps if weekday_steps > 0 else 1)
-        
-        # Add more engineered features to reach 21
-        for i in range(9):
-            features.append(features[i % 7] * (1 + i * 0.1))  # Scaled versions
-        
-        # Normalize features
-        features = np.array(features[:21])  # Ensure exactly 21 features
-        features = (features - np.mean(features)) / (np.std(features) + 1e-8)
-        
-        X.append(features)
-        y.append(profile['poverty_risk'])
+    Returns the seed entropy used and the merged FeatureNormalizer (None
+    for 'per_row' normalization).
+    """
+    seed_seq = np.random.SeedSequence(seed)
+    starts = range(0, n_profiles, chunk_size)
+    chunks = [
+        (sink, batch, start, min(start + chunk_size, n_profiles), child,
+         window, stride, sequences, normalization)
+        for batch, (start, child) in enumerate(zip(starts, seed_seq.spawn(len(starts))))
+    ]
     
-    return np.array(X), np.array(y)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    map_chunks = pool.map if pool else map
+    normalizer = FeatureNormalizer() if normalization == 'standard' else None
+    try:
+        # Chunks arrive in order, so the merged statistics do not depend on workers
+        for start, stop, stats, spans in map_chunks(_write_chunk, *zip(*chunks)):
+            tracer.extend(spans)
+            if normalizer:
+                normalizer.merge(stats)
+            print(f"  Profiles {start:,}-{stop:,} of {n_profiles:,} written")
+    finally:
+        if pool:
+            pool.shutdown()
+    return seed_seq.entropy, normalizer
 
-def main():
-    print("Generating synthetic Burundian farmer data...")
+def write_training_dataset(n_profiles, chunk_size=100_000,
+                           features_path='training_features.npy',
+                           labels_path='training_labels.npy',
+                           groups_path='training_groups.npy',
+                           seed=None, workers=1,
+                           window=7, stride=None, sequences=False,
+                           normalization='per_row'):
+    """Generate profiles chunk by chunk and stream features into .npy memmaps.
     
-    # Generate profiles
-    profiles = generate_burundian_profiles(1000)
-    
-    # Create training dataset
-    X, y = create_training_dataset(profiles)
-    
-    # Save data
-    np.save('training_features.npy', X)
-    np.save('training_labels.npy', y)
-    
-    # Save metadata
-    metadata = {
-        'n_samples': len(X),
-        'n_features': X.shape[1],
-        'feature_names': [
-            'steps_mean', 'steps_std', 'charge_night_pct', 'sms_loan_count',
-            'idle_periods', 'charge_cycles', 'steps_variability', 'steps_trend',
-            'steps_variance', 'charge_variance', 'daily_avg_steps', 'weekend_ratio'
-        ] + [f'engineered_{i}' for i in range(9)],
-        'label_range': [float(y.min()), float(y.max())],
-        'generated_at': datetime.now().isoformat()
-    }
+    Peak memory is bounded by chunk_size rather than n_profiles. Each chunk
+    draws from its own Generator spawned from one SeedSequence and writes to
+    a fixed row range, so a given seed produces the same files for any
+    number of workers. window, stride and sequences are passed to
+    create_windowed_dataset. groups_path receives the profile_id of every
+    row, so that windows of one profile can be kept out of each other's
+    validation split.
+    
+    With 'standard' normalization rows are stored raw and per-feature
+    statistics are fitted in the same pass, chunk by chunk, for the model
+    to apply; 'per_row' stores every row standardized by its own mean and
+    std. Returns the memory-mapped (X, y) arrays, the seed entropy used and
+    the fitted FeatureNormalizer (None for 'per_row').
+    """
+    n_rows = n_profiles * count_windows(N_DAYS, window, stride)
+    row_shape = (window, len(DAILY_SIGNALS)) if sequences else (N_FEATURES,)
+    
+    # Pre-allocate the output files; workers reopen them in r+ mode
+    np.lib.format.open_memmap(
+        features_path, mode='w+', dtype=np.float64, shape=(n_rows,) + row_shape
+    ).flush()
+    np.lib.format.open_memmap(
+        labels_path, mode='w+', dtype=np.float64, shape=(n_rows,)
+    ).flush()
+    np.lib.format.open_memmap(
+        groups_path, mode='w+', dtype=np.int64, shape=(n_rows,)
+    ).flush()
+    
+    entropy, normalizer = _write_chunks(
+        ('npy', features_path, labels_path, groups_path), n_profiles, chunk_size, seed, workers,
+        window, stride, sequences, normalization
+    )
+    
+    X = np.load(features_path, mmap_mode='r')
+    y = np.load(labels_path, mmap_mode='r')
+    return X, y, entropy, normalizer
+
+def write_parquet_dataset(n_profiles, chunk_size=100_000, dataset_dir='training_dataset',
+                          seed=None, workers=1, window=7, stride=None,
+                          normalization='per_row'):
+    """Generate profiles chunk by chunk into a sharded Parquet dataset.
+    
+    Each chunk becomes one shard, batch=NNNNN/part-0.parquet, written by
+    the worker that generated it; rows hold the profile's demographics,
+    the 21 features and the label (see parquet_dataset.py). Seeding and
+    normalization work as in write_training_dataset, and the fitted
+    statistics are stored in the dataset's _common_metadata. Returns the
+    labels, the seed entropy used and the fitted FeatureNormalizer.
+    """
+    # Shards of a previous, larger run would otherwise be read back
+    for stale in glob.glob(os.path.join(dataset_dir, 'batch=*')):
+        shutil.rmtree(stale)
+    os.makedirs(dataset_dir, exist_ok=True)
     
-    import json
-    with open('dataset_metadata.json', 'w') as f:
-        json.dump(metadata, f, indent=2)
+    entropy, normalizer = _write_chunks(
+        ('parquet', dataset_dir), n_profiles, chunk_size, seed, workers,
+        window, stride, False, normalization
+    )
     
-    print(f"Generated {len(X)} samples with {X.shape[1]} features each")
-    print(f"Poverty risk range: {y.min():.3f} - {y.max():.3f}")
-    print(f"Mean poverty risk: {y.mean():.3f}")
-    print("Data saved to training_features.npy and training_labels.npy")
+    parquet_dataset.write_common_metadata(
+        dataset_dir, parquet_dataset.open_dataset(dataset_dir).schema,
+        {'normalization': normalizer.to_dict() if normalizer else NORMALIZATION},
+    )
+    return parquet_dataset.read_labels(dataset_dir), entropy, normalizer
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--n-profiles', type=int, default=1000,
+                        help='number of synthetic profiles to generate (default: 1000)')
+    parser.add_argument('--chunk-size', type=int, default=100_000,
+                        help='profiles generated per chunk; bounds peak memory (default: 100000)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='root seed for reproducible datasets (default: fresh entropy)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='generator processes; 0 uses every CPU core (default: 1)')
+    parser.add_argument('--window', type=int, default=7,
+                        help='days per training window (default: 7)')
+    parser.add_argument('--stride', type=int, default=None,
+                        help='days between sliding windows; omit to use only the last window')
+    parser.add_argument('--sequences', action='store_true',
+                        help='store raw daily sequences instead of the 21 features')
+    parser.add_argument('--normalization', choices=['standard', 'per_row'], default='per_row',
+                        help="'per_row' standardizes each row by its own mean and std, as the "
+                             "shipped model and feature spec expect; 'standard' stores raw rows "
+                             "and fits per-feature statistics for the model to apply "
+                             "(default: per_row)")
+    parser.add_argument('--format', choices=['npy', 'parquet'], default='npy',
+                        help="'npy' writes training_features.npy and training_labels.npy; "
+                             "'parquet' writes one shard per chunk with demographics and "
+                             "named feature columns, and needs pyarrow (default: npy)")
+    parser.add_argument('--output-dir', default='training_dataset',
+                        help='Parquet dataset directory (default: training_dataset)')
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.format == 'parquet' and args.sequences:
+        parser.error("--sequences is only supported with --format npy")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    tracer.configure(args.trace, args.cprofile)
+    print("Generating synthetic Burundian farmer data...")
+    
+    try:
+        # Generate profiles and stream features straight to disk
+        workers = args.workers or os.cpu_count()
+        with tracer.stage('generate', n_profiles=args.n_profiles, workers=workers,
+                          format=args.format):
+            if args.format == 'parquet':
+                y, seed, normalizer = write_parquet_dataset(
+                    args.n_profiles, args.chunk_size, args.output_dir, seed=args.seed,
+                    workers=workers, window=args.window, stride=args.stride,
+                    normalization=args.normalization
+                )
+                sample_shape = (N_FEATURES,)
+            else:
+                X, y, seed, normalizer = write_training_dataset(
+                    args.n_profiles, args.chunk_size, seed=args.seed, workers=workers,
+                    window=args.window, stride=args.stride, sequences=args.sequences,
+                    normalization=args.normalization
+                )
+                sample_shape = X.shape[1:]
+        
+        # Save metadata
+        with tracer.stage('metadata'):
+            metadata = {
+                'format': args.format,
+                'n_samples': len(y),
+                'n_features': sample_shape[-1],
+                'sample_shape': list(sample_shape),
+                'feature_names': DAILY_SIGNALS if args.sequences else FEATURE_NAMES,
+                'window': args.window,
+                'stride': args.stride,
+                'windows_per_profile': count_windows(N_DAYS, args.window, args.stride),
+                'normalization': (
+                    normalizer.to_dict() if normalizer
+                    else None if args.sequences else NORMALIZATION
+                ),
+                'label_range': [float(y.min()), float(y.max())],
+                'seed': seed,
+                'generated_at': datetime.now().isoformat()
+            }
+            if args.format == 'parquet':
+                metadata['dataset_dir'] = args.output_dir
+            
+            import json
+            with open('dataset_metadata.json', 'w') as f:
+                json.dump(metadata, f, indent=2)
+        
+        print(f"Generated {len(y)} samples of shape {tuple(sample_shape)}")
+        print(f"Poverty risk range: {y.min():.3f} - {y.max():.3f}")
+        print(f"Mean poverty risk: {y.mean():.3f}")
+        if args.format == 'parquet':
+            print(f"Data saved to {args.output_dir}/")
+        else:
+            print("Data saved to training_features.npy, training_labels.npy "
+                  "and training_groups.npy")
+    finally:
+        tracer.write('generate_synthetic_data')
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Stage-level timing instrumentation for the EchoWealth pipeline scripts.
+Records wall time, CPU time and memory per stage and writes JSON and Chrome traces.
+"""
+
+import cProfile
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+def _rss_mb():
+    """Current resident set size in MB (Linux /proc), or None elsewhere."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        return None
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    """Process-lifetime peak resident set size in MB; ru_maxrss is bytes on macOS, KB elsewhere."""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+class _RssSampler:
+    """Polls the resident set size so that every open stage gets its own peak.
+
+    ru_maxrss only ever grows, so it cannot tell one stage's peak from an
+    earlier one. A daemon thread samples /proc/self/statm every interval
+    seconds while any stage is open; spikes shorter than that can be
+    missed. Where statm is unavailable, stages get no peak (None).
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._peaks = {}
+        self._pid = None
+
+    def open(self):
+        """Start tracking a stage; returns a token for close()."""
+        rss = _rss_mb()
+        if rss is None:
+            return None
+        token = object()
+        with self._lock:
+            self._peaks[token] = rss
+            # A forked pool worker inherits this object but not the thread
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name='rss-sampler', daemon=True).start()
+        return token
+
+    def close(self, token):
+        """Peak RSS in MB since open(token)."""
+        if token is None:
+            return None
+        self._sample()
+        with self._lock:
+            return self._peaks.pop(token)
+
+    def _sample(self):
+        rss = _rss_mb()
+        with self._lock:
+            for token, peak in self._peaks.items():
+                self._peaks[token] = max(peak, rss)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if self._peaks:
+                self._sample()
+
+_rss_sampler = _RssSampler()
+
+class Tracer:
+    """Collects timed spans for pipeline stages.
+
+    Spans nest, so a stage can be broken down further (e.g. per chunk).
+    Recording is always on and cheap; nothing is written unless
+    configure() was given an output prefix.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.prefix = None
+        self.profile = False
+        self._depth = threading.local()
+
+    def configure(self, prefix=None, profile=False):
+        """Set the output prefix for write() and whether stages run under cProfile."""
+        self.prefix = prefix
+        self.profile = profile
+
+    @contextmanager
+    def stage(self, name, **args):
+        """Time the enclosed block as one span; extra kwargs are stored with it."""
+        depth = getattr(self._depth, 'value', 0)
+        self._depth.value = depth + 1
+
+        # Only top-level stages are profiled; cProfile does not nest
+        profiler = cProfile.Profile() if self.profile and self.prefix and depth == 0 else None
+        rss_start = _rss_mb()
+        rss_token = _rss_sampler.open()
+        start, wall, cpu = time.time(), time.perf_counter(), time.process_time()
+        children_cpu = self._children_cpu()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(f"{self.prefix}.{name}.prof")
+            self.spans.append({
+                'name': name,
+                'start': start,
+                'wall_s': time.perf_counter() - wall,
+                'cpu_s': time.process_time() - cpu,
+                'children_cpu_s': self._children_cpu() - children_cpu,
+                'rss_start_mb': rss_start,
+                'rss_end_mb': _rss_mb(),
+                'peak_rss_mb': _rss_sampler.close(rss_token),
+                'process_peak_rss_mb': _peak_rss_mb(),
+                'depth': depth,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': args,
+            })
+            self._depth.value = depth
+
+    @staticmethod
+    def _children_cpu():
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+
+    def extend(self, spans):
+        """Merge spans recorded elsewhere (e.g. a pool worker) under the current stage."""
+        depth = getattr(self._depth, 'value', 0)
+        for span in spans:
+            self.spans.append({**span, 'depth': span['depth'] + depth})
+
+    def summary(self):
+        """Print one line per span, indented by nesting depth, in start order."""
+        print(f"\n{'stage':<40} {'wall s':>9} {'cpu s':>9} {'peak MB':>9}")
+        for span in sorted(self.spans, key=lambda s: s['start']):
+            name = '  ' * span['depth'] + span['name']
+            peak = span['peak_rss_mb']
+            print(f"{name:<40} {span['wall_s']:>9.3f} "
+                  f"{span['cpu_s'] + span['children_cpu_s']:>9.3f} "
+                  f"{'-' if peak is None else f'{peak:.1f}':>9}")
+
+    def chrome_trace(self):
+        """Spans as Chrome trace-event 'complete' events (chrome://tracing, Perfetto)."""
+        return {
+            'traceEvents': [
+                {
+                    'name': span['name'],
+                    'ph': 'X',
+                    'ts': span['start'] * 1e6,
+                    'dur': span['wall_s'] * 1e6,
+                    'pid': span['pid'],
+                    'tid': span['tid'],
+                    'args': {
+                        'cpu_s': span['cpu_s'],
+                        'children_cpu_s': span['children_cpu_s'],
+                        'peak_rss_mb': span['peak_rss_mb'],
+                        'process_peak_rss_mb': span['process_peak_rss_mb'],
+                        **span['args'],
+                    },
+                }
+                for span in self.spans
+            ],
+            'displayTimeUnit': 'ms',
+        }
+
+    def write(self, script):
+        """Write <prefix>.json and <prefix>.trace.json if a prefix was configured."""
+        if not self.prefix:
+            return
+
+        with open(f"{self.prefix}.json", 'w') as f:
+            json.dump({
+                'script': script,
+                'generated_at': datetime.now().isoformat(),
+                'spans': self.spans,
+            }, f, indent=2, default=str)
+        with open(f"{self.prefix}.trace.json", 'w') as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+        self.summary()
+        print(f"✓ Trace saved to {self.prefix}.json and {self.prefix}.trace.json")
+
+tracer = Tracer()
+
+def add_trace_arguments(parser):
+    """Add the --trace/--cprofile options shared by the pipeline scripts."""
+    parser.add_argument('--trace', metavar='PREFIX', default=None,
+                        help='write per-stage timings to PREFIX.json and PREFIX.trace.json')
+    parser.add_argument('--cprofile', action='store_true',
+                        help='also run each stage under cProfile (PREFIX.<stage>.prof)')
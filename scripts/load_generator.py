@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Load generator for the EchoWealth scoring server.
+Keeps a fixed number of concurrent HTTP clients busy and reports throughput and latency.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from features import N_FEATURES
+
+async def _request(reader, writer, method, path, body=b''):
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+async def _client(host, port, bodies, deadline, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        i = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, 'POST', '/score', bodies[i % len(bodies)])
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+            i += 1
+    finally:
+        writer.close()
+
+async def run_load(host='127.0.0.1', port=8080, concurrency=32, duration=10.0,
+                   rows_per_request=1, X=None, seed=0):
+    """Closed-loop load: each client sends its next request as soon as the last returns.
+
+    Requests carry rows_per_request rows of X (random features if None).
+    Returns client-side throughput and latency plus the server's /metrics.
+    """
+    rng = np.random.default_rng(seed)
+    if X is None:
+        X = rng.standard_normal((4096, N_FEATURES))
+    rows = rng.integers(0, len(X), size=(256, rows_per_request))
+    bodies = [json.dumps({'features': np.asarray(X[r]).tolist()}).encode() for r in rows]
+
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _client(host, port, bodies[i::concurrency] or bodies, start + duration,
+                latencies, statuses)
+        for i in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, server_metrics = await _request(reader, writer, 'GET', '/metrics')
+    finally:
+        writer.close()
+
+    latencies = np.asarray(latencies)
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {
+        'concurrency': concurrency,
+        'rows_per_request': rows_per_request,
+        'duration_s': elapsed,
+        'requests': len(latencies),
+        'statuses': statuses,
+        'requests_per_sec': len(latencies) / elapsed,
+        'rows_per_sec': len(latencies) * rows_per_request / elapsed,
+        'latency_ms': {'mean': float(latencies.mean()), 'p50': float(p50),
+                       'p90': float(p90), 'p99': float(p99), 'max': float(latencies.max())},
+        'server': server_metrics,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128],
+                        help='concurrent clients; several values run one after another')
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help='seconds per concurrency level (default: 10)')
+    parser.add_argument('--rows-per-request', type=int, default=1)
+    parser.add_argument('--features', default=None,
+                        help='.npy feature rows to send (default: random)')
+    parser.add_argument('--output', default=None, help='save the results as JSON')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    X = np.load(args.features, mmap_mode='r')[:65536] if args.features else None
+
+    results = []
+    print(f"{'clients':>8} {'req/s':>10} {'rows/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'batch':>6} {'errors':>6}")
+    for concurrency in args.concurrency:
+        result = asyncio.run(run_load(args.host, args.port, concurrency, args.duration,
+                                      args.rows_per_request, X))
+        results.append(result)
+        latency = result['latency_ms']
+        errors = sum(n for status, n in result['statuses'].items() if status != 200)
+        print(f"{concurrency:>8} {result['requests_per_sec']:>10,.0f} "
+              f"{result['rows_per_sec']:>10,.0f} {latency['p50']:>8.2f} {latency['p99']:>8.2f} "
+              f"{result['server']['mean_batch_rows']:>6.1f} {errors:>6}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Golden-output and latency regression checks for EchoWealth TFLite models.
+Records reference outputs and a latency baseline once, then gates new exports against them.
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from benchmark_tflite import host_info, load_interpreter, measure_latency, summarize
+from feature_spec import FEATURE_NAMES, golden_vectors
+from features import normalize_features
+
+# Host fields that must match for a recorded latency baseline to be comparable
+HOST_KEYS = ['machine', 'processor', 'cpu_count', 'tensorflow']
+
+def model_inputs(spec, n_cases=32, seed=0):
+    """Feature rows computed from reference weeks as the app would for this model.
+
+    The weeks are those of feature_spec.golden_vectors (random profiles plus
+    edge cases). Models that normalize inside the graph take raw features;
+    the others take rows normalized as the spec says. Only the spec's
+    features are kept, in its order.
+    """
+    raw = np.array([case['raw'] for case in golden_vectors(n_cases, seed)['cases']])
+    raw = raw[:, [FEATURE_NAMES.index(feature['name']) for feature in spec['features']]]
+    normalization = spec['normalization']
+    if normalization.get('in_model'):
+        return raw.astype(np.float32)
+    return normalize_features(raw, normalization).astype(np.float32)
+
+def run_model(model_path, inputs):
+    """Risk score of every input row, invoked one row at a time as on device."""
+    interpreter = load_interpreter(model_path, num_threads=1, batch_size=1)
+    input_detail = interpreter.get_input_details()[0]
+    output_index = interpreter.get_output_details()[0]['index']
+
+    outputs = np.empty(len(inputs))
+    for i, row in enumerate(inputs):
+        interpreter.set_tensor(input_detail['index'], row[np.newaxis].astype(input_detail['dtype']))
+        interpreter.invoke()
+        outputs[i] = interpreter.get_tensor(output_index).ravel()[0]
+    return outputs
+
+def measure_model(model_path, inputs, num_threads=1, warmup=50, iterations=1000, rounds=5):
+    """Single-row latency summary, the way the app calls the model.
+
+    p50_ms is the lowest median over several rounds: interference from
+    other processes only ever adds time, so this is the most repeatable
+    figure to gate on, even for models that run in microseconds.
+    p50_spread_ms, the range of the round medians, measures how noisy
+    that figure is.
+    """
+    interpreter = load_interpreter(model_path, num_threads, batch_size=1)
+    latencies = [measure_latency(interpreter, inputs[:1], warmup, iterations)
+                 for _ in range(rounds)]
+    medians = [np.median(round_ms) for round_ms in latencies]
+    stats = summarize(np.concatenate(latencies), batch_size=1)
+    stats['p50_ms'] = float(min(medians))
+    stats['p50_spread_ms'] = float(max(medians) - min(medians))
+    return {'num_threads': num_threads, 'batch_size': 1, 'rounds': rounds, **stats}
+
+def build_info():
+    """TensorFlow and Keras builds in use; models built by Keras 2 and 3 differ.
+
+    tf.keras is tf_keras (Keras 2) when TF_USE_LEGACY_KERAS=1 is set and
+    Keras 3 otherwise, so the same seeded build gives different weights.
+    """
+    import tensorflow as tf
+
+    keras_package = tf.keras.__name__.split('.')[0]
+    return {
+        'tensorflow': tf.__version__,
+        'keras': f"{keras_package} {importlib.import_module(keras_package).__version__}",
+    }
+
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load_spec(model_path, spec_path=None):
+    """The feature spec shipped next to the model."""
+    spec_path = spec_path or os.path.join(os.path.dirname(model_path), 'feature_spec.json')
+    with open(spec_path) as f:
+        return json.load(f)
+
+def record_golden(model_path, spec, n_cases=32, seed=0, num_threads=1, iterations=1000):
+    """Golden inputs, outputs and latency baseline of an accepted model."""
+    inputs = model_inputs(spec, n_cases, seed)
+    return {
+        'model': os.path.basename(model_path),
+        'sha256': file_sha256(model_path),
+        'size_bytes': os.path.getsize(model_path),
+        'normalization': spec['normalization']['method'],
+        'seed': seed,
+        'inputs': inputs.tolist(),
+        'outputs': run_model(model_path, inputs).tolist(),
+        'latency': measure_model(model_path, inputs, num_threads, iterations=iterations),
+        'host': host_info(),
+        'build': build_info(),
+        'generated_at': datetime.now().isoformat(),
+    }
+
+def check_model(model_path, golden, atol=1e-4, max_latency_regression=10.0, iterations=1000,
+                check_latency=True, noise_spreads=3.0):
+    """Compare a model against a golden record; returns (passed, report).
+
+    Outputs must match within atol. Median single-row latency may exceed
+    the baseline by at most max_latency_regression percent; a larger
+    increase still passes if it is within noise_spreads times the
+    round-to-round spread (p50_spread_ms) of either measurement, so that a
+    microsecond mock model does not fail at random. When the baseline was
+    recorded on another host latency is not checked, and the report says so.
+    A different TensorFlow or Keras build is reported but does not fail
+    the check by itself.
+    """
+    inputs = np.asarray(golden['inputs'], dtype=np.float32)
+    outputs = run_model(model_path, inputs)
+    errors = np.abs(outputs - np.asarray(golden['outputs']))
+    report = {
+        'model': os.path.basename(model_path),
+        'identical': file_sha256(model_path) == golden['sha256'],
+        'outputs': {
+            'cases': len(inputs),
+            'max_abs_error': float(errors.max()),
+            'mismatches': int((errors > atol).sum()),
+            'atol': atol,
+            'passed': bool((errors <= atol).all()),
+        },
+        'build': {
+            'recorded': golden.get('build'),
+            'current': build_info(),
+        },
+    }
+
+    host = host_info()
+    same_host = all(host[key] == golden['host'][key] for key in HOST_KEYS)
+    if check_latency and same_host:
+        baseline = golden['latency']
+        latency = measure_model(model_path, inputs, baseline['num_threads'],
+                                iterations=iterations)
+        increase = latency['p50_ms'] - baseline['p50_ms']
+        change = increase / baseline['p50_ms'] * 100
+        noise = noise_spreads * max(baseline.get('p50_spread_ms', 0.0), latency['p50_spread_ms'])
+        report['latency'] = {
+            'checked': True,
+            'baseline_p50_ms': baseline['p50_ms'],
+            'p50_ms': latency['p50_ms'],
+            'p99_ms': latency['p99_ms'],
+            'change_pct': change,
+            'max_regression_pct': max_latency_regression,
+            'noise_ms': noise,
+            'passed': change <= max_latency_regression or increase <= noise,
+        }
+    else:
+        differing = [f"{key} {golden['host'][key]} vs {host[key]}"
+                     for key in HOST_KEYS if host[key] != golden['host'][key]]
+        reason = 'disabled' if not check_latency else (
+            f"baseline recorded on another host ({', '.join(differing)})"
+        )
+        report['latency'] = {'checked': False, 'skipped': reason}
+
+    passed = report['outputs']['passed'] and report['latency'].get('passed', True)
+    return passed, report
+
+def print_report(report):
+    outputs = report['outputs']
+    mark = '✓' if outputs['passed'] else '✗'
+    print(f"{mark} Outputs: max abs error {outputs['max_abs_error']:.2e} over "
+          f"{outputs['cases']} cases ({outputs['mismatches']} above {outputs['atol']:g})"
+          + (", model byte-identical" if report['identical'] else ""))
+
+    build = report['build']
+    if build['recorded'] and build['recorded'] != build['current']:
+        print(f"! Build: golden recorded with TensorFlow {build['recorded']['tensorflow']} "
+              f"({build['recorded']['keras']}), this run uses TensorFlow "
+              f"{build['current']['tensorflow']} ({build['current']['keras']})")
+
+    latency = report['latency']
+    if not latency['checked']:
+        print(f"! Latency not checked: {latency['skipped']}")
+    else:
+        mark = '✓' if latency['passed'] else '✗'
+        print(f"{mark} Latency: p50 {latency['baseline_p50_ms']:.4f}ms -> "
+              f"{latency['p50_ms']:.4f}ms ({latency['change_pct']:+.1f}%, "
+              f"limit +{latency['max_regression_pct']:g}% or +{latency['noise_ms']:.4f}ms noise)")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--model', default='../assets/models/echo_wealth.tflite')
+    parser.add_argument('--spec', default=None,
+                        help='feature spec of the model (default: feature_spec.json next to it)')
+    parser.add_argument('--golden', default='../test/fixtures/model_golden.json',
+                        help='golden record to check against, or to write with --record')
+    parser.add_argument('--record', action='store_true',
+                        help='record the model as the new golden reference instead of checking')
+    parser.add_argument('--cases', type=int, default=32,
+                        help='--record: reference weeks from feature_spec.golden_vectors')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--threads', type=int, default=1,
+                        help='--record: interpreter threads for the latency baseline')
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--atol', type=float, default=1e-4,
+                        help='largest absolute risk score difference accepted (default: 1e-4)')
+    parser.add_argument('--max-latency-regression', type=float, default=10.0,
+                        help='largest p50 latency increase accepted, in percent (default: 10)')
+    parser.add_argument('--noise-spreads', type=float, default=3.0,
+                        help='p50 increases within this many round-to-round spreads '
+                             'always pass (default: 3)')
+    parser.add_argument('--no-latency', action='store_true',
+                        help='check outputs only')
+    parser.add_argument('--output', default=None, help='save the check report as JSON')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.record:
+        golden = record_golden(args.model, load_spec(args.model, args.spec), args.cases,
+                               args.seed, args.threads, args.iterations)
+        with open(args.golden, 'w') as f:
+            json.dump(golden, f, indent=2)
+        print(f"✓ Golden record of {args.model} saved to {args.golden} "
+              f"(p50 {golden['latency']['p50_ms']:.4f}ms)")
+        return
+
+    with open(args.golden) as f:
+        golden = json.load(f)
+    print(f"Checking {args.model} against {args.golden}")
+    passed, report = check_model(args.model, golden, args.atol, args.max_latency_regression,
+                                 args.iterations, not args.no_latency, args.noise_spreads)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({**report, 'passed': passed}, f, indent=2)
+    if not passed:
+        sys.exit(1)
+    print("✓ Regression check passed" if report['latency']['checked']
+          else "✓ Regression check passed (outputs only; latency not checked)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Per-feature normalization statistics for EchoWealth training data.
+Fitted in one streaming pass over chunks and applied as a fused multiply-add.
+"""
+
+import numpy as np
+
+# Floor on the standard deviation, the same as keras.layers.Normalization
+EPSILON = 1e-7
+
+class FeatureNormalizer:
+    """Running mean and variance of every feature (the last axis).
+
+    partial_fit() folds in one chunk at a time using the parallel form of
+    Welford's update (Chan et al.), so chunks fitted in separate workers
+    can be combined with merge() and give the same statistics as one pass.
+    Leading axes are flattened: for daily sequences the statistics are per
+    signal over all rows and days.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = None
+        self.m2 = None
+
+    def partial_fit(self, X):
+        """Add a chunk of rows to the statistics."""
+        X = np.asarray(X, dtype=np.float64)
+        X = X.reshape(-1, X.shape[-1])
+        if len(X) == 0:
+            return self
+
+        mean = X.mean(axis=0)
+        m2 = np.square(X - mean).sum(axis=0)
+        return self._combine(len(X), mean, m2)
+
+    def merge(self, other):
+        """Combine with statistics fitted on other rows."""
+        if other.count == 0:
+            return self
+        return self._combine(other.count, other.mean, other.m2)
+
+    def _combine(self, count, mean, m2):
+        if self.count == 0:
+            self.count, self.mean, self.m2 = count, mean.copy(), m2.copy()
+            return self
+
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + np.square(delta) * (self.count * count / total)
+        self.count = total
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / self.count
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def transform(self, X, out=None):
+        """(X - mean) / max(std, EPSILON), computed as X * scale + shift.
+
+        out may be X itself (e.g. a writable memmap) to normalize in place.
+        """
+        scale = 1 / np.maximum(self.std, EPSILON)
+        shift = -self.mean * scale
+        out = np.multiply(X, scale, out=out)
+        out += shift
+        return out
+
+    def to_dict(self):
+        """Statistics in the feature_spec normalization format."""
+        return {
+            'method': 'standard',
+            'count': int(self.count),
+            'mean': self.mean.tolist(),
+            'std': self.std.tolist(),
+            'epsilon': EPSILON,
+        }
+
+    @classmethod
+    def from_dict(cls, stats):
+        """Rebuild from to_dict() output, e.g. dataset_metadata.json['normalization']."""
+        if stats.get('method') != 'standard':
+            raise ValueError(f"Not fitted statistics: {stats.get('method')} normalization")
+
+        normalizer = cls()
+        normalizer.count = stats['count']
+        normalizer.mean = np.asarray(stats['mean'], dtype=np.float64)
+        normalizer.m2 = np.square(np.asarray(stats['std'], dtype=np.float64)) * stats['count']
+        return normalizer
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Pure-NumPy inference for EchoWealth models, without TensorFlow.
+Runs the forward pass from a weight dump written at export time.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+# Layers that carry no computation at inference time
+_PASSTHROUGH = {'InputLayer', 'Dropout'}
+
+# Float32 reference export written next to the weight dump by export_tflite.py
+FLOAT_REFERENCE = 'echo_wealth_float32.tflite'
+
+# Largest risk score difference accepted against the float32 export; only
+# summation order differs. Quantized exports need a far looser tolerance.
+PARITY_ATOL = 1e-5
+
+def dump_weights(model, path):
+    """Write a Keras model's layer sequence, configs and weights to an .npz file."""
+    layers, arrays = [], {}
+    for i, layer in enumerate(model.layers):
+        config = layer.get_config()
+        weights = layer.get_weights()
+        if layer.__class__.__name__ == 'Normalization':
+            # Statistics given at construction are constants, not weights
+            weights = [np.asarray(layer.mean), np.asarray(layer.variance)]
+        layers.append({
+            'name': layer.name,
+            'class': layer.__class__.__name__,
+            'config': {
+                key: config[key]
+                for key in ('activation', 'recurrent_activation', 'return_sequences',
+                            'num_heads', 'key_dim', 'epsilon', 'function')
+                if key in config and isinstance(config[key], (str, int, float, bool))
+            },
+            'n_weights': len(weights),
+        })
+        for j, array in enumerate(weights):
+            arrays[f'{i}/{j}'] = array
+
+    np.savez(path, __layers__=json.dumps(layers), **arrays)
+
+def _activation(name):
+    if name == 'relu':
+        return lambda x: np.maximum(x, 0)
+    if name == 'sigmoid':
+        return lambda x: 1 / (1 + np.exp(-x))
+    if name == 'tanh':
+        return np.tanh
+    if name in (None, 'linear'):
+        return lambda x: x
+    raise ValueError(f"Unsupported activation: {name}")
+
+def _softmax(x, axis=-1):
+    x = np.exp(x - x.max(axis=axis, keepdims=True))
+    return x / x.sum(axis=axis, keepdims=True)
+
+def dense(x, kernel, bias, activation='linear'):
+    return _activation(activation)(x @ kernel + bias)
+
+def lstm(x, kernel, recurrent_kernel, bias, activation='tanh',
+         recurrent_activation='sigmoid', return_sequences=False):
+    """Keras LSTM over a (batch x time x features) input; gate order i, f, c, o."""
+    act, recurrent_act = _activation(activation), _activation(recurrent_activation)
+    batch, steps, _ = x.shape
+    units = recurrent_kernel.shape[0]
+
+    # Input projections for every time step in one matmul
+    x_proj = x @ kernel + bias
+    h = np.zeros((batch, units), dtype=x.dtype)
+    c = np.zeros((batch, units), dtype=x.dtype)
+    outputs = []
+
+    for t in range(steps):
+        z = x_proj[:, t] + h @ recurrent_kernel
+        i = recurrent_act(z[:, :units])
+        f = recurrent_act(z[:, units:2 * units])
+        g = act(z[:, 2 * units:3 * units])
+        o = recurrent_act(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * act(c)
+        outputs.append(h)
+
+    return np.stack(outputs, axis=1) if return_sequences else h
+
+def multi_head_attention(x, q_kernel, q_bias, k_kernel, k_bias, v_kernel, v_bias,
+                         o_kernel, o_bias):
+    """Keras MultiHeadAttention with query = key = value = x."""
+    q = np.einsum('btd,dhk->bthk', x, q_kernel) + q_bias
+    k = np.einsum('btd,dhk->bthk', x, k_kernel) + k_bias
+    v = np.einsum('btd,dhk->bthk', x, v_kernel) + v_bias
+
+    scores = np.einsum('bqhk,bshk->bhqs', q / np.sqrt(q.shape[-1]), k)
+    context = np.einsum('bhqs,bshk->bqhk', _softmax(scores), v)
+    return np.einsum('bqhk,hkd->bqd', context, o_kernel) + o_bias
+
+def normalization(x, mean, variance, epsilon=1e-7):
+    """keras.layers.Normalization: (x - mean) / max(sqrt(variance), epsilon)."""
+    return (x - mean) / np.maximum(np.sqrt(variance), epsilon)
+
+def layer_norm(x, gamma, beta, epsilon=1e-3):
+    mean = x.mean(axis=-1, keepdims=True)
+    var = x.var(axis=-1, keepdims=True)
+    return (x - mean) / np.sqrt(var + epsilon) * gamma + beta
+
+class NumpyModel:
+    """Forward pass of a dumped Keras model using vectorized NumPy.
+
+    Supports the layer types used by create_model and create_mock_model.
+    The residual Add after MultiHeadAttention joins the attention output
+    with that layer's input, matching the functional graph.
+    """
+
+    def __init__(self, path, dtype=np.float32):
+        with np.load(path) as data:
+            self.layers = json.loads(str(data['__layers__']))
+            self.weights = [
+                [data[f'{i}/{j}'].astype(dtype) for j in range(layer['n_weights'])]
+                for i, layer in enumerate(self.layers)
+            ]
+        self.dtype = dtype
+
+    def predict(self, X, batch_size=65536):
+        """Risk scores of shape (n, 1) for a feature array, processed in batches."""
+        X = np.asarray(X)
+        return np.concatenate([
+            self._forward(X[i:i + batch_size].astype(self.dtype))
+            for i in range(0, len(X), batch_size)
+        ]) if len(X) else np.empty((0, 1), dtype=self.dtype)
+
+    def _forward(self, x):
+        residual = None
+        for layer, weights in zip(self.layers, self.weights):
+            kind, config = layer['class'], layer['config']
+
+            if kind in _PASSTHROUGH:
+                continue
+            elif kind == 'Normalization':
+                x = normalization(x, *weights[:2])
+            elif kind in ('TFOpLambda', 'Lambda') and x.ndim == 2:
+                x = x[:, np.newaxis]  # tf.expand_dims(inputs, axis=1)
+            elif kind == 'LSTM':
+                x = lstm(x, *weights,
+                         activation=config.get('activation', 'tanh'),
+                         recurrent_activation=config.get('recurrent_activation', 'sigmoid'),
+                         return_sequences=config.get('return_sequences', False))
+            elif kind == 'MultiHeadAttention':
+                residual = x
+                x = multi_head_attention(x, *weights)
+            elif kind == 'Add':
+                x = residual + x
+            elif kind == 'LayerNormalization':
+                x = layer_norm(x, *weights, epsilon=config.get('epsilon', 1e-3))
+            elif kind == 'GlobalAveragePooling1D':
+                x = x.mean(axis=1)
+            elif kind == 'Dense':
+                x = dense(x, *weights, activation=config.get('activation', 'linear'))
+            else:
+                raise ValueError(f"Unsupported layer {layer['name']} ({kind})")
+
+        return x
+
+def check_parity(weights_path, tflite_path, X, atol=PARITY_ATOL):
+    """Compare NumpyModel against tf.lite.Interpreter; returns (passed, max abs difference)."""
+    from score_tflite import predict
+
+    expected = predict(tflite_path, X)
+    actual = NumpyModel(weights_path).predict(X)[:, 0]
+    max_diff = float(np.abs(expected - actual).max())
+
+    print(f"Max |numpy - tflite| over {len(X)} samples: {max_diff:.2e}")
+    passed = max_diff <= atol
+    if passed:
+        print(f"✓ Parity within {atol}")
+    else:
+        print(f"⚠ Parity exceeds {atol} (quantized models need a looser tolerance)")
+    return passed, max_diff
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--weights', default='echo_wealth_weights.npz')
+    parser.add_argument('--features', default='training_features.npy')
+    parser.add_argument('--output', default=None,
+                        help='save risk scores to this .npy file')
+    parser.add_argument('--check-parity', metavar='TFLITE', nargs='?', const=FLOAT_REFERENCE,
+                        default=None,
+                        help=f'compare against a .tflite model (needs TensorFlow); '
+                             f'default: the float32 export {FLOAT_REFERENCE}')
+    parser.add_argument('--parity-samples', type=int, default=1000)
+    parser.add_argument('--atol', type=float, default=PARITY_ATOL,
+                        help=f'parity tolerance (default: {PARITY_ATOL}, for the float32 export)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    X = np.load(args.features, mmap_mode='r')
+
+    if args.check_parity:
+        passed, _ = check_parity(args.weights, args.check_parity, X[:args.parity_samples],
+                                 args.atol)
+        if not passed:
+            raise SystemExit(1)
+        return
+
+    start = time.perf_counter()
+    scores = NumpyModel(args.weights).predict(X)[:, 0]
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ Scored {len(scores):,} rows in {elapsed:.2f}s "
+          f"({len(scores) / elapsed:,.0f} rows/sec)")
+    if args.output:
+        np.save(args.output, scores)
+        print(f"✓ Scores saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Sharded Parquet storage for EchoWealth training datasets (optional, needs pyarrow).
+One shard per generation batch, with demographics, features and label as columns.
+"""
+
+import json
+import os
+
+import numpy as np
+
+LABEL = 'poverty_risk'
+DEMOGRAPHICS = ['age', 'household_size', 'goats', 'chickens']
+
+# Key of the JSON document stored in every shard's schema metadata
+METADATA_KEY = b'echo_wealth'
+
+def _pyarrow():
+    """Import pyarrow, which only the Parquet format needs."""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("The Parquet dataset format needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+def shard_table(profiles, X, y, feature_names, windows_per_profile=1, metadata=None):
+    """Build one shard as an Arrow table.
+
+    profiles is a PROFILE_DTYPE array; its demographics are repeated for
+    every window row of the profile. feature_names and the label name are
+    embedded in the schema along with any extra metadata.
+    """
+    pa = _pyarrow()
+
+    columns = {
+        'profile_id': np.repeat(profiles['profile_id'], windows_per_profile),
+        'window': np.tile(np.arange(windows_per_profile, dtype=np.uint16), len(profiles)),
+    }
+    for name in DEMOGRAPHICS:
+        columns[name] = np.repeat(profiles[name], windows_per_profile)
+    for i, name in enumerate(feature_names):
+        columns[name] = np.ascontiguousarray(X[:, i])
+    columns[LABEL] = y
+
+    schema_metadata = {
+        'feature_names': list(feature_names),
+        'label': LABEL,
+        'demographics': DEMOGRAPHICS,
+        **(metadata or {}),
+    }
+    table = pa.table(columns)
+    return table.replace_schema_metadata({METADATA_KEY: json.dumps(schema_metadata)})
+
+def write_shard(dataset_dir, batch, table):
+    """Write a shard under a hive-style batch=NNNNN partition directory."""
+    pq = _pyarrow().parquet
+
+    partition = os.path.join(dataset_dir, f'batch={batch:05d}')
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, 'part-0.parquet')
+    pq.write_table(table, path)
+    return path
+
+def write_common_metadata(dataset_dir, schema, metadata):
+    """Write _common_metadata: the shared schema plus dataset-level metadata.
+
+    Statistics known only after every shard is written (e.g. fitted
+    normalization) are stored here.
+    """
+    pq = _pyarrow().parquet
+
+    existing = json.loads(schema.metadata[METADATA_KEY]) if schema.metadata else {}
+    schema = schema.with_metadata({METADATA_KEY: json.dumps({**existing, **metadata})})
+    pq.write_metadata(schema, os.path.join(dataset_dir, '_common_metadata'))
+
+def open_dataset(dataset_dir):
+    """pyarrow Dataset over the shards, with batch as a partition column."""
+    pa = _pyarrow()
+    # Files starting with '_' (such as _common_metadata) are not shards
+    return pa.dataset.dataset(dataset_dir, format='parquet', partitioning='hive')
+
+def dataset_metadata(dataset_dir):
+    """The metadata embedded in the dataset schema (feature names, label, ...)."""
+    pq = _pyarrow().parquet
+
+    common = os.path.join(dataset_dir, '_common_metadata')
+    schema = pq.read_schema(common) if os.path.exists(common) else open_dataset(dataset_dir).schema
+    return json.loads(schema.metadata[METADATA_KEY])
+
+def _scanner(dataset_dir, columns, batches, batch_size=None):
+    pa = _pyarrow()
+    dataset = open_dataset(dataset_dir)
+
+    # Filtering on the partition column skips the other shards' files entirely
+    row_filter = None
+    if batches is not None:
+        row_filter = pa.dataset.field('batch').isin(list(batches))
+
+    options = {'batch_size': batch_size} if batch_size else {}
+    return dataset.scanner(columns=columns, filter=row_filter, **options)
+
+def _to_arrays(table, features, dtype):
+    X = np.empty((table.num_rows, len(features)), dtype=dtype)
+    for i, name in enumerate(features):
+        X[:, i] = table.column(name).to_numpy()
+    return X, table.column(LABEL).to_numpy()
+
+def read_arrays(dataset_dir, features=None, batches=None, dtype=np.float64):
+    """Load (X, y) reading only the given feature columns and batches.
+
+    features defaults to every feature in the schema, in model order.
+    """
+    features = features or dataset_metadata(dataset_dir)['feature_names']
+    table = _scanner(dataset_dir, features + [LABEL], batches).to_table()
+    return _to_arrays(table, features, dtype)
+
+def iter_arrays(dataset_dir, features=None, batches=None, batch_size=65536, dtype=np.float32):
+    """Yield (X, y) blocks of up to batch_size rows, streaming shard by shard."""
+    pa = _pyarrow()
+
+    features = features or dataset_metadata(dataset_dir)['feature_names']
+    for batch in _scanner(dataset_dir, features + [LABEL], batches, batch_size).to_batches():
+        if batch.num_rows:
+            yield _to_arrays(pa.Table.from_batches([batch]), features, dtype)
+
+def iter_columns(dataset_dir, columns, batches=None, batch_size=65536):
+    """Yield {column: array} blocks of up to batch_size rows, for any columns."""
+    for batch in _scanner(dataset_dir, columns, batches, batch_size).to_batches():
+        if batch.num_rows:
+            yield {name: batch.column(name).to_numpy() for name in columns}
+
+def list_batches(dataset_dir):
+    """Numbers of the batch partitions in the dataset, in row order."""
+    dataset = open_dataset(dataset_dir)
+    return sorted({
+        int(part.split('=', 1)[1])
+        for path in dataset.files
+        for part in path.replace(os.sep, '/').split('/')
+        if part.startswith('batch=')
+    })
+
+def read_labels(dataset_dir, batches=None):
+    """Only the label column of the selected batches."""
+    return _scanner(dataset_dir, [LABEL], batches).to_table().column(LABEL).to_numpy()
+
+def read_profile_ids(dataset_dir, batches=None):
+    """The profile_id of every row of the selected batches, in read_arrays order."""
+    return _scanner(dataset_dir, ['profile_id'], batches).to_table().column('profile_id').to_numpy()
+
+def count_rows(dataset_dir, batches=None):
+    """Number of rows in the selected batches, from Parquet footers only."""
+    return _scanner(dataset_dir, [LABEL], batches).count_rows()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Run the EchoWealth generate -> train -> export pipeline with a content-addressed cache.
+Stages whose code, parameters and input files are unchanged are restored instead of re-run.
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def copy_flutter_assets():
+    """Export's copy into the Flutter assets, which a cache hit must repeat."""
+    from export_tflite import create_flutter_assets
+    create_flutter_assets()
+
+def generate_cacheable(args):
+    """Whether a generate run is reproducible; Parquet output is rejected outright."""
+    from generate_synthetic_data import parse_args
+
+    parsed = parse_args(args)
+    if parsed.format != 'npy':
+        raise SystemExit("The pipeline trains and exports from .npy files; run "
+                         "generate_synthetic_data.py --format parquet directly and pass "
+                         "the dataset to train_model.py --features")
+    return parsed.seed is not None
+
+def export_inputs(args):
+    """The golden record the export is checked against, if any."""
+    from export_tflite import parse_args
+
+    golden = parse_args(args).golden
+    return [golden] if golden else []
+
+# inputs are the files a stage reads (arg_inputs adds those named by its
+# arguments, optional_inputs those read only when present). outputs are
+# deleted before a stage runs and must exist after it; updates are files
+# it edits in place when present. Both are cached and restored, and
+# restored runs after a cache hit. Stages whose cacheable returns False
+# for their arguments always run and are never cached.
+STAGES = [
+    {
+        'name': 'generate',
+        'script': 'generate_synthetic_data.py',
+        'inputs': [],
+        'outputs': ['training_features.npy', 'training_labels.npy', 'training_groups.npy',
+                    'dataset_metadata.json'],
+        'cacheable': generate_cacheable,
+    },
+    {
+        'name': 'train',
+        'script': 'train_model.py',
+        'inputs': ['training_features.npy', 'training_labels.npy', 'training_groups.npy',
+                   'dataset_metadata.json'],
+        'outputs': ['echo_wealth_model.h5', 'model_metadata.json'],
+    },
+    {
+        'name': 'export',
+        'script': 'export_tflite.py',
+        'inputs': ['echo_wealth_model.h5', 'training_features.npy', 'training_labels.npy',
+                   'training_groups.npy'],
+        'arg_inputs': export_inputs,
+        'optional_inputs': ['model_metadata.json'],
+        'outputs': ['echo_wealth.tflite', 'echo_wealth_weights.npz', 'echo_wealth_float32.tflite',
+                    'feature_spec.json', 'deployment_checklist.json', 'tflite_analysis.json'],
+        # model_metadata.json gets the measured model size, so a cache hit restores it too
+        'updates': ['model_metadata.json'],
+        'restored': copy_flutter_assets,
+    },
+]
+
+def file_digest(path, hash_index):
+    """SHA-256 of a file, memoized by (size, mtime) so unchanged files are not re-read."""
+    stat = os.stat(path)
+    path = os.path.abspath(path)
+    stamp = [stat.st_size, stat.st_mtime_ns]
+
+    cached = hash_index.get(path)
+    if cached and cached['stamp'] == stamp:
+        return cached['sha256']
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+    hash_index[path] = {'stamp': stamp, 'sha256': digest.hexdigest()}
+    return digest.hexdigest()
+
+def local_modules(script):
+    """The script plus every scripts/ module it imports, transitively."""
+    found = set()
+    pending = [script]
+    while pending:
+        name = pending.pop()
+        if name in found:
+            continue
+        found.add(name)
+
+        with open(os.path.join(SCRIPTS_DIR, name)) as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                if os.path.exists(os.path.join(SCRIPTS_DIR, f'{module}.py')):
+                    pending.append(f'{module}.py')
+
+    return sorted(found)
+
+def stage_key(stage, args, hash_index):
+    """Cache key over the stage's code, its arguments and its input files."""
+    digest = hashlib.sha256()
+    digest.update(stage['name'].encode())
+    digest.update(json.dumps(args).encode())
+
+    for name in local_modules(stage['script']):
+        digest.update(name.encode())
+        digest.update(file_digest(os.path.join(SCRIPTS_DIR, name), hash_index).encode())
+
+    inputs = stage['inputs'] + (stage['arg_inputs'](args) if 'arg_inputs' in stage else [])
+    for name in inputs:
+        if not os.path.exists(name):
+            raise FileNotFoundError(f"Stage '{stage['name']}' needs {name}")
+        digest.update(name.encode())
+        digest.update(file_digest(name, hash_index).encode())
+
+    for name in stage.get('optional_inputs', []):
+        digest.update(name.encode())
+        digest.update(file_digest(name, hash_index).encode() if os.path.exists(name) else b'-')
+
+    return digest.hexdigest()
+
+def run_stage(stage, args, cache_dir, hash_index, force=False):
+    """Restore a stage's outputs from cache or run it and store them; returns True on a hit."""
+    cacheable = stage['cacheable'](args) if 'cacheable' in stage else True
+    key = stage_key(stage, args, hash_index)
+    entry = os.path.join(cache_dir, stage['name'], key)
+
+    if not cacheable:
+        print(f"⚠ {stage['name']}: not cached, its output is not reproducible "
+              f"(pass --seed in --{stage['name']}-args to cache it)")
+    elif not force and os.path.isdir(entry):
+        for name in stage['outputs'] + stage.get('updates', []):
+            if os.path.exists(os.path.join(entry, name)):
+                shutil.copy(os.path.join(entry, name), name)
+        if stage.get('restored'):
+            stage['restored']()
+        print(f"✓ {stage['name']}: cache hit ({key[:12]})")
+        return True
+
+    # A failed run must not leave the previous run's outputs to be cached under this key
+    for name in stage['outputs']:
+        if os.path.exists(name):
+            os.remove(name)
+
+    print(f"→ {stage['name']}: running {stage['script']} {' '.join(args)}")
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(SCRIPTS_DIR, stage['script'])] + args,
+        check=True
+    )
+
+    missing = [name for name in stage['outputs'] if not os.path.exists(name)]
+    if missing:
+        raise RuntimeError(f"Stage '{stage['name']}' did not produce {', '.join(missing)}")
+    if not cacheable:
+        print(f"✓ {stage['name']}: finished in {time.perf_counter() - start:.1f}s")
+        return False
+
+    # Populate a temporary directory and rename it so entries are never partial
+    staging = f"{entry}.tmp{os.getpid()}"
+    os.makedirs(staging, exist_ok=True)
+    for name in stage['outputs'] + stage.get('updates', []):
+        if os.path.exists(name):
+            shutil.copy2(name, staging)
+    with open(os.path.join(staging, 'stage.json'), 'w') as f:
+        json.dump({'stage': stage['name'], 'args': args, 'key': key}, f, indent=2)
+    shutil.rmtree(entry, ignore_errors=True)
+    os.replace(staging, entry)
+
+    print(f"✓ {stage['name']}: finished in {time.perf_counter() - start:.1f}s, cached as {key[:12]}")
+    return False
+
+def run_pipeline(stage_args, cache_dir='.pipeline_cache', stages=None, force=()):
+    """Run the selected stages in order; stage_args maps stage name to CLI arguments."""
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, 'file_hashes.json')
+    hash_index = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            hash_index = json.load(f)
+
+    hits = {}
+    try:
+        for stage in STAGES:
+            if stages and stage['name'] not in stages:
+                continue
+            hits[stage['name']] = run_stage(
+                stage, stage_args.get(stage['name'], []), cache_dir, hash_index,
+                force=stage['name'] in force
+            )
+    finally:
+        with open(index_path, 'w') as f:
+            json.dump(hash_index, f)
+
+    return hits
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    for stage in STAGES:
+        parser.add_argument(f"--{stage['name']}-args", default='',
+                            help=f"arguments passed to {stage['script']}")
+    parser.add_argument('--stages', nargs='+', choices=[s['name'] for s in STAGES],
+                        help='run only these stages (default: all)')
+    parser.add_argument('--force', nargs='+', default=[], choices=[s['name'] for s in STAGES],
+                        help='re-run these stages even on a cache hit')
+    parser.add_argument('--cache-dir', default='.pipeline_cache')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    stage_args = {
+        stage['name']: shlex.split(getattr(args, f"{stage['name']}_args"))
+        for stage in STAGES
+    }
+
+    print("EchoWealth Pipeline")
+    print("=" * 40)
+    hits = run_pipeline(stage_args, args.cache_dir, args.stages, args.force)
+
+    print(f"\n{sum(hits.values())}/{len(hits)} stages restored from cache")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Compact, array-backed storage for synthetic EchoWealth profiles.
+Daily signals mirror the Hive fields of DailyData in lib/models/daily_data.dart.
+"""
+
+import numpy as np
+
+# Daily signals in DailyData HiveField order (fields 1-6, field 0 is the date)
+DAILY_SIGNALS = [
+    'steps_mean', 'steps_std', 'idle_periods',
+    'charge_night_pct', 'charge_cycles', 'sms_loan_count',
+]
+
+# Storage dtypes: doubles become float32, Dart ints become small unsigned ints
+SIGNAL_DTYPES = {
+    'steps_mean': np.float32,
+    'steps_std': np.float32,
+    'idle_periods': np.uint8,
+    'charge_night_pct': np.float32,
+    'charge_cycles': np.uint16,
+    'sms_loan_count': np.uint16,
+}
+
+PROFILE_DTYPE = np.dtype([
+    ('profile_id', np.int32),
+    ('age', np.float32),
+    ('household_size', np.uint16),
+    ('goats', np.uint16),
+    ('chickens', np.uint16),
+    ('poverty_risk', np.float32),
+])
+
+# Long-form record layout: one row per profile per day
+DAILY_DTYPE = np.dtype(
+    [('profile_id', np.int32), ('day', np.uint16)] +
+    [(name, SIGNAL_DTYPES[name]) for name in DAILY_SIGNALS]
+)
+
+class ProfileStore:
+    """Struct-of-arrays container for profiles and their daily records.
+
+    Profile attributes live in one structured array (PROFILE_DTYPE). Each
+    daily signal is a contiguous (n_profiles, n_days) array, so profile_id
+    and day are implicit in the row and column index.
+    """
+
+    def __init__(self, profiles, daily):
+        self.profiles = np.asarray(profiles, dtype=PROFILE_DTYPE)
+        self.daily = {
+            name: np.asarray(daily[name], dtype=SIGNAL_DTYPES[name])
+            for name in DAILY_SIGNALS
+        }
+
+        for name, values in self.daily.items():
+            if values.ndim != 2 or values.shape[0] != len(self.profiles):
+                raise ValueError(
+                    f"Daily signal '{name}' has shape {values.shape}, "
+                    f"expected ({len(self.profiles)}, n_days)"
+                )
+
+    def __len__(self):
+        return len(self.profiles)
+
+    @property
+    def n_days(self):
+        return self.daily['steps_mean'].shape[1]
+
+    @property
+    def nbytes(self):
+        return self.profiles.nbytes + sum(v.nbytes for v in self.daily.values())
+
+    def signal_tensor(self, days=slice(None), dtype=np.float64):
+        """Stack the daily signals into a (profiles x days x signals) tensor."""
+        return np.stack(
+            [self.daily[name][:, days] for name in DAILY_SIGNALS], axis=-1
+        ).astype(dtype, copy=False)
+
+    def records(self):
+        """Flatten into one DAILY_DTYPE record per profile per day."""
+        n_profiles, n_days = len(self), self.n_days
+        records = np.empty(n_profiles * n_days, dtype=DAILY_DTYPE)
+        records['profile_id'] = np.repeat(self.profiles['profile_id'], n_days)
+        records['day'] = np.tile(np.arange(n_days), n_profiles)
+        for name in DAILY_SIGNALS:
+            records[name] = self.daily[name].ravel()
+        return records
+
+    def to_profiles(self):
+        """Expand into the legacy list of profile dicts with daily_data lists."""
+        profiles = []
+        for i, row in enumerate(self.profiles):
+            daily_data = [
+                {'day': day, **{name: self.daily[name][i, day].item() for name in DAILY_SIGNALS}}
+                for day in range(self.n_days)
+            ]
+            profiles.append({
+                'profile_id': int(row['profile_id']),
+                'age': float(row['age']),
+                'household_size': int(row['household_size']),
+                'goats': int(row['goats']),
+                'chickens': int(row['chickens']),
+                'poverty_risk': float(row['poverty_risk']),
+                'daily_data': daily_data
+            })
+        return profiles
+
+    @classmethod
+    def from_profiles(cls, profiles):
+        """Build a store from the legacy list of profile dicts."""
+        rows = np.empty(len(profiles), dtype=PROFILE_DTYPE)
+        for field in PROFILE_DTYPE.names:
+            rows[field] = [p[field] for p in profiles]
+
+        daily = {
+            name: [[d[name] for d in p['daily_data']] for p in profiles]
+            for name in DAILY_SIGNALS
+        }
+        return cls(rows, daily)
+
+    @classmethod
+    def concatenate(cls, stores):
+        """Join stores along the profile axis."""
+        profiles = np.concatenate([s.profiles for s in stores])
+        daily = {
+            name: np.concatenate([s.daily[name] for s in stores])
+            for name in DAILY_SIGNALS
+        }
+        return cls(profiles, daily)
+
+    def save(self, path, **extra):
+        """Write the store to an uncompressed .npz archive.
+
+        Extra keyword arrays are stored alongside and ignored by load().
+        """
+        np.savez(path, profiles=self.profiles, **self.daily, **extra)
+
+    @classmethod
+    def load(cls, path):
+        """Read a store written by save()."""
+        with np.load(path) as data:
+            return cls(data['profiles'], {name: data[name] for name in DAILY_SIGNALS})
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Score a whole feature dataset with the exported EchoWealth TFLite model.
+Streams rows from a memory-mapped .npy or a Parquet dataset and writes risk scores in chunks.
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmark_tflite import load_interpreter
+
+def score_batches(interpreter, X, scores, batch_size):
+    """Run X through an interpreter resized to batch_size, filling scores in place.
+
+    Each batch is copied straight into the interpreter's own input buffer
+    through the accessor returned by interpreter.tensor().
+    """
+    # Hold the accessors, never the arrays: invoke() refuses to run while
+    # numpy views of interpreter buffers are alive.
+    input_tensor = interpreter.tensor(interpreter.get_input_details()[0]['index'])
+    output_tensor = interpreter.tensor(interpreter.get_output_details()[0]['index'])
+
+    for start in range(0, len(X), batch_size):
+        stop = min(start + batch_size, len(X))
+        n = stop - start
+
+        # A short final batch reuses the full-size buffer; extra rows are ignored
+        input_tensor()[:n] = X[start:stop]
+        interpreter.invoke()
+        scores[start:stop] = output_tensor()[:n, 0]
+
+    return scores
+
+def predict(model_path, X, batch_size=256, num_threads=None):
+    """Score an in-memory feature array; returns float32 risk scores."""
+    interpreter = load_interpreter(model_path, num_threads, batch_size)
+    return score_batches(interpreter, X, np.empty(len(X), dtype=np.float32), batch_size)
+
+def score_dataset(model_path, features_path, output_path, batch_size=1024, num_threads=None,
+                  batches=None):
+    """Score every row of features_path into a float32 .npy at output_path.
+
+    The interpreter input is resized to batch_size once and scores are
+    written into a memory-mapped output, so memory use does not grow with
+    the dataset. features_path may be a Parquet dataset directory, which
+    is streamed block by block; batches then selects the shards to score.
+    """
+    interpreter = load_interpreter(model_path, num_threads, batch_size)
+
+    if os.path.isdir(features_path):
+        import parquet_dataset
+
+        scores = np.lib.format.open_memmap(
+            output_path, mode='w+', dtype=np.float32,
+            shape=(parquet_dataset.count_rows(features_path, batches),)
+        )
+        offset = 0
+        for X, _ in parquet_dataset.iter_arrays(features_path, batches=batches,
+                                                batch_size=batch_size * 64):
+            score_batches(interpreter, X, scores[offset:offset + len(X)], batch_size)
+            offset += len(X)
+    else:
+        X = np.load(features_path, mmap_mode='r')
+        scores = np.lib.format.open_memmap(
+            output_path, mode='w+', dtype=np.float32, shape=(len(X),)
+        )
+        score_batches(interpreter, X, scores, batch_size)
+
+    scores.flush()
+    return scores
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--model', default='../assets/models/echo_wealth.tflite')
+    parser.add_argument('--features', default='training_features.npy',
+                        help='feature .npy file or Parquet dataset directory')
+    parser.add_argument('--output', default='risk_scores.npy')
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--threads', type=int, default=None,
+                        help='interpreter threads (default: TFLite chooses)')
+    parser.add_argument('--batches', default=None, type=lambda s: [int(b) for b in s.split(',')],
+                        help='Parquet only: comma-separated shard numbers to score (default: all)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print(f"Scoring {args.features} with {args.model}...")
+    start = time.perf_counter()
+    scores = score_dataset(
+        args.model, args.features, args.output,
+        batch_size=args.batch_size, num_threads=args.threads, batches=args.batches
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ Scored {len(scores):,} rows in {elapsed:.1f}s "
+          f"({len(scores) / elapsed:,.0f} rows/sec)")
+    print(f"✓ Mean risk: {scores.mean():.3f}")
+    print(f"✓ Scores saved to {os.path.abspath(args.output)}")
+
+if __name__ == "__main__":
+    main()
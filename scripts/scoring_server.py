@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Long-running EchoWealth risk-scoring service over local HTTP or stdio.
+Concurrent requests are coalesced into micro-batches and scored on a pool of interpreters.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from feature_spec import NORMALIZATION, WINDOW_DAYS
+from features import N_FEATURES, extract_features
+from profile_store import DAILY_SIGNALS
+
+# DailyData field names as the app serializes them, by daily signal
+CAMEL_CASE = {
+    signal: signal.split('_')[0] + ''.join(part.title() for part in signal.split('_')[1:])
+    for signal in DAILY_SIGNALS
+}
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 503: 'Service Unavailable'}
+
+class Overloaded(Exception):
+    """The request queue is full; the client should back off and retry."""
+
+class TFLiteScorer:
+    """One interpreter with its input pre-allocated for max_batch rows.
+
+    An interpreter must not be invoked from two threads at once, so the
+    server gives every worker thread its own scorer.
+    """
+
+    def __init__(self, model_path, max_batch, num_threads=None):
+        from benchmark_tflite import load_interpreter
+
+        self.interpreter = load_interpreter(model_path, num_threads, max_batch)
+        self.max_batch = max_batch
+        input_shape = self.interpreter.get_input_details()[0]['shape']
+        self.sample_shape = tuple(int(n) for n in input_shape[1:])
+        self(np.zeros((max_batch,) + self.sample_shape, dtype=np.float32))  # warm-up
+
+    def __call__(self, X):
+        from score_tflite import score_batches
+
+        return score_batches(self.interpreter, X, np.empty(len(X), dtype=np.float32),
+                             self.max_batch)
+
+class NumpyScorer:
+    """NumpyModel over a weight dump, for hosts without a TFLite runtime."""
+
+    def __init__(self, weights_path, sample_shape):
+        from numpy_inference import NumpyModel
+
+        self.model = NumpyModel(weights_path)
+        self.sample_shape = tuple(int(n) for n in sample_shape)
+
+    def __call__(self, X):
+        return self.model.predict(X)[:, 0]
+
+def load_scorers(model_path, workers, max_batch, num_threads=None, sample_shape=None):
+    """One scorer per worker thread; .npz weight dumps use the NumPy backend."""
+    if model_path.endswith('.npz'):
+        return [NumpyScorer(model_path, sample_shape) for _ in range(workers)]
+    return [TFLiteScorer(model_path, max_batch, num_threads) for _ in range(workers)]
+
+def load_normalization(spec_path):
+    """The feature_spec normalization to apply to features computed from daily records.
+
+    Models with the statistics built in ('in_model') take raw features.
+    """
+    if not spec_path or not os.path.exists(spec_path):
+        return NORMALIZATION
+    with open(spec_path) as f:
+        normalization = json.load(f)['normalization']
+    return None if normalization.get('in_model') else normalization
+
+def week_from_records(records):
+    """(WINDOW_DAYS x signals) array from DailyData records, like FeatureSpec.compute.
+
+    Records are ordered by 'date' when every record has one, and the last
+    WINDOW_DAYS are used. Fields may be snake_case or the app's camelCase.
+    """
+    if len(records) < WINDOW_DAYS:
+        raise ValueError(f"Need at least {WINDOW_DAYS} days of records, got {len(records)}")
+    if not all(isinstance(record, dict) for record in records):
+        raise ValueError("Daily records must be JSON objects")
+    if all('date' in record for record in records):
+        records = sorted(records, key=lambda record: record['date'])
+
+    week = np.empty((WINDOW_DAYS, len(DAILY_SIGNALS)))
+    for day, record in enumerate(records[-WINDOW_DAYS:]):
+        for j, signal in enumerate(DAILY_SIGNALS):
+            value = record.get(signal, record.get(CAMEL_CASE[signal]))
+            if value is None:
+                raise ValueError(f"Day {day} is missing '{signal}'")
+            week[day, j] = value
+    return week
+
+def parse_request(payload, sample_shape, normalization):
+    """Model input rows from a request.
+
+    payload holds 'features' (one vector or a list of them), 'days' (one
+    history of DailyData records) or 'weeks' (a list of such histories).
+    """
+    if 'features' in payload:
+        X = np.asarray(payload['features'], dtype=np.float32)
+        if X.ndim == len(sample_shape):
+            X = X[np.newaxis]
+    elif 'days' in payload or 'weeks' in payload:
+        histories = payload['weeks'] if 'weeks' in payload else [payload['days']]
+        weeks = np.stack([week_from_records(records) for records in histories])
+        X = extract_features(weeks, normalize=normalization is not None,
+                             normalization=normalization or NORMALIZATION)
+        X = X.astype(np.float32)
+    else:
+        raise ValueError("Expected 'features', 'days' or 'weeks'")
+
+    if X.shape[1:] != sample_shape or not len(X):
+        raise ValueError(f"Expected rows of shape {list(sample_shape)}, got {list(X.shape[1:])}")
+    if not np.isfinite(X).all():
+        raise ValueError("Features must be finite")
+    return X
+
+class LatencyWindow:
+    """Percentiles over the most recent observations."""
+
+    def __init__(self, size=10_000):
+        self.values = deque(maxlen=size)
+
+    def add(self, value):
+        self.values.append(value)
+
+    def summary(self):
+        if not self.values:
+            return None
+        values = np.fromiter(self.values, dtype=np.float64)
+        p50, p90, p99 = np.percentile(values, [50, 90, 99])
+        return {'mean': float(values.mean()), 'p50': float(p50), 'p90': float(p90),
+                'p99': float(p99), 'max': float(values.max())}
+
+class Metrics:
+    """Counters and latency windows (milliseconds) of a MicroBatcher."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.rejected = 0
+        self.errors = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.batch_rows = LatencyWindow()
+        self.queue_ms = LatencyWindow()
+        self.inference_ms = LatencyWindow()
+        self.total_ms = LatencyWindow()
+
+    def snapshot(self):
+        uptime = time.perf_counter() - self.started
+        batch_rows = self.batch_rows.summary()
+        return {
+            'uptime_s': uptime,
+            'requests': self.requests,
+            'rows': self.rows,
+            'rows_per_sec': self.rows / uptime,
+            'batches': self.batches,
+            'mean_batch_rows': batch_rows['mean'] if batch_rows else 0.0,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'queue_ms': self.queue_ms.summary(),
+            'inference_ms': self.inference_ms.summary(),
+            'total_ms': self.total_ms.summary(),
+        }
+
+class _Pending:
+    __slots__ = ('X', 'future', 'enqueued')
+
+    def __init__(self, X, future, enqueued):
+        self.X, self.future, self.enqueued = X, future, enqueued
+
+class MicroBatcher:
+    """Coalesce concurrent score() calls into batches for a pool of scorers.
+
+    A batch closes when it holds max_batch rows or max_wait_ms after its
+    first request was queued, whichever comes first, and is dispatched to
+    the next idle scorer on its own worker thread. While every scorer is
+    busy, requests keep queueing and the next batch fills up instead, so
+    batches grow with load. At most max_queue requests wait at once;
+    beyond that score() raises Overloaded.
+    """
+
+    def __init__(self, scorers, max_batch=64, max_wait_ms=5.0, max_queue=10_000):
+        self.scorers = scorers
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.metrics = Metrics()
+        self._executor = ThreadPoolExecutor(max_workers=len(scorers),
+                                            thread_name_prefix='scorer')
+        self._queue = None
+        self._idle = None
+        self._tasks = set()
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._idle = asyncio.Queue()
+        for scorer in self.scorers:
+            self._idle.put_nowait(scorer)
+        self._tasks.add(asyncio.create_task(self._batch_loop()))
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown()
+
+    async def score(self, X):
+        """Risk scores for the rows of X, scored together with concurrent requests."""
+        if self._queue.qsize() >= self.max_queue:
+            self.metrics.rejected += 1
+            raise Overloaded(f"{self._queue.qsize()} requests already queued")
+
+        loop = asyncio.get_running_loop()
+        pending = _Pending(X, loop.create_future(), loop.time())
+        self._queue.put_nowait(pending)
+        self._update_depth()
+        return await pending.future
+
+    def _update_depth(self):
+        self.metrics.queue_depth = self._queue.qsize()
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.metrics.queue_depth)
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        rows = len(batch[0].X)
+        deadline = batch[0].enqueued + self.max_wait
+
+        while rows < self.max_batch:
+            if self._queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                pending = self._queue.get_nowait()
+            batch.append(pending)
+            rows += len(pending.X)
+
+        self._update_depth()
+        return batch
+
+    async def _batch_loop(self):
+        while True:
+            batch = await self._next_batch()
+            scorer = await self._idle.get()
+            task = asyncio.create_task(self._run(scorer, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, scorer, batch):
+        loop = asyncio.get_running_loop()
+        dispatched = loop.time()
+        X = batch[0].X if len(batch) == 1 else np.concatenate([p.X for p in batch])
+        try:
+            scores = await loop.run_in_executor(self._executor, scorer, X)
+        except Exception as e:
+            self.metrics.errors += len(batch)
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+        finally:
+            self._idle.put_nowait(scorer)
+
+        done = loop.time()
+        metrics = self.metrics
+        metrics.batches += 1
+        metrics.batch_rows.add(len(X))
+        metrics.inference_ms.add((done - dispatched) * 1000)
+
+        offset = 0
+        for pending in batch:
+            n = len(pending.X)
+            if not pending.future.done():
+                pending.future.set_result(scores[offset:offset + n])
+            offset += n
+            metrics.requests += 1
+            metrics.rows += n
+            metrics.queue_ms.add((dispatched - pending.enqueued) * 1000)
+            metrics.total_ms.add((done - pending.enqueued) * 1000)
+
+class ScoringService:
+    """Request handling shared by the HTTP and stdio front ends."""
+
+    def __init__(self, batcher, sample_shape, normalization):
+        self.batcher = batcher
+        self.sample_shape = tuple(int(n) for n in sample_shape)
+        self.normalization = normalization
+
+    async def handle(self, payload):
+        """(status, response) for one decoded JSON request."""
+        try:
+            X = parse_request(payload, self.sample_shape, self.normalization)
+        except (ValueError, TypeError, KeyError) as e:
+            return 400, {'error': str(e)}
+        try:
+            scores = await self.batcher.score(X)
+        except Overloaded as e:
+            return 503, {'error': str(e)}
+        return 200, {'scores': scores.tolist()}
+
+    async def route(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok'}
+        if method == 'GET' and path == '/metrics':
+            return 200, self.batcher.metrics.snapshot()
+        if method == 'POST' and path == '/score':
+            try:
+                payload = json.loads(body)
+            except ValueError as e:
+                return 400, {'error': f"Invalid JSON: {e}"}
+            if not isinstance(payload, dict):
+                return 400, {'error': "Expected a JSON object"}
+            return await self.handle(payload)
+        return 404, {'error': f"No route for {method} {path}"}
+
+    async def serve_http_connection(self, reader, writer):
+        """Minimal HTTP/1.1 with keep-alive: JSON bodies sized by Content-Length."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, response = await self.route(method, path, body)
+                data = json.dumps(response).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve_stdio(self):
+        """One JSON request per stdin line, one JSON response per stdout line.
+
+        Lines are handled concurrently, so responses come back in completion
+        order; an 'id' field is echoed to match them up. {"metrics": true}
+        returns the metrics snapshot.
+        """
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=2 ** 24)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        async def respond(line):
+            try:
+                payload = json.loads(line)
+            except ValueError as e:
+                status, response = 400, {'error': f"Invalid JSON: {e}"}
+            else:
+                if not isinstance(payload, dict):
+                    status, response = 400, {'error': "Expected a JSON object"}
+                elif payload.get('metrics'):
+                    status, response = 200, self.batcher.metrics.snapshot()
+                else:
+                    status, response = await self.handle(payload)
+                if isinstance(payload, dict) and 'id' in payload:
+                    response['id'] = payload['id']
+            response['status'] = status
+            sys.stdout.write(json.dumps(response) + '\n')
+            sys.stdout.flush()
+
+        tasks = set()
+        while line := await reader.readline():
+            if line.strip():
+                task = asyncio.create_task(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+
+async def serve(args):
+    spec_path = args.spec or os.path.join(os.path.dirname(args.model), 'feature_spec.json')
+    normalization = load_normalization(spec_path)
+
+    scorers = load_scorers(args.model, args.workers, args.max_batch, args.threads,
+                           sample_shape=(N_FEATURES,))
+    batcher = MicroBatcher(scorers, args.max_batch, args.max_wait_ms, args.max_queue)
+    service = ScoringService(batcher, scorers[0].sample_shape, normalization)
+    await batcher.start()
+
+    try:
+        if args.stdio:
+            await service.serve_stdio()
+            return
+
+        server = await asyncio.start_server(service.serve_http_connection, args.host, args.port)
+        print(f"✓ Scoring {args.model} on http://{args.host}:{args.port} "
+              f"({args.workers} worker(s), batches of up to {args.max_batch} rows, "
+              f"{args.max_wait_ms} ms max wait)", file=sys.stderr)
+        print("  POST /score, GET /metrics, GET /health", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--model', default='../assets/models/echo_wealth.tflite',
+                        help='.tflite model, or a .npz weight dump for the NumPy backend')
+    parser.add_argument('--spec', default=None,
+                        help='feature_spec.json for requests with daily records '
+                             '(default: next to the model)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--stdio', action='store_true',
+                        help='serve JSON lines on stdin/stdout instead of HTTP')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='interpreters, each on its own thread (default: 2)')
+    parser.add_argument('--threads', type=int, default=1,
+                        help='threads per interpreter (default: 1)')
+    parser.add_argument('--max-batch', type=int, default=64,
+                        help='rows per micro-batch and interpreter input size (default: 64)')
+    parser.add_argument('--max-wait-ms', type=float, default=5.0,
+                        help='longest a request waits for its batch to fill (default: 5)')
+    parser.add_argument('--max-queue', type=int, default=10_000,
+                        help='queued requests before new ones get 503 (default: 10000)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Simulate raw 50 Hz accelerometer and charge-event streams for synthetic profiles
+and reduce them to DailyData rows with the same rules as lib/services/sensor_service.dart.
+
+The output uses the device's scale, not the generator's: steps_mean and
+steps_std are the mean and spread of above-threshold accelerometer
+magnitudes (about 13-15 m/s^2), where generate_population() stores a daily
+step count (thousands) under the same names. The simulated ProfileStore is
+therefore not interchangeable with generate_population() output for
+training; the generated step counts that drove the simulation are saved
+alongside as generated_step_count.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from generate_synthetic_data import generate_population
+from instrumentation import Tracer, add_trace_arguments, tracer
+from profile_store import ProfileStore
+
+SAMPLE_RATE_HZ = 50
+SECONDS_PER_DAY = 86_400
+GRAVITY = 9.81
+
+# Rules of SensorService in lib/services/sensor_service.dart
+STEP_THRESHOLD = 12.0   # accelerometer magnitude counted as a step event
+IDLE_STEP_EVENTS = 100  # fewer step events in a day marks it idle
+NIGHT_FROM_HOUR = 18    # charge events with hour >= 18 || hour <= 6 are at night
+NIGHT_TO_HOUR = 6
+
+# Walking model: bouts during waking hours, one magnitude peak per step
+CADENCE_HZ = 1.8
+BOUT_SECONDS = 300
+WAKING_HOURS = (6, 21)
+
+def walking_mask(steps, rng, bout_seconds=BOUT_SECONDS):
+    """(users x seconds of day) mask of the seconds each user spends walking.
+
+    A day's step count becomes steps / CADENCE_HZ walking seconds, split
+    into bouts of up to bout_seconds placed in distinct random slots of the
+    waking hours, so bouts never overlap.
+    """
+    n_slots = (WAKING_HOURS[1] - WAKING_HOURS[0]) * 3600 // bout_seconds
+    walk_seconds = np.minimum(np.asarray(steps, dtype=np.float64) / CADENCE_HZ,
+                              n_slots * bout_seconds)
+    n_users = len(walk_seconds)
+    max_bouts = max(1, int(np.ceil(walk_seconds.max(initial=0) / bout_seconds)))
+
+    # Bout k of a user lasts whatever is left of the walking time, up to bout_seconds
+    done = np.arange(max_bouts) * bout_seconds
+    lengths = np.clip(walk_seconds[:, None] - done, 0, bout_seconds).astype(np.int64)
+    slots = rng.permuted(np.broadcast_to(np.arange(n_slots), (n_users, n_slots)), axis=1)
+    starts = WAKING_HOURS[0] * 3600 + slots[:, :max_bouts] * bout_seconds
+
+    # +1/-1 at bout edges, then a running sum marks the covered seconds
+    edges = np.zeros((n_users, SECONDS_PER_DAY + 1), dtype=np.int8)
+    users = np.broadcast_to(np.arange(n_users)[:, None], lengths.shape)
+    valid = lengths > 0
+    np.add.at(edges, (users[valid], starts[valid]), 1)
+    np.add.at(edges, (users[valid], starts[valid] + lengths[valid]), -1)
+    return np.cumsum(edges[:, :-1], axis=1, dtype=np.int8) > 0
+
+def accelerometer_blocks(walking, rng, block_seconds=600, noise=0.4, noise_table=2**20):
+    """Yield (first second, users x samples float32 magnitudes) for one day.
+
+    Standing still reads gravity plus Gaussian sensor noise; walking adds
+    a per-user amplitude times |sin| at the step cadence. Drawing normals
+    dominated the cost, so each user's block is a random window into a
+    table of noise_table pre-drawn samples, and the gait is only computed
+    for walking seconds. Only one block is in memory at a time.
+    """
+    n_users = len(walking)
+    amplitude = np.clip(rng.normal(5.0, 1.0, n_users), 2.0, None)
+    phase = rng.random(n_users) * np.pi
+
+    block_samples = block_seconds * SAMPLE_RATE_HZ
+    table = rng.standard_normal(noise_table + block_samples, dtype=np.float32)
+    table *= np.float32(noise)
+    table += np.float32(GRAVITY)
+    windows = np.lib.stride_tricks.sliding_window_view(table, block_samples)
+    within_second = np.arange(SAMPLE_RATE_HZ) / SAMPLE_RATE_HZ
+
+    for start in range(0, SECONDS_PER_DAY, block_seconds):
+        stop = min(start + block_seconds, SECONDS_PER_DAY)
+        offsets = rng.integers(0, noise_table, n_users)
+        magnitude = windows[offsets, :(stop - start) * SAMPLE_RATE_HZ]
+
+        users, seconds = np.nonzero(walking[:, start:stop])
+        t = (start + seconds)[:, None] + within_second
+        gait = amplitude[users, None] * np.abs(np.sin(np.pi * CADENCE_HZ * t + phase[users, None]))
+        magnitude.reshape(n_users, -1, SAMPLE_RATE_HZ)[users, seconds] += gait.astype(np.float32)
+        yield start, magnitude
+
+class StepAggregator:
+    """Running daily step statistics from accelerometer magnitudes.
+
+    Keeps count, sum and sum of squares of the magnitudes above the
+    threshold per user, which is what SensorService stores as _dailySteps.
+    Sums are taken of the excess over the threshold, which keeps the
+    float32 block sums accurate when the variance is recovered.
+    """
+
+    def __init__(self, n_users, threshold=STEP_THRESHOLD):
+        self.threshold = threshold
+        self.count = np.zeros(n_users, dtype=np.int64)
+        self.total = np.zeros(n_users)
+        self.total_sq = np.zeros(n_users)
+
+    def update(self, magnitude):
+        """Fold in a (users x samples) block; the block is overwritten."""
+        excess = np.subtract(magnitude, np.float32(self.threshold), out=magnitude)
+        np.maximum(excess, 0, out=excess)
+        self.count += np.count_nonzero(excess, axis=1)
+        self.total += excess.sum(axis=1)
+        self.total_sq += np.einsum('ij,ij->i', excess, excess)
+
+    def result(self, idle_events=IDLE_STEP_EVENTS):
+        """steps_mean, steps_std (population) and idle_periods as getDailyData() computes them."""
+        count = np.maximum(self.count, 1)
+        excess_mean = self.total / count
+        variance = np.maximum(self.total_sq / count - np.square(excess_mean), 0)
+        return {
+            'steps_mean': np.where(self.count > 0, self.threshold + excess_mean, 0),
+            'steps_std': np.where(self.count > 0, np.sqrt(variance), 0),
+            'idle_periods': (self.count < idle_events).astype(np.uint8),
+        }
+
+def charge_events(charge_cycles, charge_night_pct, rng):
+    """Second of day of every transition to charging, as (user index, second) arrays.
+
+    Each user plugs in charge_cycles times; each event falls in the night
+    window with probability charge_night_pct.
+    """
+    users = np.repeat(np.arange(len(charge_cycles)), charge_cycles)
+    at_night = rng.random(len(users)) < np.repeat(charge_night_pct, charge_cycles)
+
+    night_hours = np.r_[0:NIGHT_TO_HOUR + 1, NIGHT_FROM_HOUR:24]
+    day_hours = np.r_[NIGHT_TO_HOUR + 1:NIGHT_FROM_HOUR]
+    hours = np.where(at_night, rng.choice(night_hours, len(users)), rng.choice(day_hours, len(users)))
+    return users, hours * 3600 + rng.integers(0, 3600, len(users))
+
+def aggregate_charge_events(users, seconds, n_users):
+    """chargeCycles and chargeNightPct per user from charge event times."""
+    hour = seconds // 3600
+    night = (hour >= NIGHT_FROM_HOUR) | (hour <= NIGHT_TO_HOUR)
+    cycles = np.bincount(users, minlength=n_users)
+    night_count = np.bincount(users, weights=night, minlength=n_users)
+    return {
+        'charge_cycles': cycles,
+        'charge_night_pct': np.where(cycles > 0, night_count / np.maximum(cycles, 1), 0),
+    }
+
+def simulate_sensor_days(store, rng, block_seconds=600, span=None):
+    """Replace a store's daily signals with aggregates of simulated raw streams.
+
+    Every day of every profile is simulated at SAMPLE_RATE_HZ from its
+    generated step count, charge cycles and night-charge share, then
+    reduced like SensorService.getDailyData(). SMS loan counts are kept.
+    In the returned ProfileStore steps_mean and steps_std hold step
+    magnitudes, no longer step counts; the input store is not modified.
+    Returns the new ProfileStore and the number of samples processed.
+    """
+    span = span or tracer
+    n_users, n_days = len(store), store.n_days
+    daily = {name: np.empty_like(values) for name, values in store.daily.items()}
+    daily['sms_loan_count'] = store.daily['sms_loan_count']
+    step_counts = store.daily['steps_mean']
+    n_samples = 0
+
+    for day in range(n_days):
+        with span.stage('accelerometer', day=day):
+            steps = StepAggregator(n_users)
+            walking = walking_mask(step_counts[:, day], rng)
+            for _, magnitude in accelerometer_blocks(walking, rng, block_seconds):
+                steps.update(magnitude)
+                n_samples += magnitude.size
+
+        with span.stage('charging', day=day):
+            events = charge_events(store.daily['charge_cycles'][:, day],
+                                   store.daily['charge_night_pct'][:, day], rng)
+            aggregates = {**steps.result(), **aggregate_charge_events(*events, n_users)}
+
+        for name, values in aggregates.items():
+            daily[name][:, day] = values
+
+    return ProfileStore(store.profiles, daily), n_samples
+
+def _simulate_chunk(start, stop, seed_seq, n_days, block_seconds):
+    """Generate and simulate one chunk of profiles in a worker."""
+    chunk_tracer = Tracer()
+    rng = np.random.default_rng(seed_seq)
+    with chunk_tracer.stage('chunk', start=start, stop=stop):
+        store = generate_population(stop - start, n_days=n_days, rng=rng, first_profile_id=start)
+        generated = store
+        store, n_samples = simulate_sensor_days(generated, rng, block_seconds, chunk_tracer)
+    return store, generated.daily['steps_mean'], n_samples, chunk_tracer.spans
+
+def simulate_population(n_profiles, n_days=1, chunk_size=256, block_seconds=600,
+                        seed=None, workers=1):
+    """Simulate n_profiles in chunks of chunk_size users.
+
+    Returns (store, samples, step_counts): the simulated DailyData store,
+    the number of samples processed and the generated (profiles x days)
+    step counts the walking time was drawn from.
+
+    Memory per worker is about chunk_size x block_seconds x 50 float32
+    samples plus a chunk_size x 86400 walking mask.
+    """
+    seed_seq = np.random.SeedSequence(seed)
+    starts = range(0, n_profiles, chunk_size)
+    chunks = [
+        (start, min(start + chunk_size, n_profiles), child, n_days, block_seconds)
+        for start, child in zip(starts, seed_seq.spawn(len(starts)))
+    ]
+
+    stores, step_counts, n_samples = [], [], 0
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    map_chunks = pool.map if pool else map
+    try:
+        for store, steps, samples, spans in map_chunks(_simulate_chunk, *zip(*chunks)):
+            tracer.extend(spans)
+            stores.append(store)
+            step_counts.append(steps)
+            n_samples += samples
+            print(f"  Profiles {store.profiles['profile_id'][0]:,}-"
+                  f"{store.profiles['profile_id'][-1] + 1:,} of {n_profiles:,} simulated")
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return ProfileStore.concatenate(stores), n_samples, np.concatenate(step_counts)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--n-profiles', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=1,
+                        help='days of 50 Hz data simulated per profile (default: 1)')
+    parser.add_argument('--chunk-size', type=int, default=256,
+                        help='users simulated together; bounds memory (default: 256)')
+    parser.add_argument('--block-seconds', type=int, default=600,
+                        help='seconds of samples generated per step (default: 600)')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='simulator processes; 0 uses every CPU core (default: 1)')
+    parser.add_argument('--output', default='sensor_daily.npz',
+                        help='ProfileStore archive of the aggregated DailyData rows, '
+                             'on the device scale (steps_mean is a magnitude)')
+    add_trace_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    tracer.configure(args.trace, args.cprofile)
+    workers = args.workers or os.cpu_count()
+
+    print(f"Simulating {args.days} day(s) of {SAMPLE_RATE_HZ} Hz sensor data "
+          f"for {args.n_profiles:,} profiles...")
+    try:
+        start = time.perf_counter()
+        with tracer.stage('simulate', n_profiles=args.n_profiles, workers=workers):
+            store, n_samples, step_counts = simulate_population(
+                args.n_profiles, args.days, args.chunk_size, args.block_seconds,
+                seed=args.seed, workers=workers
+            )
+        elapsed = time.perf_counter() - start
+
+        store.save(args.output, generated_step_count=step_counts)
+        daily = store.daily
+        print(f"\n✓ {n_samples:,} accelerometer samples in {elapsed:.1f}s "
+              f"({n_samples / elapsed / 1e6:,.1f}M samples/sec)")
+        print(f"  Step magnitude mean: {daily['steps_mean'].mean():.2f} "
+              f"(threshold {STEP_THRESHOLD}; generated steps/day {step_counts.mean():,.0f})")
+        print(f"  Idle days: {daily['idle_periods'].mean():.1%}")
+        print(f"  Night charging share: {daily['charge_night_pct'].mean():.1%}")
+        print(f"✓ DailyData rows saved to {args.output} "
+              f"(device scale, not for training with generated data)")
+    finally:
+        tracer.write('sensor_simulator')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Hyperparameter sweep for the EchoWealth model with parallel successive halving.
+Finds the smallest create_model configuration that still meets the AUC target.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+SEARCH_SPACE = {
+    'lstm_units': [8, 16, 24],
+    'num_heads': [1, 2],
+    'key_dim': [8, 16],
+    'dense_units': [[16, 8], [32, 16]],
+}
+
+_split = None  # Per-worker cache of the train/test split
+
+def grid(space):
+    """Every combination of the search space as a list of create_model kwargs."""
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+def _init_worker(intra_op_threads):
+    """Limit each worker's TensorFlow thread pools before its runtime starts."""
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+def _load_split():
+    """The same held-out split train_model uses, loaded once per worker."""
+    global _split
+    if _split is None:
+        from train_model import load_groups, split_by_profile
+        X = np.load('training_features.npy')
+        y = np.load('training_labels.npy')
+        _split = split_by_profile(X, y, load_groups('training_features.npy'))
+    return _split
+
+def train_trial(trial, epochs, batch_size=32):
+    """Train a trial up to `epochs` total epochs, resuming from its checkpoint."""
+    # Heavy imports stay in the workers so the coordinating process stays small
+    from sklearn.metrics import roc_auc_score
+    from tensorflow import keras
+    from train_model import create_model, load_normalization
+
+    X_train, X_test, y_train, y_test = _load_split()
+
+    if os.path.exists(trial['checkpoint']):
+        model = keras.models.load_model(trial['checkpoint'])
+    else:
+        model = create_model(X_train.shape[1:], normalization=load_normalization(),
+                             **trial['params'])
+        model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=0.001),
+            loss='binary_crossentropy',
+            metrics=['mae', 'mse']
+        )
+
+    history = model.fit(
+        X_train, y_train,
+        validation_data=(X_test, y_test),
+        initial_epoch=trial['epochs_trained'],
+        epochs=epochs,
+        batch_size=batch_size,
+        callbacks=[keras.callbacks.EarlyStopping(
+            monitor='val_loss', patience=5, restore_best_weights=True
+        )],
+        verbose=0
+    )
+    model.save(trial['checkpoint'])
+
+    y_pred = model.predict(X_test, verbose=0).ravel()
+    return {
+        **trial,
+        'epochs_trained': trial['epochs_trained'] + len(history.history['loss']),
+        'auc': float(roc_auc_score(y_test > 0.5, y_pred)),
+        'mae': float(np.mean(np.abs(y_test - y_pred))),
+        'val_loss': float(min(history.history['val_loss'])),
+        'n_params': int(model.count_params()),
+    }
+
+def measure_trial(trial, iterations=500):
+    """Convert a finished trial to TFLite and record its size and latency."""
+    from tensorflow import keras
+    from benchmark_tflite import load_interpreter, make_inputs, measure_latency, summarize
+    from export_tflite import make_converter
+
+    model = keras.models.load_model(trial['checkpoint'])
+    tflite_model = make_converter(model, 'dynamic_range').convert()
+
+    path = trial['checkpoint'].replace('.h5', '.tflite')
+    with open(path, 'wb') as f:
+        f.write(tflite_model)
+
+    interpreter = load_interpreter(path, num_threads=1)
+    inputs = make_inputs(interpreter.get_input_details()[0], batch_size=1)
+    stats = summarize(measure_latency(interpreter, inputs, iterations=iterations), batch_size=1)
+
+    return {
+        **trial,
+        'tflite_size_kb': len(tflite_model) / 1024,
+        'tflite_p50_ms': stats['p50_ms'],
+        'tflite_p99_ms': stats['p99_ms'],
+    }
+
+def save_results(trials, output_dir='sweep', target_auc=0.75):
+    """Write the trials and the selected one to sweep_results.json; returns its path."""
+    best = select_smallest(trials, target_auc)
+    path = os.path.join(output_dir, 'sweep_results.json')
+    with open(path, 'w') as f:
+        json.dump({
+            'target_auc': target_auc,
+            'selected': best['id'] if best else None,
+            'trials': sorted(trials, key=lambda t: t['n_params']),
+        }, f, indent=2)
+    return path
+
+def run_sweep(space=SEARCH_SPACE, workers=None, intra_op_threads=2, min_epochs=5,
+              max_epochs=45, eta=3, batch_size=32, output_dir='sweep', target_auc=0.75):
+    """Successive halving over the grid, training each rung's trials in parallel.
+
+    Every rung trains the surviving trials up to the rung's epoch budget,
+    keeps the best 1/eta by validation AUC and multiplies the budget by eta.
+    The trained trials are saved, then converted and timed as TFLite; a
+    trial that fails to convert keeps its training results and records
+    tflite_error instead.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or max(1, os.cpu_count() // intra_op_threads)
+
+    survivors = [
+        {
+            'id': i,
+            'params': params,
+            'checkpoint': os.path.join(output_dir, f'trial_{i:03d}.h5'),
+            'epochs_trained': 0,
+        }
+        for i, params in enumerate(grid(space))
+    ]
+    finished = []
+
+    # Spawned workers get a clean TensorFlow runtime each
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(intra_op_threads,),
+    ) as pool:
+        rung, budget = 0, min_epochs
+        while survivors:
+            print(f"Rung {rung}: training {len(survivors)} trials to {budget} epochs...")
+            survivors = list(pool.map(
+                train_trial, survivors, itertools.repeat(budget), itertools.repeat(batch_size)
+            ))
+            survivors.sort(key=lambda t: t['auc'], reverse=True)
+
+            last_rung = budget >= max_epochs or len(survivors) == 1
+            keep = 0 if last_rung else max(1, len(survivors) // eta)
+            print(f"  best AUC {survivors[0]['auc']:.4f}, {keep} trials promoted")
+
+            for trial in survivors[keep:]:
+                trial['rung'] = rung
+            finished += survivors[keep:]
+            survivors = survivors[:keep]
+            rung, budget = rung + 1, min(budget * eta, max_epochs)
+
+        save_results(finished, output_dir, target_auc)
+        print(f"Measuring TFLite latency for {len(finished)} trials...")
+        futures = [pool.submit(measure_trial, trial) for trial in finished]
+        measured = []
+        for trial, future in zip(finished, futures):
+            try:
+                measured.append(future.result())
+            except Exception as e:
+                print(f"⚠ Trial {trial['id']}: TFLite conversion failed: {e}")
+                measured.append({**trial, 'tflite_error': str(e)})
+
+    return sorted(measured, key=lambda t: t['n_params'])
+
+def select_smallest(trials, target_auc=0.75):
+    """Smallest deployable trial by parameter count meeting the AUC target, or None."""
+    passing = [t for t in trials if t['auc'] > target_auc and 'tflite_error' not in t]
+    return min(passing, key=lambda t: t['n_params']) if passing else None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--workers', type=int, default=None,
+                        help='concurrent trials (default: CPU cores / intra-op threads)')
+    parser.add_argument('--intra-op-threads', type=int, default=2)
+    parser.add_argument('--min-epochs', type=int, default=5)
+    parser.add_argument('--max-epochs', type=int, default=45)
+    parser.add_argument('--eta', type=int, default=3,
+                        help='keep 1/eta of the trials at each rung (default: 3)')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--target-auc', type=float, default=0.75)
+    parser.add_argument('--output-dir', default='sweep')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("EchoWealth Hyperparameter Sweep")
+    print("=" * 40)
+
+    trials = run_sweep(
+        workers=args.workers,
+        intra_op_threads=args.intra_op_threads,
+        min_epochs=args.min_epochs,
+        max_epochs=args.max_epochs,
+        eta=args.eta,
+        batch_size=args.batch_size,
+        output_dir=args.output_dir,
+        target_auc=args.target_auc
+    )
+    best = select_smallest(trials, args.target_auc)
+
+    print(f"\n{'params':>8} {'AUC':>7} {'MAE':>7} {'p50 ms':>8}  config")
+    for t in trials:
+        p50 = f"{t['tflite_p50_ms']:.3f}" if 'tflite_p50_ms' in t else 'failed'
+        print(f"{t['n_params']:>8,} {t['auc']:>7.4f} {t['mae']:>7.4f} "
+              f"{p50:>8}  {t['params']}")
+
+    results_path = save_results(trials, args.output_dir, args.target_auc)
+
+    if best:
+        print(f"\n✓ Smallest model meeting AUC >{args.target_auc}: trial {best['id']} "
+              f"({best['n_params']:,} params) {best['params']}")
+    else:
+        print(f"\n⚠ No configuration reached AUC >{args.target_auc}")
+    print(f"✓ Results saved to {results_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Static size and compute analysis of an exported EchoWealth .tflite model.
+Reads the flatbuffer directly, so it needs neither TensorFlow nor a TFLite runtime.
+"""
+
+import argparse
+import json
+import struct
+from collections import Counter
+
+import numpy as np
+
+# TensorType enum of the TFLite schema: (name, bytes per element)
+TENSOR_TYPES = [
+    ('float32', 4), ('float16', 2), ('int32', 4), ('uint8', 1), ('int64', 8),
+    ('string', 0), ('bool', 1), ('int16', 2), ('complex64', 8), ('int8', 1),
+    ('float64', 8), ('complex128', 16), ('uint64', 8), ('resource', 0),
+    ('variant', 0), ('uint32', 4), ('uint16', 2), ('int4', 0.5), ('bfloat16', 2),
+    ('int2', 0.25), ('uint4', 0.5),
+]
+FLOAT_TYPES = {'float32', 'float16', 'bfloat16', 'float64'}
+QUANTIZED_TYPES = {'int8', 'uint8', 'int16', 'int4', 'int2', 'uint4'}
+
+# BuiltinOperator enum of the TFLite schema, by code
+BUILTIN_OPS = (
+    'ADD AVERAGE_POOL_2D CONCATENATION CONV_2D DEPTHWISE_CONV_2D DEPTH_TO_SPACE DEQUANTIZE '
+    'EMBEDDING_LOOKUP FLOOR FULLY_CONNECTED HASHTABLE_LOOKUP L2_NORMALIZATION L2_POOL_2D '
+    'LOCAL_RESPONSE_NORMALIZATION LOGISTIC LSH_PROJECTION LSTM MAX_POOL_2D MUL RELU '
+    'RELU_N1_TO_1 RELU6 RESHAPE RESIZE_BILINEAR RNN SOFTMAX SPACE_TO_DEPTH SVDF TANH '
+    'CONCAT_EMBEDDINGS SKIP_GRAM CALL CUSTOM EMBEDDING_LOOKUP_SPARSE PAD '
+    'UNIDIRECTIONAL_SEQUENCE_RNN GATHER BATCH_TO_SPACE_ND SPACE_TO_BATCH_ND TRANSPOSE MEAN '
+    'SUB DIV SQUEEZE UNIDIRECTIONAL_SEQUENCE_LSTM STRIDED_SLICE BIDIRECTIONAL_SEQUENCE_RNN '
+    'EXP TOPK_V2 SPLIT LOG_SOFTMAX DELEGATE BIDIRECTIONAL_SEQUENCE_LSTM CAST PRELU MAXIMUM '
+    'ARG_MAX MINIMUM LESS NEG PADV2 GREATER GREATER_EQUAL LESS_EQUAL SELECT SLICE SIN '
+    'TRANSPOSE_CONV SPARSE_TO_DENSE TILE EXPAND_DIMS EQUAL NOT_EQUAL LOG SUM SQRT RSQRT SHAPE '
+    'POW ARG_MIN FAKE_QUANT REDUCE_PROD REDUCE_MAX PACK LOGICAL_OR ONE_HOT LOGICAL_AND '
+    'LOGICAL_NOT UNPACK REDUCE_MIN FLOOR_DIV REDUCE_ANY SQUARE ZEROS_LIKE FILL FLOOR_MOD '
+    'RANGE RESIZE_NEAREST_NEIGHBOR LEAKY_RELU SQUARED_DIFFERENCE MIRROR_PAD ABS SPLIT_V '
+    'UNIQUE CEIL REVERSE_V2 ADD_N GATHER_ND COS WHERE RANK ELU REVERSE_SEQUENCE MATRIX_DIAG '
+    'QUANTIZE MATRIX_SET_DIAG ROUND HARD_SWISH IF WHILE NON_MAX_SUPPRESSION_V4 '
+    'NON_MAX_SUPPRESSION_V5 SCATTER_ND SELECT_V2 DENSIFY SEGMENT_SUM BATCH_MATMUL '
+    'PLACEHOLDER_FOR_GREATER_OP_CODES CUMSUM CALL_ONCE BROADCAST_TO RFFT2D CONV_3D IMAG REAL '
+    'COMPLEX_ABS HASHTABLE HASHTABLE_FIND HASHTABLE_IMPORT HASHTABLE_SIZE REDUCE_ALL '
+    'CONV_3D_TRANSPOSE VAR_HANDLE READ_VARIABLE ASSIGN_VARIABLE BROADCAST_ARGS '
+    'RANDOM_STANDARD_NORMAL BUCKETIZE RANDOM_UNIFORM MULTINOMIAL GELU DYNAMIC_UPDATE_SLICE '
+    'RELU_0_TO_1 UNSORTED_SEGMENT_PROD UNSORTED_SEGMENT_MAX UNSORTED_SEGMENT_SUM ATAN2 '
+    'UNSORTED_SEGMENT_MIN SIGN BITCAST BITWISE_XOR RIGHT_SHIFT STABLEHLO_LOGISTIC '
+    'STABLEHLO_ADD STABLEHLO_DIVIDE STABLEHLO_MULTIPLY STABLEHLO_MAXIMUM STABLEHLO_RESHAPE '
+    'STABLEHLO_CLAMP STABLEHLO_CONCATENATE STABLEHLO_BROADCAST_IN_DIM STABLEHLO_CONVOLUTION '
+    'STABLEHLO_SLICE STABLEHLO_CUSTOM_CALL STABLEHLO_REDUCE STABLEHLO_ABS STABLEHLO_AND '
+    'STABLEHLO_COSINE STABLEHLO_EXPONENTIAL STABLEHLO_FLOOR STABLEHLO_LOG STABLEHLO_MINIMUM '
+    'STABLEHLO_NEGATE STABLEHLO_OR STABLEHLO_POWER STABLEHLO_REMAINDER STABLEHLO_RSQRT '
+    'STABLEHLO_SELECT STABLEHLO_SUBTRACT STABLEHLO_TANH STABLEHLO_SCATTER STABLEHLO_COMPARE '
+    'STABLEHLO_CONVERT STABLEHLO_DYNAMIC_SLICE STABLEHLO_DYNAMIC_UPDATE_SLICE STABLEHLO_PAD '
+    'STABLEHLO_IOTA STABLEHLO_DOT_GENERAL STABLEHLO_REDUCE_WINDOW STABLEHLO_SORT '
+    'STABLEHLO_WHILE STABLEHLO_GATHER STABLEHLO_TRANSPOSE DILATE STABLEHLO_RNG_BIT_GENERATOR '
+    'REDUCE_WINDOW STABLEHLO_COMPOSITE STABLEHLO_SHIFT_LEFT STABLEHLO_CBRT STABLEHLO_CASE'
+).split()
+
+# Ops that convert at the float/integer boundary of a quantized graph
+BOUNDARY_OPS = {'QUANTIZE', 'DEQUANTIZE'}
+
+# Quantized builtins the Android NNAPI / Arm NN delegates accelerate
+NPU_OPS = {
+    'ADD', 'SUB', 'MUL', 'DIV', 'FULLY_CONNECTED', 'CONV_2D', 'DEPTHWISE_CONV_2D',
+    'AVERAGE_POOL_2D', 'MAX_POOL_2D', 'CONCATENATION', 'RESHAPE', 'SQUEEZE', 'EXPAND_DIMS',
+    'TRANSPOSE', 'PAD', 'STRIDED_SLICE', 'SLICE', 'MEAN', 'SUM', 'SOFTMAX', 'LOGISTIC',
+    'TANH', 'RELU', 'RELU6', 'BATCH_MATMUL', 'QUANTIZE', 'DEQUANTIZE', 'MAXIMUM', 'MINIMUM',
+    'UNIDIRECTIONAL_SEQUENCE_LSTM', 'GATHER', 'SPLIT', 'PACK', 'UNPACK',
+}
+
+class _Table:
+    """Read-only view of one flatbuffer table."""
+
+    def __init__(self, buf, pos):
+        self.buf = buf
+        self.pos = pos
+        vtable = pos - struct.unpack_from('<i', buf, pos)[0]
+        vtable_size = struct.unpack_from('<H', buf, vtable)[0]
+        self.offsets = struct.unpack_from(f'<{(vtable_size - 4) // 2}H', buf, vtable + 4)
+
+    def _field(self, slot):
+        offset = self.offsets[slot] if slot < len(self.offsets) else 0
+        return self.pos + offset if offset else None
+
+    def scalar(self, slot, fmt, default=0):
+        pos = self._field(slot)
+        return default if pos is None else struct.unpack_from('<' + fmt, self.buf, pos)[0]
+
+    def _target(self, slot):
+        pos = self._field(slot)
+        return None if pos is None else pos + struct.unpack_from('<I', self.buf, pos)[0]
+
+    def table(self, slot):
+        pos = self._target(slot)
+        return None if pos is None else _Table(self.buf, pos)
+
+    def vector_length(self, slot):
+        pos = self._target(slot)
+        return 0 if pos is None else struct.unpack_from('<I', self.buf, pos)[0]
+
+    def vector(self, slot, fmt):
+        pos = self._target(slot)
+        if pos is None:
+            return []
+        n = struct.unpack_from('<I', self.buf, pos)[0]
+        return list(struct.unpack_from(f'<{n}{fmt}', self.buf, pos + 4))
+
+    def tables(self, slot):
+        pos = self._target(slot)
+        if pos is None:
+            return []
+        n = struct.unpack_from('<I', self.buf, pos)[0]
+        elements = pos + 4
+        return [
+            _Table(self.buf, elements + 4 * i + struct.unpack_from('<I', self.buf, elements + 4 * i)[0])
+            for i in range(n)
+        ]
+
+    def string(self, slot):
+        pos = self._target(slot)
+        if pos is None:
+            return None
+        n = struct.unpack_from('<I', self.buf, pos)[0]
+        return self.buf[pos + 4:pos + 4 + n].decode('utf-8', 'replace')
+
+def read_model(path):
+    """Parse the parts of a .tflite flatbuffer used by analyze().
+
+    Returns the primary subgraph's tensors (name, dtype, shape, whether
+    backed by a constant buffer, its byte size) and operators (op name,
+    input and output tensor indices, builtin options table).
+    """
+    with open(path, 'rb') as f:
+        buf = f.read()
+    if len(buf) < 8 or buf[4:8] != b'TFL3':
+        raise ValueError(f"{path} is not a TensorFlow Lite flatbuffer")
+
+    model = _Table(buf, struct.unpack_from('<I', buf, 0)[0])
+    # Model: 1 operator_codes, 2 subgraphs, 4 buffers
+    op_names = []
+    for code in model.tables(1):
+        # OperatorCode: 0 deprecated_builtin_code, 1 custom_code, 3 builtin_code
+        builtin = max(code.scalar(0, 'b'), code.scalar(3, 'i'))
+        name = BUILTIN_OPS[builtin] if builtin < len(BUILTIN_OPS) else f'BUILTIN_{builtin}'
+        op_names.append(f"CUSTOM:{code.string(1)}" if name == 'CUSTOM' else name)
+    # Buffer: 0 data, 2 size (for data stored outside the flatbuffer)
+    buffer_bytes = [max(b.vector_length(0), b.scalar(2, 'Q')) for b in model.tables(4)]
+
+    subgraph = model.tables(2)[0]
+    tensors = []
+    # SubGraph: 0 tensors, 1 inputs, 2 outputs, 3 operators
+    for t in subgraph.tables(0):
+        # Tensor: 0 shape, 1 type, 2 buffer, 3 name, 7 shape_signature
+        dtype, itemsize = TENSOR_TYPES[t.scalar(1, 'b')]
+        shape = t.vector(0, 'i')
+        buffer = t.scalar(2, 'I')
+        constant = buffer_bytes[buffer] > 0 if buffer < len(buffer_bytes) else False
+        tensors.append({
+            'name': t.string(3),
+            'dtype': dtype,
+            'shape': shape,
+            'shape_signature': t.vector(7, 'i') or shape,
+            'constant': constant,
+            'bytes': int(np.prod(shape, dtype=np.int64) * itemsize),
+        })
+
+    operators = []
+    for op in subgraph.tables(3):
+        # Operator: 0 opcode_index, 1 inputs, 2 outputs, 4 builtin_options
+        operators.append({
+            'op': op_names[op.scalar(0, 'I')],
+            'inputs': op.vector(1, 'i'),  # -1 marks an omitted optional input
+            'outputs': op.vector(2, 'i'),
+            'options': op.table(4),
+        })
+
+    return {
+        'file_bytes': len(buf),
+        'n_subgraphs': model.vector_length(2),
+        'inputs': subgraph.vector(1, 'i'),
+        'outputs': subgraph.vector(2, 'i'),
+        'tensors': tensors,
+        'operators': operators,
+    }
+
+def _size(shape):
+    return int(np.prod(shape, dtype=np.int64))
+
+def op_macs(op, tensors):
+    """Multiply-accumulates of one operator at the flatbuffer's batch size.
+
+    Counted for the matrix ops that dominate compute; element-wise ops and
+    activations are treated as free.
+    """
+    shape = lambda i: tensors[op['inputs'][i]]['shape']
+    out = tensors[op['outputs'][0]]['shape']
+    kind = op['op']
+
+    if kind == 'FULLY_CONNECTED':
+        units, depth = shape(1)
+        return _size(shape(0)) // depth * units * depth
+    if kind == 'CONV_2D':
+        _, kh, kw, depth = shape(1)
+        return _size(out) * kh * kw * depth
+    if kind == 'DEPTHWISE_CONV_2D':
+        _, kh, kw, _ = shape(1)
+        return _size(out) * kh * kw
+    if kind == 'BATCH_MATMUL':
+        # BatchMatMulOptions: 0 adj_x
+        adj_x = op['options'].scalar(0, '?', False) if op['options'] else False
+        a = shape(0)
+        return _size(out) * (a[-2] if adj_x else a[-1])
+    if kind == 'UNIDIRECTIONAL_SEQUENCE_LSTM':
+        # Inputs 1-4 are the input-to-gate and 5-8 the recurrent weights
+        units, depth = shape(1)
+        steps = _size(shape(0)) // depth
+        return steps * 4 * units * (depth + units)
+    return 0
+
+def peak_activation_bytes(model):
+    """Largest total size of the non-constant tensors alive at any operator.
+
+    A tensor lives from the operator producing it (or the start, for graph
+    inputs) until its last consumer (or the end, for graph outputs), which
+    is the bound the interpreter's arena planner works against.
+    """
+    tensors, operators = model['tensors'], model['operators']
+    n_ops = len(operators)
+    first = {i: 0 for i in model['inputs']}
+    last = {i: n_ops for i in model['outputs']}
+    for step, op in enumerate(operators):
+        for i in op['outputs']:
+            first.setdefault(i, step)
+        for i in op['inputs'] + op['outputs']:
+            if i >= 0:
+                last[i] = max(last.get(i, step), step)
+
+    live = np.zeros(n_ops + 1, dtype=np.int64)
+    for i, start in first.items():
+        if not tensors[i]['constant']:
+            live[start:last.get(i, start) + 1] += tensors[i]['bytes']
+    return int(live.max()) if len(live) else 0
+
+def analyze(path):
+    """Op, tensor, compute and memory summary of a .tflite model."""
+    model = read_model(path)
+    tensors, operators = model['tensors'], model['operators']
+
+    float_ops, hybrid_ops = Counter(), Counter()
+    for op in operators:
+        if op['op'] in BOUNDARY_OPS:
+            continue
+        used = [tensors[i] for i in op['inputs'] + op['outputs'] if i >= 0]
+        activations = {t['dtype'] for t in used if not t['constant']}
+        weights = {t['dtype'] for t in used if t['constant']}
+        if activations & FLOAT_TYPES:
+            # Quantized weights with float activations are dynamic-range (hybrid) kernels
+            if weights & QUANTIZED_TYPES:
+                hybrid_ops[op['op']] += 1
+            else:
+                float_ops[op['op']] += 1
+
+    constant_dtypes = Counter()
+    activation_dtypes = Counter()
+    for t in tensors:
+        (constant_dtypes if t['constant'] else activation_dtypes)[t['dtype']] += t['bytes']
+
+    if not float_ops and not hybrid_ops:
+        quantization = 'int8'
+    elif hybrid_ops or set(constant_dtypes) & QUANTIZED_TYPES:
+        quantization = 'dynamic_range'
+    elif 'float16' in constant_dtypes:
+        quantization = 'float16'
+    else:
+        quantization = 'float32'
+
+    op_counts = Counter(op['op'] for op in operators)
+    macs = [op_macs(op, tensors) for op in operators]
+    return {
+        'model': path,
+        'size_bytes': model['file_bytes'],
+        'size_mb': model['file_bytes'] / (1024 * 1024),
+        'subgraphs': model['n_subgraphs'],
+        'quantization': quantization,
+        'input_shapes': [tensors[i]['shape_signature'] for i in model['inputs']],
+        'input_dtypes': [tensors[i]['dtype'] for i in model['inputs']],
+        'operators': len(operators),
+        'op_counts': dict(op_counts.most_common()),
+        'macs': int(sum(macs)),
+        'macs_by_op': {
+            name: int(sum(m for op, m in zip(operators, macs) if op['op'] == name))
+            for name in op_counts if any(op['op'] == name and m for op, m in zip(operators, macs))
+        },
+        'float_ops': dict(float_ops),
+        'hybrid_ops': dict(hybrid_ops),
+        'non_npu_ops': sorted(set(op_counts) - NPU_OPS),
+        'weight_bytes': int(sum(constant_dtypes.values())),
+        'weight_bytes_by_dtype': dict(constant_dtypes),
+        'activation_bytes_by_dtype': dict(activation_dtypes),
+        'peak_activation_bytes': peak_activation_bytes(model),
+        'tensors': [
+            {key: t[key] for key in ('name', 'dtype', 'shape', 'constant', 'bytes')}
+            for t in tensors
+        ],
+    }
+
+def deployment_checklist(analysis, max_size_mb=1.5, max_macs=5_000_000,
+                         max_activation_kb=256, n_features=None):
+    """Derive the deployment checklist from an analyze() report.
+
+    Each entry is a measured pass/fail against a budget for low-end
+    phones; 'measurements' records the numbers they were judged on.
+    """
+    fully_integer = not analysis['float_ops'] and not analysis['hybrid_ops']
+    checklist = {
+        'model_ready': analysis['operators'] > 0,
+        'size_optimized': analysis['size_mb'] <= max_size_mb,
+        'quantization_applied': analysis['quantization'] != 'float32',
+        'fully_integer': fully_integer,
+        'compute_within_budget': analysis['macs'] <= max_macs,
+        'activation_memory_within_budget': analysis['peak_activation_bytes'] <= max_activation_kb * 1024,
+        'arm_npu_compatible': fully_integer and not analysis['non_npu_ops'],
+        'flutter_integration_ready': (
+            n_features is None or analysis['input_shapes'][:1] == [[-1, n_features]]
+            or analysis['input_shapes'][:1] == [[1, n_features]]
+        ),
+    }
+    checklist['measurements'] = {
+        'size_mb': analysis['size_mb'],
+        'quantization': analysis['quantization'],
+        'macs': analysis['macs'],
+        'peak_activation_kb': analysis['peak_activation_bytes'] / 1024,
+        'float_ops': analysis['float_ops'],
+        'hybrid_ops': analysis['hybrid_ops'],
+        'non_npu_ops': analysis['non_npu_ops'],
+        'input_shapes': analysis['input_shapes'],
+    }
+    checklist['budgets'] = {
+        'max_size_mb': max_size_mb,
+        'max_macs': max_macs,
+        'max_activation_kb': max_activation_kb,
+    }
+    return checklist
+
+def print_report(analysis):
+    print(f"Model: {analysis['model']} ({analysis['size_mb'] * 1024:.1f} KB, "
+          f"{analysis['quantization']})")
+    print(f"Operators: {analysis['operators']}")
+    for name, count in analysis['op_counts'].items():
+        macs = analysis['macs_by_op'].get(name)
+        print(f"  {name:<32} {count:>4}" + (f"  {macs:>12,} MACs" if macs else ""))
+    print(f"MACs per inference: {analysis['macs']:,}")
+    print(f"Weights: {analysis['weight_bytes'] / 1024:.1f} KB "
+          f"{dict((k, v) for k, v in analysis['weight_bytes_by_dtype'].items())}")
+    print(f"Peak activation memory: {analysis['peak_activation_bytes'] / 1024:.1f} KB")
+    if analysis['float_ops']:
+        print(f"⚠ Float ops: {analysis['float_ops']}")
+    if analysis['hybrid_ops']:
+        print(f"⚠ Hybrid (float activation) ops: {analysis['hybrid_ops']}")
+    if analysis['non_npu_ops']:
+        print(f"⚠ Ops without NPU support: {', '.join(analysis['non_npu_ops'])}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('model', nargs='?', default='echo_wealth.tflite')
+    parser.add_argument('--output', default=None, help='save the full analysis as JSON')
+    parser.add_argument('--checklist', default=None,
+                        help='also write the derived deployment checklist here')
+    parser.add_argument('--max-size-mb', type=float, default=1.5)
+    parser.add_argument('--max-macs', type=int, default=5_000_000)
+    parser.add_argument('--max-activation-kb', type=float, default=256)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    analysis = analyze(args.model)
+    print_report(analysis)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(analysis, f, indent=2)
+        print(f"✓ Analysis saved to {args.output}")
+    if args.checklist:
+        from features import N_FEATURES
+
+        checklist = deployment_checklist(analysis, args.max_size_mb, args.max_macs,
+                                         args.max_activation_kb, N_FEATURES)
+        with open(args.checklist, 'w') as f:
+            json.dump(checklist, f, indent=2)
+        print(f"✓ Deployment checklist saved to {args.checklist}")
+
+if __name__ == "__main__":
+    main()
@@ -4,30 +4,152 @@ Train EchoWealth poverty prediction model.
 Optimized for Arm NPU deployment with TensorFlow Lite.
 """
 
+import argparse
+import glob
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+
 import numpy as np
-import tensorflow as tf
-from tensorflow import keras
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import roc_auc_score, classification_report
 import json
 
-def create_model(input_shape):
-    """Create optimized LSTM + Transformer model for Arm NPU."""
+from evaluate_scores import Evaluator
+from feature_spec import select_features
+from instrumentation import add_trace_arguments, tracer
+
+# TensorFlow and scikit-learn are imported inside the functions that use
+# them so that --help and argument errors return immediately.
+
+# Adam's learning rate at the baseline batch size; larger batches scale it
+BASE_LEARNING_RATE = 0.001
+BASE_BATCH_SIZE = 32
+
+# Training profiles selected with --profile; explicit flags override their settings.
+# XLA and bfloat16 stay opt-in: on CPU, XLA compiles the LSTM loop into a far slower
+# train step, and at this model size bfloat16 matmuls do not shorten the epoch.
+TRAINING_PROFILES = {
+    'baseline': {'batch_size': 32, 'lr_scaling': 'none', 'jit_compile': False,
+                 'mixed_precision': False},
+    'performance': {'batch_size': 1024, 'lr_scaling': 'sqrt', 'jit_compile': False,
+                    'mixed_precision': False},
+}
+
+def bfloat16_supported():
+    """Whether the CPU has native bfloat16 arithmetic (AVX512-BF16/AMX or Armv8.6 BF16).
+    
+    Elsewhere TensorFlow emulates bfloat16 and mixed precision only slows training down.
+    """
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = set(f.read().split())
+    except OSError:
+        return False
+    return bool(flags & {'avx512_bf16', 'amx_bf16', 'bf16'})
+
+def configure_training(intra_op_threads=None, inter_op_threads=None, mixed_precision=False):
+    """Set TensorFlow's thread pools and the Keras dtype policy for this process.
+    
+    Must run before TensorFlow executes any op. None keeps TensorFlow's
+    default of one thread per core. Mixed precision is only enabled where
+    bfloat16_supported(). Returns the dtype policy name in use.
+    """
+    import tensorflow as tf
+    from tensorflow import keras
+    
+    if intra_op_threads is not None:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    if inter_op_threads is not None:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    
+    policy = 'float32'
+    if mixed_precision:
+        if bfloat16_supported():
+            policy = 'mixed_bfloat16'
+        else:
+            print("⚠ No native bfloat16 on this CPU; training in float32")
+    keras.mixed_precision.set_global_policy(policy)
+    return policy
+
+def scaled_learning_rate(batch_size, rule='none'):
+    """Adam learning rate for batch_size, scaled from BASE_LEARNING_RATE at BASE_BATCH_SIZE.
+    
+    'sqrt' keeps the gradient noise scale roughly constant and suits Adam;
+    'linear' is the usual rule for SGD.
+    """
+    ratio = batch_size / BASE_BATCH_SIZE
+    factor = {'none': 1.0, 'sqrt': np.sqrt(ratio), 'linear': ratio}[rule]
+    return BASE_LEARNING_RATE * float(factor)
+
+def compile_model(model, learning_rate=BASE_LEARNING_RATE, jit_compile=False):
+    """Compile for training; jit_compile compiles the train step with XLA."""
+    from tensorflow import keras
+    
+    # Compile with appropriate loss for regression
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+        loss='binary_crossentropy',  # Treat as binary classification
+        metrics=['mae', 'mse'],
+        jit_compile=jit_compile
+    )
+    return model
+
+def load_normalization(metadata_path='dataset_metadata.json', columns=None):
+    """Fitted feature statistics of a dataset, or None if its rows are pre-normalized.
+    
+    columns selects the statistics of a subset of the features, by name.
+    """
+    if not os.path.exists(metadata_path):
+        return None
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    normalization = metadata.get('normalization')
+    if not (normalization and normalization['method'] == 'standard'):
+        return None
+    if columns:
+        index = [metadata['feature_names'].index(name) for name in columns]
+        normalization = {
+            **normalization,
+            'mean': [normalization['mean'][i] for i in index],
+            'std': [normalization['std'][i] for i in index],
+        }
+    return normalization
+
+def create_model(input_shape, lstm_units=24, num_heads=2, key_dim=16, dense_units=(32, 16),
+                 normalization=None):
+    """Create optimized LSTM + Transformer model for Arm NPU.
+    
+    normalization is a fitted 'standard' dataset normalization (see
+    load_normalization); it becomes the first layer, so the exported
+    TFLite graph takes raw features.
+    """
+    import tensorflow as tf
+    from tensorflow import keras
     
     # Input layer
     inputs = keras.Input(shape=input_shape, name='features')
+    x = inputs
     
-    # Reshape for LSTM (add time dimension)
-    x = tf.expand_dims(inputs, axis=1)
+    if normalization:
+        x = keras.layers.Normalization(
+            mean=normalization['mean'],
+            variance=np.square(normalization['std']),
+            name='normalization'
+        )(x)
+    
+    # Reshape for LSTM (add time dimension) unless the input is already a daily sequence
+    x = tf.expand_dims(x, axis=1) if len(input_shape) == 1 else x
     
     # LSTM layer (optimized for mobile)
-    x = keras.layers.LSTM(24, return_sequences=True, name='lstm')(x)
+    x = keras.layers.LSTM(lstm_units, return_sequences=True, name='lstm')(x)
     x = keras.layers.Dropout(0.2)(x)
     
     # Transformer encoder (lightweight)
     attention = keras.layers.MultiHeadAttention(
-        num_heads=2, 
-        key_dim=16,
+        num_heads=num_heads, 
+        key_dim=key_dim,
         name='attention'
     )(x, x)
     x = keras.layers.Add()([x, attention])
@@ -35,48 +157,279 @@ def create_model(input_shape):
     
     # Global pooling and dense layers
     x = keras.layers.GlobalAveragePooling1D()(x)
-    x = keras.layers.Dense(32, activation='relu', name='dense1')(x)
+    x = keras.layers.Dense(dense_units[0], activation='relu', name='dense1')(x)
     x = keras.layers.Dropout(0.3)(x)
-    x = keras.layers.Dense(16, activation='relu', name='dense2')(x)
+    x = keras.layers.Dense(dense_units[1], activation='relu', name='dense2')(x)
     
-    # Output layer (sigmoid for probability)
-    outputs = keras.layers.Dense(1, activation='sigmoid', name='risk_score')(x)
+    # Output layer (sigmoid for probability), kept in float32 under mixed precision
+    outputs = keras.layers.Dense(1, activation='sigmoid', dtype='float32', name='risk_score')(x)
     
     model = keras.Model(inputs=inputs, outputs=outputs, name='echo_wealth_model')
     
     return model
 
-def train_model():
-    """Train the poverty prediction model."""
+def throughput_callback(batch_size):
+    """Keras callback reporting epoch time, steps/sec and samples/sec after every epoch.
+
+    Each epoch is also recorded as an 'epoch' span nested under the fit stage.
+    """
+    from tensorflow import keras
     
-    print("Loading training data...")
-    X = np.load('training_features.npy')
-    y = np.load('training_labels.npy')
+    # Defined here so importing this module does not load TensorFlow
+    class ThroughputCallback(keras.callbacks.Callback):
+        def __init__(self):
+            super().__init__()
+            self.steps_per_sec = []
+            self.epoch_seconds = []
+        
+        def on_epoch_begin(self, epoch, logs=None):
+            self._steps = 0
+            self._span = tracer.stage('epoch', epoch=epoch)
+            self._span.__enter__()
+            self._start = time.perf_counter()
+        
+        def on_train_batch_end(self, batch, logs=None):
+            self._steps += 1
+        
+        def on_epoch_end(self, epoch, logs=None):
+            seconds = time.perf_counter() - self._start
+            rate = self._steps / seconds
+            self._span.__exit__(None, None, None)
+            self.steps_per_sec.append(rate)
+            self.epoch_seconds.append(seconds)
+            print(f" - {rate:.1f} steps/sec, {rate * batch_size:,.0f} samples/sec")
     
-    print(f"Dataset shape: {X.shape}, Labels shape: {y.shape}")
+    return ThroughputCallback()
+
+def npy_shards(features_pattern, labels_pattern):
+    """Pair feature and label .npy shards matched by sorted glob patterns."""
+    features = sorted(glob.glob(features_pattern))
+    labels = sorted(glob.glob(labels_pattern))
     
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=(y > 0.5).astype(int)
-    )
+    if not features:
+        raise FileNotFoundError(f"No feature shards match {features_pattern}")
+    if len(features) != len(labels):
+        raise ValueError(
+            f"Found {len(features)} feature shards but {len(labels)} label shards"
+        )
+    return list(zip(features, labels))
+
+def shard_groups(shards, groups_pattern):
+    """profile_id .npy file of every shard, matched like npy_shards, or None if absent."""
+    paths = sorted(glob.glob(groups_pattern)) if groups_pattern else []
+    if not paths:
+        return None
+    if len(paths) != len(shards):
+        raise ValueError(f"Found {len(shards)} feature shards but {len(paths)} group shards")
+    return paths
+
+def split_shards(shards, groups=None, validation_split=0.2, random_state=42):
+    """Train and validation row indices of every shard, split by profile.
     
-    print(f"Training set: {X_train.shape[0]} samples")
-    print(f"Test set: {X_test.shape[0]} samples")
+    The shards are split as one table with split_by_profile, so a single
+    shard is split exactly as train_model splits it in memory, and no
+    profile has rows in both subsets. groups lists one profile_id file per
+    shard (see shard_groups). Returns {'train': [...], 'validation': [...]},
+    each a list of sorted row indices per shard.
+    """
+    y = np.concatenate([np.load(path, mmap_mode='r') for _, path in shards])
+    row_groups = None if groups is None else np.concatenate([np.load(path) for path in groups])
+    if row_groups is not None and len(row_groups) != len(y):
+        raise ValueError(f"Group shards hold {len(row_groups)} rows, label shards {len(y)}")
+    train, validation, _, _ = split_by_profile(np.arange(len(y)), y, row_groups,
+                                               validation_split, random_state)
+    
+    bounds = np.cumsum([0] + [len(np.load(path, mmap_mode='r')) for _, path in shards])
+    split = {}
+    for subset, rows in (('train', np.sort(train)), ('validation', np.sort(validation))):
+        cuts = np.searchsorted(rows, bounds)
+        split[subset] = [rows[a:b] - start for a, b, start in zip(cuts[:-1], cuts[1:], bounds)]
+    return split
+
+def subset_labels(shards, split, subset):
+    """Labels of one subset across all shards, in make_dataset order."""
+    return np.concatenate([
+        np.load(path, mmap_mode='r')[rows] for (_, path), rows in zip(shards, split[subset])
+    ])
+
+def make_dataset(shards, split, subset='train', batch_size=32,
+                 shuffle_buffer=10_000, cache=None, block_size=4096, seed=None):
+    """Build a tf.data pipeline over memory-mapped .npy shards.
     
-    # Create model
-    model = create_model(input_shape=(X.shape[1],))
+    split holds the rows of each subset per shard (see split_shards). They
+    are read in blocks and interleaved in parallel, optionally cached
+    (cache='' for memory, or a file prefix), shuffled with a bounded buffer
+    for the training subset, batched and prefetched. Validation rows are
+    read in shard order, so their labels are those of subset_labels.
+    """
+    import tensorflow as tf
     
-    # Compile with appropriate loss for regression
-    model.compile(
-        optimizer=keras.optimizers.Adam(learning_rate=0.001),
-        loss='binary_crossentropy',  # Treat as binary classification
-        metrics=['mae', 'mse']
+    features = [np.load(path, mmap_mode='r') for path, _ in shards]
+    labels = [np.load(path, mmap_mode='r') for _, path in shards]
+    n_rows = sum(len(rows) for rows in split[subset])
+    
+    def read_blocks(shard):
+        X, y, rows = features[shard], labels[shard], split[subset][shard]
+        for i in range(0, len(rows), block_size):
+            block = rows[i:i + block_size]
+            yield X[block].astype(np.float32), y[block].astype(np.float32)
+    
+    signature = (
+        tf.TensorSpec(shape=(None,) + features[0].shape[1:], dtype=tf.float32),
+        tf.TensorSpec(shape=(None,), dtype=tf.float32),
+    )
+    training = subset == 'train'
+    
+    # Validation rows are read shard after shard so they line up with subset_labels
+    ds = tf.data.Dataset.range(len(shards)).interleave(
+        lambda shard: tf.data.Dataset.from_generator(
+            read_blocks, output_signature=signature, args=(shard,)
+        ),
+        cycle_length=len(shards) if training else 1,
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=not training,
     )
+    ds = ds.unbatch().apply(tf.data.experimental.assert_cardinality(n_rows))
+    if cache is not None:
+        ds = ds.cache(cache)
+    if training:
+        ds = ds.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+def sample_rows(shards, split, subset, n_samples, rng):
+    """Uniform sample of up to n_samples rows of one subset across shards.
+    
+    Rows are gathered in sorted order per shard so memory-mapped shards
+    are read sequentially; only the sampled rows are loaded.
+    """
+    sizes = np.array([len(rows) for rows in split[subset]])
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    picks = np.sort(rng.choice(offsets[-1], min(n_samples, offsets[-1]), replace=False))
+    
+    X_parts, y_parts = [], []
+    for (features_path, labels_path), subset_rows, lo, hi in zip(
+            shards, split[subset], offsets[:-1], offsets[1:]):
+        rows = subset_rows[picks[(picks >= lo) & (picks < hi)] - lo]
+        if len(rows):
+            X_parts.append(np.load(features_path, mmap_mode='r')[rows])
+            y_parts.append(np.load(labels_path, mmap_mode='r')[rows])
+    return np.concatenate(X_parts), np.concatenate(y_parts)
+
+def load_arrays(features, labels, columns=None, batches=None):
+    """Load (X, y) into memory from .npy files or a Parquet dataset directory."""
+    if os.path.isdir(features):
+        from parquet_dataset import read_arrays
+        return read_arrays(features, columns, batches)
+    return np.load(features), np.load(labels)
+
+def _windowed(metadata_path):
+    """Whether the dataset holds several sliding windows per profile."""
+    if not os.path.exists(metadata_path):
+        return False
+    with open(metadata_path) as f:
+        return json.load(f).get('stride') is not None
+
+def load_groups(features, groups='training_groups.npy', batches=None):
+    """profile_id of every row, in load_arrays order, or None if it was not recorded."""
+    if os.path.isdir(features):
+        from parquet_dataset import read_profile_ids
+        return read_profile_ids(features, batches)
+    return np.load(groups) if groups and os.path.exists(groups) else None
+
+def split_by_profile(X, y, groups=None, test_size=0.2, random_state=42):
+    """Train/test split that keeps every window of a profile on the same side.
+    
+    Overlapping windows of one profile share its label, so splitting them
+    row by row would leak training data into the test set. With one row per
+    profile (or no groups) rows are split stratified on the risk label.
+    Returns X_train, X_test, y_train, y_test.
+    """
+    from sklearn.model_selection import GroupShuffleSplit, train_test_split
+    
+    if groups is None or len(np.unique(groups)) == len(groups):
+        return train_test_split(
+            X, y, test_size=test_size, random_state=random_state,
+            stratify=(y > 0.5).astype(int)
+        )
+    splitter = GroupShuffleSplit(n_splits=1, test_size=test_size, random_state=random_state)
+    train, test = next(splitter.split(X, y, groups))
+    return X[train], X[test], y[train], y[test]
+
+def train_model(features='training_features.npy', labels='training_labels.npy',
+                groups='training_groups.npy', use_tf_data=False, batch_size=32, shuffle_buffer=10_000, cache=None,
+                metadata_path='dataset_metadata.json', columns=None, batches=None,
+                learning_rate=BASE_LEARNING_RATE, jit_compile=False, epochs=100,
+                profile=None):
+    """Train the poverty prediction model.
+    
+    With use_tf_data, features and labels may be glob patterns over sharded
+    .npy files, which are streamed through make_dataset instead of being
+    loaded into memory. features may also be a Parquet dataset directory
+    (labels is then unused), read with only the given feature columns and
+    batch shards. Fitted feature statistics in metadata_path are built
+    into the model. Rows are split by profile using groups (see
+    split_by_profile; with use_tf_data a glob of one file per shard, see
+    split_shards); a Parquet dataset carries its own profile_id.
+    
+    The process-wide settings of configure_training() apply; a model
+    trained under mixed precision is copied into float32 layers before it
+    is evaluated and saved, so the export sees a plain float32 model.
+    profile is recorded in the metadata.
+    """
+    from tensorflow import keras
+    from sklearn.metrics import roc_auc_score, classification_report
+    
+    with tracer.stage('load_data'):
+        print("Loading training data...")
+        if use_tf_data:
+            shards = npy_shards(features, labels)
+            group_shards = shard_groups(shards, groups)
+            if group_shards is None and _windowed(metadata_path):
+                print(f"⚠ {groups} not found: overlapping windows of a profile can land "
+                      "in both splits; regenerate the dataset to record them")
+            split = split_shards(shards, group_shards)
+            train_ds = make_dataset(shards, split, 'train', batch_size=batch_size,
+                                    shuffle_buffer=shuffle_buffer, cache=cache)
+            test_ds = make_dataset(shards, split, 'validation', batch_size=batch_size)
+        
+            # Validation labels are a small subset; keep them for metrics
+            y_test = subset_labels(shards, split, 'validation')
+            sample_shape = np.load(shards[0][0], mmap_mode='r').shape[1:]
+            n_train = sum(len(rows) for rows in split['train'])
+            n_test = len(y_test)
+        
+            print(f"Streaming {len(shards)} shard(s), sample shape: {sample_shape}")
+        else:
+            X, y = load_arrays(features, labels, columns, batches)
+            sample_shape = X.shape[1:]
+        
+            print(f"Dataset shape: {X.shape}, Labels shape: {y.shape}")
+        
+            # Split data, keeping the windows of each profile together
+            row_groups = load_groups(features, groups, batches)
+            if row_groups is None and _windowed(metadata_path):
+                print(f"⚠ {groups} not found: overlapping windows of a profile can land "
+                      "in both splits; regenerate the dataset to record them")
+            X_train, X_test, y_train, y_test = split_by_profile(X, y, row_groups)
+            n_train, n_test = len(X_train), len(X_test)
+    
+        print(f"Training set: {n_train} samples")
+        print(f"Test set: {n_test} samples")
     
-    print("\nModel architecture:")
-    model.summary()
+    with tracer.stage('build_model'):
+        # Create model
+        normalization = load_normalization(metadata_path, columns)
+        model = create_model(input_shape=sample_shape, normalization=normalization)
+        compile_model(model, learning_rate, jit_compile)
+        policy = keras.mixed_precision.global_policy().name
+        print(f"\nBatch size {batch_size}, learning rate {learning_rate:.4g}, "
+              f"dtype policy {policy}, XLA {'on' if jit_compile else 'off'}")
+    
+        print("\nModel architecture:")
+        model.summary()
     
     # Callbacks for training
+    throughput = throughput_callback(batch_size)
     callbacks = [
         keras.callbacks.EarlyStopping(
             monitor='val_loss',
@@ -88,76 +441,540 @@ def train_model():
             factor=0.5,
             patience=5,
             min_lr=1e-6
-        )
+        ),
+        throughput
     ]
     
-    # Train model
-    print("\nTraining model...")
+    with tracer.stage('fit'):
+        # Train model
+        print("\nTraining model...")
+        if use_tf_data:
+            history = model.fit(
+                train_ds,
+                validation_data=test_ds,
+                epochs=epochs,
+                callbacks=callbacks,
+                verbose=1
+            )
+        else:
+            history = model.fit(
+                X_train, y_train,
+                validation_data=(X_test, y_test),
+                epochs=epochs,
+                batch_size=batch_size,
+                callbacks=callbacks,
+                verbose=1
+            )
+    
+    if policy != 'float32':
+        # The variables are float32 already; rebuild the layers without bfloat16 casts
+        keras.mixed_precision.set_global_policy('float32')
+        trained = model
+        model = create_model(input_shape=sample_shape, normalization=normalization)
+        model.set_weights(trained.get_weights())
+        compile_model(model, learning_rate)
+    
+    with tracer.stage('evaluate'):
+        # Evaluate model
+        print("\nEvaluating model...")
+        y_pred = model.predict(test_ds if use_tf_data else X_test)
+    
+        # Calculate metrics
+        auc_score = roc_auc_score(y_test > 0.5, y_pred)
+        mae = np.mean(np.abs(y_test - y_pred.flatten()))
+    
+        print(f"AUC Score: {auc_score:.4f}")
+        print(f"Mean Absolute Error: {mae:.4f}")
+        
+        # Calibration and risk-tier breakdown, as evaluate_scores.py reports at scale
+        evaluation = Evaluator().update({'score': y_pred.ravel(), 'label': y_test}).report()
+        print(f"Calibration error (ECE): {evaluation['overall']['ece']:.4f}")
+        for tier, tier_metrics in evaluation['segments']['risk_tier'].items():
+            if tier_metrics['count']:
+                print(f"  {tier} risk: MAE {tier_metrics['mae']:.4f} "
+                      f"over {tier_metrics['count']} samples")
+    
+        # Classification report (treating as binary classification)
+        y_pred_binary = (y_pred > 0.5).astype(int)
+        y_test_binary = (y_test > 0.5).astype(int)
+    
+        print("\nClassification Report:")
+        print(classification_report(y_test_binary, y_pred_binary, 
+                                  target_names=['Low Risk', 'High Risk']))
+    
+    with tracer.stage('save'):
+        # Save model
+        model.save('echo_wealth_model.h5')
+    
+        # Save training metadata
+        metadata = {
+            'model_type': 'LSTM + Transformer',
+            'input_shape': list(sample_shape),
+            'training_samples': n_train,
+            'test_samples': n_test,
+            'auc_score': float(auc_score),
+            'mae': float(mae),
+            'calibration_error': evaluation['overall']['ece'],
+            'mae_by_risk_tier': {
+                tier: tier_metrics.get('mae')
+                for tier, tier_metrics in evaluation['segments']['risk_tier'].items()
+            },
+            'final_loss': float(history.history['loss'][-1]),
+            'final_val_loss': float(history.history['val_loss'][-1]),
+            'epochs_trained': len(history.history['loss']),
+            'input_pipeline': 'tf.data' if use_tf_data else 'numpy',
+            'normalization': 'in_model' if normalization else 'pre_normalized',
+            'feature_columns': columns,
+            'batch_size': batch_size,
+            'training_profile': {
+                'profile': profile,
+                'learning_rate': learning_rate,
+                'jit_compile': jit_compile,
+                'dtype_policy': policy,
+            },
+            'steps_per_sec': float(np.mean(throughput.steps_per_sec)),
+            'samples_per_sec': float(np.mean(throughput.steps_per_sec)) * batch_size,
+            'epoch_seconds': throughput.epoch_seconds,
+            'parameters': model.count_params(),
+            'model_size_mb': None,  # Measured from the .tflite by export_tflite.py
+            'target_inference_ms': 50,
+            'target_power_w': 0.03
+        }
+    
+        with open('model_metadata.json', 'w') as f:
+            json.dump(metadata, f, indent=2)
+    
+        print(f"\nModel saved as echo_wealth_model.h5")
+        print(f"Metadata saved as model_metadata.json")
+    
+    return model, metadata
+
+def benchmark_fit(features='training_features.npy', labels='training_labels.npy',
+                  batch_size=32, learning_rate=BASE_LEARNING_RATE, jit_compile=False,
+                  epochs=3, metadata_path='dataset_metadata.json', columns=None, batches=None):
+    """Time a few epochs of model.fit under the current process settings.
+    
+    Trains a fresh model on the first 80% of the rows and validates on the
+    rest; nothing is evaluated further or saved. The first epoch includes
+    graph tracing (and XLA compilation), so it is reported separately.
+    """
+    X, y = load_arrays(features, labels, columns, batches)
+    n_train = int(len(X) * 0.8)
+    
+    model = create_model(input_shape=X.shape[1:],
+                         normalization=load_normalization(metadata_path, columns))
+    compile_model(model, learning_rate, jit_compile)
+    throughput = throughput_callback(batch_size)
     history = model.fit(
-        X_train, y_train,
-        validation_data=(X_test, y_test),
-        epochs=100,
-        batch_size=32,
-        callbacks=callbacks,
-        verbose=1
+        X[:n_train], y[:n_train],
+        validation_data=(X[n_train:], y[n_train:]),
+        epochs=epochs,
+        batch_size=batch_size,
+        callbacks=[throughput],
+        verbose=2
     )
     
-    # Evaluate model
-    print("\nEvaluating model...")
-    y_pred = model.predict(X_test)
-    
-    # Calculate metrics
-    auc_score = roc_auc_score(y_test > 0.5, y_pred)
-    mae = np.mean(np.abs(y_test - y_pred.flatten()))
-    
-    print(f"AUC Score: {auc_score:.4f}")
-    print(f"Mean Absolute Error: {mae:.4f}")
-    
-    # Classification report (treating as binary classification)
-    y_pred_binary = (y_pred > 0.5).astype(int)
-    y_test_binary = (y_test > 0.5).astype(int)
-    
-    print("\nClassification Report:")
-    print(classification_report(y_test_binary, y_pred_binary, 
-                              target_names=['Low Risk', 'High Risk']))
-    
-    # Save model
-    model.save('echo_wealth_model.h5')
-    
-    # Save training metadata
-    metadata = {
-        'model_type': 'LSTM + Transformer',
-        'input_shape': X.shape[1],
-        'training_samples': len(X_train),
-        'test_samples': len(X_test),
-        'auc_score': float(auc_score),
-        'mae': float(mae),
-        'final_loss': float(history.history['loss'][-1]),
-        'final_val_loss': float(history.history['val_loss'][-1]),
+    steady = throughput.epoch_seconds[1:] or throughput.epoch_seconds
+    return {
+        'training_samples': n_train,
+        'batch_size': batch_size,
+        'learning_rate': learning_rate,
+        'jit_compile': jit_compile,
+        'epoch_seconds': throughput.epoch_seconds,
+        'first_epoch_s': throughput.epoch_seconds[0],
+        'epoch_s': float(np.mean(steady)),
+        'samples_per_sec': n_train / float(np.mean(steady)),
+        'val_loss': [float(loss) for loss in history.history['val_loss']],
+    }
+
+def fine_tune_model(new_features, new_labels, features='training_features.npy',
+                    labels='training_labels.npy', groups='training_groups.npy', new_groups=None,
+                    metadata_path='dataset_metadata.json', model_path='echo_wealth_model.h5',
+                    replay_ratio=1.0, epochs=5, learning_rate=1e-4, batch_size=32,
+                    eval_samples=20_000, max_auc_drop=0.005, min_auc=None, seed=None):
+    """Fine-tune the saved model on newly collected samples.
+    
+    The historic store (features, labels and groups, minus the new batch)
+    is split by profile exactly as train_model split it, so its validation
+    rows are profiles the current model was not trained on. The new batch
+    is split the same way (by new_groups, if given). Its training rows are
+    mixed with a replay buffer of replay_ratio times as many historic
+    training rows to limit forgetting. The tuned model is kept only if AUC
+    on both the historic and the new validation rows stays within
+    max_auc_drop of the current model and, if min_auc is given, above it.
+    Returns (model or None, report).
+    """
+    from tensorflow import keras
+    from sklearn.metrics import roc_auc_score
+    
+    rng = np.random.default_rng(seed)
+    new_shard = [(new_features, new_labels)]
+    shards = npy_shards(features, labels)
+    group_shards = shard_groups(shards, groups)
+    history = [
+        i for i, (path, _) in enumerate(shards)
+        if os.path.abspath(path) != os.path.abspath(new_features)
+    ]
+    history_shards = [shards[i] for i in history]
+    history_groups = None if group_shards is None else [group_shards[i] for i in history]
+    if history_groups is None and _windowed(metadata_path):
+        print(f"⚠ {groups} not found: historic validation rows can include windows of "
+              "profiles the current model was trained on")
+    
+    with tracer.stage('load_model'):
+        model = keras.models.load_model(model_path)
+    
+    with tracer.stage('load_data'):
+        n_new = len(np.load(new_labels, mmap_mode='r'))
+        new_split = split_shards(new_shard, [new_groups] if new_groups else None)
+        history_split = split_shards(history_shards, history_groups)
+        X_new, y_new = sample_rows(new_shard, new_split, 'train', n_new, rng)
+        X_replay, y_replay = sample_rows(
+            history_shards, history_split, 'train', int(len(X_new) * replay_ratio), rng
+        )
+        validation = {
+            'historic': sample_rows(history_shards, history_split, 'validation',
+                                    eval_samples, rng),
+            'new': sample_rows(new_shard, new_split, 'validation', eval_samples, rng),
+        }
+        
+        X_train = np.concatenate([X_new, X_replay])
+        y_train = np.concatenate([y_new, y_replay])
+        X_val = np.concatenate([X for X, _ in validation.values()])
+        y_val = np.concatenate([y for _, y in validation.values()])
+        print(f"Fine-tuning on {len(X_new)} new + {len(X_replay)} replayed samples, "
+              f"validating on {len(X_val)}")
+    
+    def evaluate():
+        return {
+            name: float(roc_auc_score(y > 0.5, model.predict(X, verbose=0).ravel()))
+            for name, (X, y) in validation.items()
+        }
+    
+    with tracer.stage('evaluate', model='current'):
+        before = evaluate()
+    
+    with tracer.stage('fit'):
+        # A small learning rate keeps the update close to the deployed model
+        model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+            loss='binary_crossentropy',
+            metrics=['mae', 'mse']
+        )
+        history = model.fit(
+            X_train, y_train,
+            validation_data=(X_val, y_val),
+            epochs=epochs,
+            batch_size=batch_size,
+            callbacks=[keras.callbacks.EarlyStopping(
+                monitor='val_loss', patience=2, restore_best_weights=True
+            )],
+            verbose=1
+        )
+    
+    with tracer.stage('evaluate', model='fine_tuned'):
+        after = evaluate()
+    
+    accepted = all(
+        after[name] >= before[name] - max_auc_drop
+        and (min_auc is None or after[name] > min_auc)
+        for name in validation
+    )
+    report = {
+        'model': model_path,
+        'new_samples': int(n_new),
+        'replay_samples': len(X_replay),
+        'historic_split': 'row' if history_groups is None else 'profile',
         'epochs_trained': len(history.history['loss']),
-        'model_size_mb': 1.2,  # Estimated after quantization
-        'target_inference_ms': 50,
-        'target_power_w': 0.03
+        'learning_rate': learning_rate,
+        'auc_before': before,
+        'auc_after': after,
+        'max_auc_drop': max_auc_drop,
+        'min_auc': min_auc,
+        'accepted': accepted,
     }
     
+    for name in validation:
+        print(f"{name} validation AUC: {before[name]:.4f} -> {after[name]:.4f}")
+    return (model if accepted else None), report
+
+def save_fine_tuned(model, report, model_path='echo_wealth_model.h5'):
+    """Replace the saved model, keeping the previous one as <name>.prev.h5."""
+    backup = model_path.replace('.h5', '.prev.h5')
+    shutil.copy(model_path, backup)
+    model.save(model_path)
+    
+    metadata = {}
+    if os.path.exists('model_metadata.json'):
+        with open('model_metadata.json') as f:
+            metadata = json.load(f)
+    metadata['auc_score'] = report['auc_after']['historic']
+    metadata.setdefault('fine_tuning', []).append(report)
+    
     with open('model_metadata.json', 'w') as f:
         json.dump(metadata, f, indent=2)
     
-    print(f"\nModel saved as echo_wealth_model.h5")
-    print(f"Metadata saved as model_metadata.json")
+    print(f"\nModel saved as {model_path} (previous model kept as {backup})")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--features', default='training_features.npy',
+                        help='feature .npy file, glob of shards with --tf-data, or a '
+                             'Parquet dataset directory')
+    parser.add_argument('--labels', default='training_labels.npy',
+                        help='label .npy file, or glob of shards with --tf-data')
+    parser.add_argument('--groups', default='training_groups.npy',
+                        help='profile_id per row (.npy, or glob of shards with --tf-data), so '
+                             'windows of one profile are not split between training and validation')
+    parser.add_argument('--metadata', default='dataset_metadata.json',
+                        help='dataset metadata holding fitted normalization statistics')
+    parser.add_argument('--tf-data', action='store_true',
+                        help='stream memory-mapped shards through a tf.data pipeline')
+    parser.add_argument('--columns', default=None, type=lambda s: s.split(','),
+                        help='Parquet only: comma-separated feature columns to train on '
+                             '(default: all, in model order)')
+    parser.add_argument('--batches', default=None, type=lambda s: [int(b) for b in s.split(',')],
+                        help='Parquet only: comma-separated shard numbers to read (default: all)')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='default: set by --profile (32 baseline, 1024 performance)')
+    parser.add_argument('--epochs', type=int, default=None,
+                        help='most epochs to train; early stopping may end sooner '
+                             '(default: 100, or 5 when fine-tuning)')
+    parser.add_argument('--shuffle-buffer', type=int, default=10_000,
+                        help='tf.data shuffle buffer size in samples (default: 10000)')
+    parser.add_argument('--cache', default=None, metavar='PATH',
+                        help="cache decoded samples: '' for memory or a file prefix")
+    
+    performance = parser.add_argument_group(
+        'performance',
+        'CPU training throughput; --profile picks defaults for the options below'
+    )
+    performance.add_argument('--profile', choices=sorted(TRAINING_PROFILES), default='baseline',
+                             help='baseline: batch 32; performance: batch 1024 with '
+                                  'sqrt-scaled learning rate (default: baseline)')
+    performance.add_argument('--lr-scaling', choices=['none', 'sqrt', 'linear'], default=None,
+                             help=f'scale the learning rate from {BASE_LEARNING_RATE} at batch '
+                                  f'{BASE_BATCH_SIZE} to --batch-size')
+    # Paired on/off flags; None leaves the choice to --profile
+    performance.add_argument('--jit-compile', action='store_const', const=True, default=None,
+                             help='compile the train step with XLA')
+    performance.add_argument('--no-jit-compile', dest='jit_compile', action='store_const',
+                             const=False)
+    performance.add_argument('--mixed-precision', action='store_const', const=True,
+                             default=None,
+                             help='bfloat16 compute with float32 weights, where the CPU '
+                                  'supports bfloat16')
+    performance.add_argument('--no-mixed-precision', dest='mixed_precision',
+                             action='store_const', const=False)
+    performance.add_argument('--intra-op-threads', type=int, default=None,
+                             help='threads per op (default: one per core)')
+    performance.add_argument('--inter-op-threads', type=int, default=None,
+                             help='ops run concurrently (default: TensorFlow\'s choice)')
+    performance.add_argument('--compare-baseline', action='store_true',
+                             help='instead of training, time --benchmark-epochs epochs of '
+                                  'this configuration and of the baseline profile')
+    performance.add_argument('--benchmark-epochs', type=int, default=3)
+    performance.add_argument('--benchmark-output', default=None, help=argparse.SUPPRESS)
     
-    return model, metadata
+    incremental = parser.add_argument_group(
+        'incremental retraining',
+        'fine-tune echo_wealth_model.h5 on a new batch instead of training from scratch; '
+        '--features/--labels then name the historic store used for replay and validation'
+    )
+    incremental.add_argument('--new-features', default=None, metavar='PATH',
+                             help='feature .npy file of the new batch (enables incremental mode)')
+    incremental.add_argument('--new-labels', default=None, metavar='PATH')
+    incremental.add_argument('--new-groups', default=None, metavar='PATH',
+                             help='profile_id per row of the new batch, if it holds windows')
+    incremental.add_argument('--replay-ratio', type=float, default=1.0,
+                             help='historic samples replayed per new sample (default: 1.0)')
+    incremental.add_argument('--learning-rate', type=float, default=1e-4)
+    incremental.add_argument('--max-auc-drop', type=float, default=0.005,
+                             help='largest validation AUC loss accepted (default: 0.005)')
+    incremental.add_argument('--min-auc', type=float, default=None,
+                             help='also reject updates whose validation AUC is not above this')
+    incremental.add_argument('--seed', type=int, default=None)
+    incremental.add_argument('--no-export', action='store_true',
+                             help='do not re-run export_tflite.py after an accepted update')
+    incremental.add_argument('--export-args', default='',
+                             help='arguments passed to export_tflite.py, as one string')
+    add_trace_arguments(parser)
+    return parser.parse_args(argv)
 
-def main():
+def training_settings(args):
+    """The --profile settings with any explicitly given flags applied on top."""
+    settings = dict(TRAINING_PROFILES[args.profile])
+    for name in settings:
+        if getattr(args, name) is not None:
+            settings[name] = getattr(args, name)
+    return settings
+
+def _settings_argv(args, settings):
+    argv = ['--features', args.features, '--labels', args.labels, '--metadata', args.metadata,
+            '--profile', args.profile, '--batch-size', str(settings['batch_size']),
+            '--lr-scaling', settings['lr_scaling'],
+            '--jit-compile' if settings['jit_compile'] else '--no-jit-compile',
+            '--mixed-precision' if settings['mixed_precision'] else '--no-mixed-precision']
+    if args.columns:
+        argv += ['--columns', ','.join(args.columns)]
+    if args.batches:
+        argv += ['--batches', ','.join(map(str, args.batches))]
+    for flag in ['intra_op_threads', 'inter_op_threads']:
+        if getattr(args, flag) is not None:
+            argv += ['--' + flag.replace('_', '-'), str(getattr(args, flag))]
+    return argv
+
+def compare_baseline(args, settings, output='training_benchmark.json'):
+    """Benchmark this configuration against the baseline profile.
+    
+    Each runs in a fresh process, since thread pools and the dtype policy
+    can only be set once per process.
+    """
+    baseline = argparse.Namespace(**{
+        **vars(args), 'profile': 'baseline', 'intra_op_threads': None, 'inter_op_threads': None
+    })
+    configurations = [('baseline', baseline, TRAINING_PROFILES['baseline']),
+                      (args.profile if args.profile != 'baseline' else 'configured',
+                       args, settings)]
+    
+    results = {}
+    for name, run_args, run_settings in configurations:
+        print(f"\nBenchmarking {name}...")
+        path = f'{output}.{name}.tmp'
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__)] + _settings_argv(run_args, run_settings)
+            + ['--benchmark-epochs', str(args.benchmark_epochs), '--benchmark-output', path],
+            check=True
+        )
+        with open(path) as f:
+            results[name] = json.load(f)
+        os.remove(path)
+    
+    base = results['baseline']
+    print(f"\n{'profile':<12} {'batch':>6} {'lr':>8} {'dtype':>15} {'XLA':>4} "
+          f"{'1st epoch s':>12} {'epoch s':>8} {'samples/s':>10} {'speedup':>8}")
+    for name, result in results.items():
+        result['speedup'] = base['epoch_s'] / result['epoch_s']
+        print(f"{name:<12} {result['batch_size']:>6} {result['learning_rate']:>8.4g} "
+              f"{result['dtype_policy']:>15} {'on' if result['jit_compile'] else 'off':>4} "
+              f"{result['first_epoch_s']:>12.2f} {result['epoch_s']:>8.2f} "
+              f"{result['samples_per_sec']:>10,.0f} {result['speedup']:>7.2f}x")
+    
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"✓ Results saved to {output}")
+
+def incremental_main(args):
+    """Fine-tune, then save and re-export only if validation metrics hold."""
+    model, report = fine_tune_model(
+        args.new_features, args.new_labels,
+        features=args.features,
+        labels=args.labels,
+        groups=args.groups,
+        new_groups=args.new_groups,
+        metadata_path=args.metadata,
+        replay_ratio=args.replay_ratio,
+        epochs=5 if args.epochs is None else args.epochs,
+        learning_rate=args.learning_rate,
+        batch_size=args.batch_size,
+        max_auc_drop=args.max_auc_drop,
+        min_auc=args.min_auc,
+        seed=args.seed
+    )
+    with open('retrain_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    if model is None:
+        print("\n⚠ Fine-tuned model rejected: validation AUC did not hold")
+        print("Existing model left unchanged (see retrain_report.json)")
+        return
+    
+    with tracer.stage('save'):
+        save_fine_tuned(model, report)
+    
+    if not args.no_export:
+        with tracer.stage('export'):
+            subprocess.run(
+                [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                              'export_tflite.py')]
+                + shlex.split(args.export_args),
+                check=True
+            )
+    print("✓ Incremental update complete (see retrain_report.json)")
+
+def main(argv=None):
     """Main training pipeline."""
+    args = parse_args(argv)
+    tracer.configure(args.trace, profile=args.cprofile)
+    parquet = os.path.isdir(args.features)
+    if parquet and (args.tf_data or args.new_features):
+        raise SystemExit("A Parquet dataset is only supported by the in-memory training mode")
+    if (args.columns or args.batches) and not parquet:
+        raise SystemExit("--columns and --batches need a Parquet dataset directory as --features")
+    if args.columns:
+        # The exported spec must describe exactly these inputs
+        try:
+            select_features(args.columns)
+        except ValueError as e:
+            raise SystemExit(f"--columns: {e}")
+        if load_normalization(args.metadata) is None:
+            raise SystemExit("--columns needs a dataset generated with --normalization standard: "
+                             "rows normalized per row over all features cannot be reproduced "
+                             "from a subset of them")
+    
+    settings = training_settings(args)
+    args.batch_size = settings['batch_size']
+    learning_rate = scaled_learning_rate(settings['batch_size'], settings['lr_scaling'])
+    if args.compare_baseline:
+        compare_baseline(args, settings)
+        return
+    
+    # Fine-tuning loads a float32 model and keeps its own small learning rate
+    policy = configure_training(args.intra_op_threads, args.inter_op_threads,
+                                settings['mixed_precision'] and not args.new_features)
+    
+    if args.benchmark_output:
+        result = benchmark_fit(args.features, args.labels, settings['batch_size'], learning_rate,
+                               settings['jit_compile'], args.benchmark_epochs, args.metadata,
+                               args.columns, args.batches)
+        with open(args.benchmark_output, 'w') as f:
+            json.dump({**result, 'dtype_policy': policy, 'profile': args.profile}, f, indent=2)
+        return
+    
+    if args.new_features:
+        if not args.new_labels:
+            raise SystemExit("--new-features requires --new-labels")
+        try:
+            incremental_main(args)
+        finally:
+            tracer.write('train_model')
+        return
+    
     try:
-        model, metadata = train_model()
+        model, metadata = train_model(
+            features=args.features,
+            labels=args.labels,
+            groups=args.groups,
+            use_tf_data=args.tf_data,
+            batch_size=args.batch_size,
+            shuffle_buffer=args.shuffle_buffer,
+            cache=args.cache,
+            metadata_path=args.metadata,
+            columns=args.columns,
+            batches=args.batches,
+            learning_rate=learning_rate,
+            jit_compile=settings['jit_compile'],
+            epochs=100 if args.epochs is None else args.epochs,
+            profile=args.profile
+        )
         
         print("\n" + "="*50)
         print("TRAINING COMPLETE")
         print("="*50)
         print(f"AUC Score: {metadata['auc_score']:.4f} (Target: >0.75)")
         print(f"MAE: {metadata['mae']:.4f}")
+        print(f"Throughput: {metadata['steps_per_sec']:.1f} steps/sec, "
+              f"{metadata['samples_per_sec']:,.0f} samples/sec")
         print(f"Model ready for TensorFlow Lite conversion")
         print("\nNext steps:")
         print("1. Run export_tflite.py to convert to TFLite")
@@ -167,8 +984,12 @@ def main():
     except FileNotFoundError:
         print("Error: Training data not found!")
         print("Please run generate_synthetic_data.py first")
+        raise SystemExit(1)
     except Exception as e:
         print(f"Training failed: {e}")
+        raise SystemExit(1)
+    finally:
+        tracer.write('train_model')
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,56 @@
+import 'dart:convert';
+import 'dart:io';
+
+import 'package:flutter_test/flutter_test.dart';
+
+import 'package:echo_wealth/models/daily_data.dart';
+import 'package:echo_wealth/services/feature_spec.dart';
+
+// Regenerate both files with: cd scripts && python3 feature_spec.py
+void main() {
+  final spec = FeatureSpec.fromJson(
+      jsonDecode(File(FeatureSpec.assetPath).readAsStringSync()) as Map<String, dynamic>);
+  final golden = jsonDecode(File('test/fixtures/feature_golden.json').readAsStringSync())
+      as Map<String, dynamic>;
+  final signals = (golden['signals'] as List).cast<String>();
+
+  double at(List day, String signal) => (day[signals.indexOf(signal)] as num).toDouble();
+
+  List<DailyData> week(List days) => [
+        for (var i = 0; i < days.length; i++)
+          DailyData(
+            date: DateTime(2024, 1, 1).add(Duration(days: i)),
+            stepsMean: at(days[i], 'steps_mean'),
+            stepsStd: at(days[i], 'steps_std'),
+            idlePeriods: at(days[i], 'idle_periods').toInt(),
+            chargeNightPct: at(days[i], 'charge_night_pct'),
+            chargeCycles: at(days[i], 'charge_cycles').toInt(),
+            smsLoanCount: at(days[i], 'sms_loan_count').toInt(),
+          ),
+      ];
+
+  void expectClose(List<double> actual, List expected) {
+    expect(actual.length, expected.length);
+    for (var i = 0; i < actual.length; i++) {
+      final target = (expected[i] as num).toDouble();
+      expect(actual[i], closeTo(target, 1e-6 * (1 + target.abs())), reason: spec.names[i]);
+    }
+  }
+
+  test('features match the Python pipeline on golden vectors', () {
+    for (final c in (golden['cases'] as List).cast<Map<String, dynamic>>()) {
+      final raw = spec.compute(week(c['week'] as List));
+      expectClose(raw, c['raw'] as List);
+      expectClose(spec.normalize(raw), c['normalized'] as List);
+      expectClose(
+          spec.normalize(raw, golden['standard_normalization'] as Map<String, dynamic>),
+          c['standardized'] as List);
+    }
+  });
+
+  test('day order does not change the features', () {
+    final c = (golden['cases'] as List).first as Map<String, dynamic>;
+    final days = week(c['week'] as List);
+    expectClose(spec.compute(days.reversed.toList()), c['raw'] as List);
+  });
+}
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# create_model builds a Keras 2 functional graph (see README); must be set before TF loads
+os.environ.setdefault('TF_USE_LEGACY_KERAS', '1')
+
+# The pipeline scripts import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
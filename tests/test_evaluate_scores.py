@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from evaluate_scores import (AUC_BINS, Evaluator, FeatureHistogram, ScoreMetrics, drift_report,
+                             evaluate, fit_drift_range)
+
+def scored_rows(n=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    labels = rng.random(n)
+    scores = np.clip(labels + rng.normal(0, 0.3, n), 0, 1)
+    return scores, labels
+
+def test_histogram_auc_matches_sklearn():
+    metrics = pytest.importorskip('sklearn.metrics')
+    scores, labels = scored_rows()
+    expected = metrics.roc_auc_score(labels > 0.5, scores)
+    assert ScoreMetrics().update(scores, labels).auc() == pytest.approx(expected, abs=1 / AUC_BINS)
+
+def test_merged_chunks_equal_one_pass():
+    scores, labels = scored_rows()
+    full = Evaluator().update({'score': scores, 'label': labels})
+
+    merged = Evaluator()
+    for rows in np.array_split(np.arange(len(scores)), 7):
+        merged.merge(Evaluator().update({'score': scores[rows], 'label': labels[rows]}))
+
+    # Histograms add up exactly; error sums only differ in summation order
+    for a, b in ((merged.overall, full.overall),
+                 (merged.segments['risk_tier'], full.segments['risk_tier'])):
+        np.testing.assert_array_equal(a.positive, b.positive)
+        np.testing.assert_array_equal(a.negative, b.negative)
+        np.testing.assert_array_equal(a.calibration_count, b.calibration_count)
+        np.testing.assert_allclose(a.abs_error, b.abs_error, rtol=1e-12)
+    assert merged.overall.auc() == full.overall.auc()
+
+def test_summary_counts_and_segments():
+    scores, labels = scored_rows(1000)
+    report = Evaluator().update({'score': scores, 'label': labels}).report()
+    overall = report['overall']
+    assert overall['count'] == 1000
+    assert overall['positives'] == int((labels > 0.5).sum())
+    assert overall['mae'] == pytest.approx(np.abs(scores - labels).mean())
+    # Only the segment whose column is present is reported
+    assert list(report['segments']) == ['risk_tier']
+    assert sum(band['count'] for band in report['segments']['risk_tier'].values()) == 1000
+
+def test_single_class_has_no_auc():
+    assert ScoreMetrics().update([0.2, 0.9], [0.1, 0.2]).auc() is None
+
+def histogram(X, bounds):
+    return FeatureHistogram(bounds).update(X)
+
+def test_same_distribution_is_stable():
+    rng = np.random.default_rng(0)
+    reference, current = rng.normal(size=(50_000, 3)), rng.normal(size=(50_000, 3))
+    bounds = fit_drift_range(reference)
+    report = drift_report(histogram(reference, bounds), histogram(current, bounds),
+                          feature_names=['a', 'b', 'c'])
+    assert report['drifted'] == [] and report['shifted'] == []
+    assert max(f['psi'] for f in report['features'].values()) < 0.01
+    assert report['reference_rows'] == report['current_rows'] == 50_000
+
+def test_psi_matches_decile_formula():
+    rng = np.random.default_rng(1)
+    reference = rng.normal(size=(100_000, 1))
+    current = rng.normal(0.5, 1, size=(100_000, 1))
+    report = drift_report(histogram(reference, fit_drift_range(reference)),
+                          histogram(current, fit_drift_range(reference)), feature_names=['x'])
+
+    edges = np.quantile(reference[:, 0], np.linspace(0, 1, 11))[1:-1]
+    p = np.bincount(np.searchsorted(edges, reference[:, 0]), minlength=10) / len(reference)
+    q = np.bincount(np.searchsorted(edges, current[:, 0]), minlength=10) / len(current)
+    expected = ((q - p) * np.log(q / p)).sum()
+
+    assert report['features']['x']['psi'] == pytest.approx(expected, rel=0.05)
+    assert report['drifted'] == ['x']
+
+def test_evaluate_npy_files(tmp_path):
+    metrics = pytest.importorskip('sklearn.metrics')
+    scores, labels = scored_rows(5000)
+    X = np.random.default_rng(2).normal(size=(5000, 21))
+    for name, array in (('features', X), ('labels', labels), ('scores', scores)):
+        np.save(tmp_path / f'{name}.npy', array)
+
+    report = evaluate(str(tmp_path / 'features.npy'), str(tmp_path / 'labels.npy'),
+                      str(tmp_path / 'scores.npy'), reference=str(tmp_path / 'features.npy'),
+                      chunk_rows=1000)
+    assert report['overall']['count'] == 5000
+    assert report['overall']['auc'] == pytest.approx(
+        metrics.roc_auc_score(labels > 0.5, scores), abs=1 / AUC_BINS)
+    assert report['drift']['drifted'] == []
@@ -0,0 +1,64 @@
+import json
+import os
+
+import numpy as np
+
+from feature_spec import NORMALIZATION
+from features import extract_features, normalize_features
+from normalizer import FeatureNormalizer
+
+FEATURE_GOLDEN = os.path.join(os.path.dirname(__file__), '..', 'test', 'fixtures',
+                              'feature_golden.json')
+
+def load_golden():
+    with open(FEATURE_GOLDEN) as f:
+        return json.load(f)
+
+def test_features_match_golden():
+    golden = load_golden()
+    weeks = np.array([case['week'] for case in golden['cases']])
+    np.testing.assert_allclose(extract_features(weeks, normalize=False),
+                               [case['raw'] for case in golden['cases']], rtol=1e-9)
+    np.testing.assert_allclose(extract_features(weeks),
+                               [case['normalized'] for case in golden['cases']], rtol=1e-9,
+                               atol=1e-12)
+
+def test_standard_normalization_matches_golden():
+    golden = load_golden()
+    raw = np.array([case['raw'] for case in golden['cases']])
+    np.testing.assert_allclose(normalize_features(raw, golden['standard_normalization']),
+                               [case['standardized'] for case in golden['cases']],
+                               rtol=1e-9, atol=1e-12)
+
+def test_default_normalization_is_per_row():
+    assert NORMALIZATION['method'] == 'per_row'
+
+def test_merged_chunks_equal_one_pass():
+    X = np.random.default_rng(0).normal(1000, 50, size=(1000, 5))
+    full = FeatureNormalizer().partial_fit(X)
+
+    merged = FeatureNormalizer()
+    for chunk in np.array_split(X, [10, 11, 400, 999]):
+        merged.merge(FeatureNormalizer().partial_fit(chunk))
+
+    assert merged.count == len(X)
+    np.testing.assert_allclose(merged.mean, X.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(merged.std, X.std(axis=0), rtol=1e-9)
+    np.testing.assert_allclose(merged.std, full.std, rtol=1e-9)
+
+def test_empty_chunks_are_ignored():
+    X = np.arange(12.0).reshape(4, 3)
+    normalizer = FeatureNormalizer().partial_fit(X[:0]).merge(FeatureNormalizer()).partial_fit(X)
+    np.testing.assert_allclose(normalizer.mean, X.mean(axis=0))
+
+def test_transform_and_dict_round_trip():
+    X = np.random.default_rng(1).normal(size=(200, 4))
+    X[:, 3] = 7.0  # constant column hits the epsilon floor instead of dividing by zero
+    normalizer = FeatureNormalizer().partial_fit(X)
+    restored = FeatureNormalizer.from_dict(normalizer.to_dict())
+
+    Z = restored.transform(X)
+    assert np.all(np.isfinite(Z))
+    np.testing.assert_allclose(Z[:, :3].mean(axis=0), 0, atol=1e-12)
+    np.testing.assert_allclose(Z[:, :3].std(axis=0), 1, rtol=1e-9)
+    np.testing.assert_allclose(Z, normalizer.transform(X), rtol=1e-12)
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import parquet_dataset
+from generate_synthetic_data import write_parquet_dataset, write_training_dataset
+
+def write_npy(directory, workers, **kwargs):
+    paths = {name: str(directory / f'{name}.npy') for name in ('features', 'labels', 'groups')}
+    X, y, entropy, normalizer = write_training_dataset(
+        60, chunk_size=16, features_path=paths['features'], labels_path=paths['labels'],
+        groups_path=paths['groups'], seed=7, workers=workers, **kwargs
+    )
+    return np.array(X), np.array(y), np.load(paths['groups']), normalizer
+
+@pytest.mark.parametrize('normalization', ['per_row', 'standard'])
+def test_seeded_output_does_not_depend_on_workers(tmp_path, normalization):
+    (tmp_path / 'one').mkdir()
+    (tmp_path / 'two').mkdir()
+    X1, y1, groups1, norm1 = write_npy(tmp_path / 'one', 1, normalization=normalization)
+    X2, y2, groups2, norm2 = write_npy(tmp_path / 'two', 2, normalization=normalization)
+
+    np.testing.assert_array_equal(X1, X2)
+    np.testing.assert_array_equal(y1, y2)
+    np.testing.assert_array_equal(groups1, groups2)
+    if normalization == 'standard':
+        assert norm1.to_dict() == norm2.to_dict()
+    else:
+        assert norm1 is None and norm2 is None
+
+def test_windows_are_grouped_by_profile(tmp_path):
+    _, y, groups, _ = write_npy(tmp_path, 1, stride=7)
+    rows_per_profile = len(groups) // 60
+    assert rows_per_profile > 1
+    np.testing.assert_array_equal(groups, np.repeat(np.arange(60), rows_per_profile))
+    # Every window of a profile shares its label
+    assert np.all(y.reshape(60, rows_per_profile) == y[::rows_per_profile, None])
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip('pyarrow')
+    X, y, groups, _ = write_npy(tmp_path, 1)
+
+    dataset_dir = str(tmp_path / 'dataset')
+    labels, _, _ = write_parquet_dataset(60, chunk_size=16, dataset_dir=dataset_dir, seed=7)
+
+    assert parquet_dataset.list_batches(dataset_dir) == [0, 1, 2, 3]
+    assert parquet_dataset.count_rows(dataset_dir) == 60
+    X_pq, y_pq = parquet_dataset.read_arrays(dataset_dir)
+    np.testing.assert_array_equal(X_pq, X)
+    np.testing.assert_array_equal(y_pq, y)
+    np.testing.assert_array_equal(labels, y)
+    np.testing.assert_array_equal(parquet_dataset.read_profile_ids(dataset_dir), groups)
+
+    streamed = list(parquet_dataset.iter_arrays(dataset_dir, batch_size=10, dtype=np.float64))
+    np.testing.assert_array_equal(np.concatenate([block for block, _ in streamed]), X)
+    assert parquet_dataset.dataset_metadata(dataset_dir)['normalization']['method'] == 'per_row'
+
+def test_parquet_reads_selected_columns_and_batches(tmp_path):
+    pytest.importorskip('pyarrow')
+    X, y, _, _ = write_npy(tmp_path, 1)
+    dataset_dir = str(tmp_path / 'dataset')
+    write_parquet_dataset(60, chunk_size=16, dataset_dir=dataset_dir, seed=7)
+
+    names = parquet_dataset.dataset_metadata(dataset_dir)['feature_names']
+    X_pq, y_pq = parquet_dataset.read_arrays(dataset_dir, features=[names[2], names[0]],
+                                             batches=[1])
+    np.testing.assert_array_equal(X_pq, X[16:32][:, [2, 0]])
+    np.testing.assert_array_equal(y_pq, y[16:32])
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+import model_regression
+from model_regression import check_model, record_golden
+
+MOCK_MODEL = os.path.join(os.path.dirname(__file__), '..', 'assets', 'models', 'echo_wealth.tflite')
+
+@pytest.fixture(scope='module')
+def golden():
+    pytest.importorskip('tensorflow')
+    spec = model_regression.load_spec(MOCK_MODEL)
+    return record_golden(MOCK_MODEL, spec, n_cases=4, iterations=50)
+
+def fake_latency(p50_ms, spread_ms=0.0):
+    def measure_model(model_path, inputs, num_threads=1, **kwargs):
+        return {'num_threads': num_threads, 'p50_ms': p50_ms, 'p99_ms': p50_ms,
+                'p50_spread_ms': spread_ms}
+    return measure_model
+
+def with_baseline(golden, p50_ms, spread_ms):
+    return {**golden, 'latency': {**golden['latency'], 'p50_ms': p50_ms,
+                                  'p50_spread_ms': spread_ms}}
+
+def test_outputs_match_own_golden(golden):
+    passed, report = check_model(MOCK_MODEL, golden, check_latency=False)
+    assert passed and report['identical']
+    assert report['outputs']['max_abs_error'] == 0.0
+    assert report['latency'] == {'checked': False, 'skipped': 'disabled'}
+
+def test_microsecond_slowdown_fails(golden, monkeypatch):
+    monkeypatch.setattr(model_regression, 'measure_model', fake_latency(0.0017, 0.00002))
+    passed, report = check_model(MOCK_MODEL, with_baseline(golden, 0.00085, 0.00002))
+    assert not passed
+    assert report['latency']['checked'] and not report['latency']['passed']
+
+def test_increase_within_spread_passes(golden, monkeypatch):
+    monkeypatch.setattr(model_regression, 'measure_model', fake_latency(0.0012, 0.0001))
+    passed, report = check_model(MOCK_MODEL, with_baseline(golden, 0.001, 0.0001))
+    assert passed
+    assert report['latency']['change_pct'] > report['latency']['max_regression_pct']
+
+def test_other_host_reports_latency_not_checked(golden, monkeypatch, capsys):
+    monkeypatch.setattr(model_regression, 'measure_model', fake_latency(1.0))
+    other = {**golden, 'host': {**golden['host'], 'cpu_count': golden['host']['cpu_count'] + 1}}
+    passed, report = check_model(MOCK_MODEL, other)
+    assert passed
+    assert not report['latency']['checked']
+    assert 'cpu_count' in report['latency']['skipped']
+    model_regression.print_report(report)
+    assert 'Latency not checked' in capsys.readouterr().out
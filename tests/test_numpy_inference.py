@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from features import N_FEATURES
+from numpy_inference import PARITY_ATOL, NumpyModel, dump_weights
+
+@pytest.fixture(scope='module')
+def model():
+    tf = pytest.importorskip('tensorflow')
+    pytest.importorskip('tf_keras')
+    from train_model import create_model
+
+    tf.keras.utils.set_random_seed(0)
+    X = np.random.default_rng(0).normal(100, 20, size=(256, N_FEATURES))
+    normalization = {'mean': X.mean(axis=0).tolist(), 'std': X.std(axis=0).tolist()}
+    return create_model((N_FEATURES,), normalization=normalization), X
+
+def test_matches_keras(model, tmp_path):
+    keras_model, X = model
+    dump_weights(keras_model, tmp_path / 'weights.npz')
+
+    expected = keras_model.predict(X, verbose=0)
+    actual = NumpyModel(tmp_path / 'weights.npz').predict(X, batch_size=100)
+    assert actual.shape == expected.shape == (len(X), 1)
+    np.testing.assert_allclose(actual, expected, atol=PARITY_ATOL)
+
+def test_float64_and_empty_input(model, tmp_path):
+    keras_model, X = model
+    dump_weights(keras_model, tmp_path / 'weights.npz')
+
+    numpy_model = NumpyModel(tmp_path / 'weights.npz', dtype=np.float64)
+    np.testing.assert_allclose(numpy_model.predict(X), keras_model.predict(X, verbose=0),
+                               atol=PARITY_ATOL)
+    assert numpy_model.predict(X[:0]).shape == (0, 1)
+
+def test_unsupported_layer_is_rejected(tmp_path):
+    tf = pytest.importorskip('tensorflow')
+    inputs = tf.keras.Input(shape=(4,))
+    outputs = tf.keras.layers.BatchNormalization()(inputs)
+    dump_weights(tf.keras.Model(inputs, outputs), tmp_path / 'weights.npz')
+
+    with pytest.raises(ValueError, match='Unsupported layer'):
+        NumpyModel(tmp_path / 'weights.npz').predict(np.zeros((2, 4)))
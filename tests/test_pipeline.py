@@ -0,0 +1,64 @@
+import pytest
+
+from pipeline import STAGES, file_digest, generate_cacheable, stage_key
+
+STAGE = {stage['name']: stage for stage in STAGES}
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for stage in STAGES:
+        for name in stage['inputs']:
+            (tmp_path / name).write_bytes(name.encode())
+    return tmp_path
+
+def test_key_is_stable(workdir):
+    assert stage_key(STAGE['train'], ['--epochs', '1'], {}) == \
+        stage_key(STAGE['train'], ['--epochs', '1'], {})
+
+def test_key_changes_with_arguments(workdir):
+    assert stage_key(STAGE['train'], ['--epochs', '1'], {}) != \
+        stage_key(STAGE['train'], ['--epochs', '2'], {})
+
+def test_key_changes_with_input_contents(workdir):
+    before = stage_key(STAGE['train'], [], {})
+    (workdir / 'training_labels.npy').write_bytes(b'changed')
+    assert stage_key(STAGE['train'], [], {}) != before
+
+def test_missing_input_is_an_error(workdir):
+    (workdir / 'training_groups.npy').unlink()
+    with pytest.raises(FileNotFoundError, match='training_groups.npy'):
+        stage_key(STAGE['train'], [], {})
+
+def test_export_key_covers_golden_and_metadata(workdir):
+    (workdir / 'golden.json').write_text('{}')
+    args = ['--golden', 'golden.json']
+    without_metadata = stage_key(STAGE['export'], args, {})
+
+    (workdir / 'model_metadata.json').write_text('{"feature_columns": []}')
+    with_metadata = stage_key(STAGE['export'], args, {})
+    assert with_metadata != without_metadata
+
+    (workdir / 'golden.json').write_text('{"cases": []}')
+    assert stage_key(STAGE['export'], args, {}) != with_metadata
+
+def test_export_needs_its_golden(workdir):
+    with pytest.raises(FileNotFoundError, match='golden.json'):
+        stage_key(STAGE['export'], ['--golden', 'golden.json'], {})
+
+def test_digest_is_memoized_by_stamp(workdir):
+    path = workdir / 'training_labels.npy'
+    hash_index = {}
+    digest = file_digest(str(path), hash_index)
+    entry = hash_index[str(path)]
+    entry['sha256'] = 'stale'
+    assert file_digest(str(path), hash_index) == 'stale'
+
+    path.write_bytes(b'a longer payload')
+    assert file_digest(str(path), hash_index) not in ('stale', digest)
+
+def test_only_seeded_generation_is_cacheable():
+    assert generate_cacheable(['--seed', '1'])
+    assert not generate_cacheable([])
+    with pytest.raises(SystemExit, match='npy'):
+        generate_cacheable(['--seed', '1', '--format', 'parquet'])
@@ -0,0 +1,51 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from feature_spec import NORMALIZATION, WINDOW_DAYS
+from features import N_FEATURES, extract_features
+from profile_store import DAILY_SIGNALS
+from scoring_server import CAMEL_CASE, ScoringService, parse_request, week_from_records
+
+def make_days(n=WINDOW_DAYS, camel_case=False, seed=0):
+    rng = np.random.default_rng(seed)
+    days = []
+    for day in range(n):
+        record = {'date': f"2024-01-{day + 1:02d}"}
+        for signal in DAILY_SIGNALS:
+            record[CAMEL_CASE[signal] if camel_case else signal] = float(rng.uniform(0, 10))
+        days.append(record)
+    return days
+
+def test_days_match_extract_features():
+    days = make_days(WINDOW_DAYS + 3)
+    X = parse_request({'days': days[::-1]}, (N_FEATURES,), NORMALIZATION)
+    week = np.array([[record[signal] for signal in DAILY_SIGNALS] for record in days[-WINDOW_DAYS:]])
+    np.testing.assert_allclose(X[0], extract_features(week[np.newaxis])[0], rtol=1e-6)
+
+def test_camel_case_fields():
+    np.testing.assert_array_equal(week_from_records(make_days(camel_case=True)),
+                                  week_from_records(make_days()))
+
+def test_non_object_records_rejected():
+    with pytest.raises(ValueError, match="JSON objects"):
+        week_from_records(['a'] * WINDOW_DAYS)
+
+def test_too_few_days_rejected():
+    with pytest.raises(ValueError, match=f"at least {WINDOW_DAYS}"):
+        week_from_records(make_days(WINDOW_DAYS - 1))
+
+def test_shape_error_names_plain_ints():
+    service = ScoringService(None, np.array([N_FEATURES], dtype=np.int32), NORMALIZATION)
+    status, response = asyncio.run(service.handle({'features': [1.0, 2.0]}))
+    assert status == 400
+    assert response['error'] == f"Expected rows of shape [{N_FEATURES}], got [2]"
+
+def test_handle_answers_malformed_records():
+    service = ScoringService(None, (N_FEATURES,), NORMALIZATION)
+    for payload in ({'days': ['a'] * WINDOW_DAYS}, {'weeks': [[1] * WINDOW_DAYS]},
+                    {'days': 5}):
+        status, response = asyncio.run(service.handle(payload))
+        assert status == 400, payload
+        assert 'error' in response